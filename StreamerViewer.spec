@@ -8,6 +8,7 @@ a = Analysis(
     datas=[
         ('templates', 'templates'),
         ('static', 'static'),
+        ('static/vendor/leaflet', 'static/vendor/leaflet'),  # Offline map assets (main.py --vendor-assets)
         ('splash.png', '.'),
     ],
     hiddenimports=[
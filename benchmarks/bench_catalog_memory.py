@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory held by the track, video and recording catalogs.
+
+A domain/rtmpkey tree of MP4 stubs (3,200 recordings by default) and a set of
+short tracks are generated, scanned once as a warm-up and then scanned again
+--repeat times under tracemalloc. The smallest retained size of the compact
+catalog records is compared with the same catalogs converted to dicts
+(record.to_dict(), the shape every entry had before the records and still has
+at the JSON/template boundary).
+
+Usage:
+    python benchmarks/bench_catalog_memory.py [--domains 8] [--rtmpkeys 8] [--files 50] [--tracks 200]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from bench_scan import build_recording_tree
+from run_benchmarks import git_revision
+from synthetic import import_main, write_track
+
+
+def retained(function, repeat):
+    """Run function under tracemalloc, returning (result, fewest bytes still allocated afterwards)"""
+    sizes = []
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = function()
+            gc.collect()
+            sizes.append(tracemalloc.get_traced_memory()[0])
+        finally:
+            tracemalloc.stop()
+    return result, min(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--domains', type=int, default=8)
+    parser.add_argument('--rtmpkeys', type=int, default=8, help='rtmpkeys per domain')
+    parser.add_argument('--files', type=int, default=50, help='Recordings per rtmpkey')
+    parser.add_argument('--tracks', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3, help='Scans per measurement; the smallest size is kept')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        recordings = build_recording_tree(data_dir, options.domains, options.rtmpkeys, options.files)
+        for i in range(options.tracks):
+            write_track(os.path.join(data_dir, 'tracks', f'track{i}.tsv'), 1700000000 + i * 3600, 60, seed=i)
+        app = import_main(data_dir)
+
+        results = {}
+        for name, scan in (('tracks', app.get_track_files), ('videos', app.get_video_files),
+                           ('recordings', app.get_recording_files)):
+            scan()  # Warm up imports and the file system cache outside the measurement
+            records, records_bytes = retained(scan, options.repeat)
+            dicts, dicts_bytes = retained(lambda: [record.to_dict() for record in scan()], options.repeat)
+            results[name] = {
+                'entries': len(records),
+                'records_mb': round(records_bytes / 2**20, 2),
+                'dicts_mb': round(dicts_bytes / 2**20, 2),
+                'bytes_per_record': round(records_bytes / max(1, len(records))),
+                'bytes_per_dict': round(dicts_bytes / max(1, len(dicts))),
+                'reduction': round(1 - records_bytes / dicts_bytes, 3) if dicts_bytes else None
+            }
+            del records, dicts
+            print(f"{name}: {results[name]}", file=sys.stderr)
+
+    report = {
+        'benchmark': 'catalog_memory',
+        'revision': git_revision(),
+        'synthetic': {
+            'domains': options.domains, 'rtmpkeys': options.rtmpkeys,
+            'files_per_rtmpkey': options.files, 'recordings': recordings, 'tracks': options.tracks
+        },
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare TSV tracks with their compact (.ctrk) copies.
+
+Synthetic tracks of several lengths are written, compacted with the same code
+as --compact-tracks, and the file sizes, load_track_data() times and catalog
+listing (get_track_files()) times of both formats are reported.
+
+Usage:
+    python benchmarks/bench_compact.py [--points 3600 86400 1000000] [--repeat 3] [--output results.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+from run_benchmarks import git_revision, time_call
+from synthetic import import_main, write_track
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--points', type=int, nargs='+', default=[3600, 86400, 1000000],
+                        help='Track lengths (one point per second)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        tracks_dir = os.path.join(data_dir, 'tracks')
+        os.makedirs(tracks_dir)
+        for index, points in enumerate(options.points):
+            write_track(os.path.join(tracks_dir, f'track_{points}.tsv'), 1700000000 + index * 2000000,
+                        points, seed=index)
+        # Make the tracks old enough to count as finished
+        old = time.time() - 86400
+        for track_file in glob.glob(os.path.join(tracks_dir, '*.tsv')):
+            os.utime(track_file, (old, old))
+
+        app = import_main(data_dir)
+        listing_tsv = time_call(app.get_track_files, options.repeat)
+
+        start = time.perf_counter()
+        app.compact_tracks()
+        compact_seconds = time.perf_counter() - start
+        listing_compact = time_call(app.get_track_files, options.repeat)
+
+        results = {}
+        for points in options.points:
+            tsv_file = os.path.join(tracks_dir, f'track_{points}.tsv')
+            compact_file = os.path.join(tracks_dir, f'track_{points}.ctrk')
+
+            def load_tsv():
+                app.track_tail_cache.clear()
+                return app.load_track_data(tsv_file)
+
+            results[f'track_{points}'] = {
+                'points': points,
+                'tsv_bytes': os.path.getsize(tsv_file),
+                'compact_bytes': os.path.getsize(compact_file),
+                'size_ratio': round(os.path.getsize(compact_file) / os.path.getsize(tsv_file), 4),
+                'load_tsv': time_call(load_tsv, options.repeat),
+                'load_compact': time_call(lambda: app.load_track_data(compact_file), options.repeat)
+            }
+            result = results[f'track_{points}']
+            print(f"{points} points: {result['tsv_bytes']} -> {result['compact_bytes']} bytes "
+                  f"({result['size_ratio']:.1%}), load {result['load_tsv']['median_ms']:.1f} ms -> "
+                  f"{result['load_compact']['median_ms']:.1f} ms", file=sys.stderr)
+
+    report = {
+        'benchmark': 'compact_tracks',
+        'revision': git_revision(),
+        'compact_seconds': round(compact_seconds, 3),
+        'get_track_files_tsv': listing_tsv,
+        'get_track_files_compact': listing_compact,
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory use of the streaming track exports on very long tracks.
+
+A synthetic track (1M points by default) is exported through the Flask test
+client as GPX, KML, GeoJSON and a GPX ZIP archive, consuming the
+response chunk by chunk. Peak Python heap usage is measured with tracemalloc
+and compared to load_track_data(), i.e. holding the parsed track in memory as
+the old convert-by-hand scripts did. Timings include the tracemalloc
+overhead and are only comparable with each other.
+
+Usage:
+    python benchmarks/bench_export.py [--points 1000000] [--tolerance 5] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from run_benchmarks import git_revision
+from synthetic import import_main, write_track
+
+
+def measure(function):
+    """Run function under tracemalloc, returning (result, seconds, peak bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def consume(client, url):
+    """Stream a response and return the number of body bytes received"""
+    response = client.get(url, buffered=False)
+    if response.status_code != 200:
+        raise SystemExit(f"{url} returned {response.status_code}")
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--points', type=int, default=1000000)
+    parser.add_argument('--tolerance', type=float, default=5.0, help='Simplification tolerance for the simplified run')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.makedirs(os.path.join(data_dir, 'tracks'))
+        track_file = write_track(os.path.join(data_dir, 'tracks', 'long.tsv'), 1700000000, options.points)
+        track_mb = round(os.path.getsize(track_file) / 2**20, 2)
+        app = import_main(data_dir)
+        client = app.app.test_client()
+
+        results = {}
+        coordinates, elapsed, peak = measure(lambda: app.load_track_data(track_file))
+        results['load_track_data'] = {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 2**20, 2),
+                                      'points': len(coordinates)}
+        del coordinates
+        app.track_tail_cache.clear()
+
+        urls = {f'export_{fmt}': f'/api/track/long.{fmt}' for fmt in ('gpx', 'kml', 'geojson')}
+        urls['export_gpx_simplified'] = f'/api/track/long.gpx?tolerance={options.tolerance:g}'
+        urls['export_zip'] = '/api/tracks/export.zip?format=gpx'
+        for name, url in urls.items():
+            size, elapsed, peak = measure(lambda: consume(client, url))
+            results[name] = {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 2**20, 2),
+                             'output_mb': round(size / 2**20, 2)}
+            print(f"{name}: {results[name]}", file=sys.stderr)
+
+    report = {
+        'benchmark': 'export',
+        'revision': git_revision(),
+        'points': options.points,
+        'track_mb': track_mb,
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
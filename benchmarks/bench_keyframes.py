@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the MP4 keyframe index on multi-GB recordings.
+
+The recordings are written with a sparse mdat hole, so a 4 GB file costs a
+few MB on disk. Bytes read are taken from /proc/self/io (Linux) to show that
+only the box headers and the moov box are touched.
+
+Usage:
+    python benchmarks/bench_keyframes.py [--sizes-gb 1 4 8] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import import_main, write_mp4
+
+
+def bytes_read():
+    """Bytes read by this process so far, or None when /proc/self/io is unavailable"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes-gb', type=float, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--hours', type=float, default=2.0, help='Recording length in hours')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        app = import_main(data_dir)
+        results = []
+        for size_gb in options.sizes_gb:
+            path = os.path.join(data_dir, f'{size_gb:g}gb.mp4')
+            write_mp4(path, duration=options.hours * 3600, mdat_size=int(size_gb * 1024 ** 3))
+
+            timings = []
+            read = None
+            for _ in range(options.repeat):
+                before = bytes_read()
+                start = time.perf_counter()
+                index = app.build_keyframe_index(path)
+                timings.append(time.perf_counter() - start)
+                after = bytes_read()
+                if before is not None and after is not None:
+                    read = after - before
+
+            results.append({
+                'file_size': os.path.getsize(path),
+                'samples': index['sample_count'],
+                'keyframes': len(index['keyframes']),
+                'best_seconds': min(timings),
+                'bytes_read': read
+            })
+            os.remove(path)
+
+    report = {'benchmark': 'keyframe_index', 'python': sys.version.split()[0], 'results': results}
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark the recording directory scanners across scan thread pool sizes.
+
+A deep domain/rtmpkey tree of small MP4 stubs is generated (or --data-dir is
+used as is) and get_video_files() / get_recording_files() are timed for each
+--workers value, which is what --scan-workers sets in main.py. Compare the
+worker counts on the storage you care about: USB sticks usually peak at 1-2
+workers, SSDs and network shares keep improving well past 4.
+
+Usage:
+    python benchmarks/bench_scan.py [--domains 8] [--rtmpkeys 8] [--files 25] [--workers 1 2 4 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from run_benchmarks import git_revision, time_call
+from synthetic import import_main, write_mp4
+
+
+def build_recording_tree(root, domains, rtmpkeys, files, start_time=1700000000):
+    """Write domains x rtmpkeys directories holding files MP4 stubs each"""
+    recordings_dir = os.path.join(root, 'recordings', 'webcam')
+    template = os.path.join(root, 'template.mp4')
+    write_mp4(template, duration=60, fps=5, gop=10, sample_size=64)
+    with open(template, 'rb') as f:
+        data = f.read()
+    os.remove(template)
+
+    count = 0
+    for d in range(domains):
+        for k in range(rtmpkeys):
+            rtmpkey_dir = os.path.join(recordings_dir, f'domain{d}', f'key{k}')
+            os.makedirs(rtmpkey_dir, exist_ok=True)
+            for i in range(files):
+                with open(os.path.join(rtmpkey_dir, f'{start_time + count * 60}.mp4'), 'wb') as f:
+                    f.write(data)
+                count += 1
+    os.makedirs(os.path.join(root, 'tracks'), exist_ok=True)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', help='Benchmark an existing streamerData directory instead of synthetic data')
+    parser.add_argument('--domains', type=int, default=8)
+    parser.add_argument('--rtmpkeys', type=int, default=8, help='rtmpkeys per domain')
+    parser.add_argument('--files', type=int, default=25, help='Recordings per rtmpkey')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = options.data_dir or temp_dir
+        recordings = None
+        if not options.data_dir:
+            recordings = build_recording_tree(data_dir, options.domains, options.rtmpkeys, options.files)
+        app = import_main(data_dir)
+
+        results = {}
+        for workers in options.workers:
+            app.SCAN_WORKERS = workers
+            results[f'workers_{workers}'] = {
+                'get_video_files': time_call(app.get_video_files, options.repeat),
+                'get_recording_files': time_call(app.get_recording_files, options.repeat)
+            }
+            print(f"workers={workers}: get_video_files "
+                  f"{results[f'workers_{workers}']['get_video_files']['median_ms']:.1f} ms, "
+                  f"get_recording_files {results[f'workers_{workers}']['get_recording_files']['median_ms']:.1f} ms",
+                  file=sys.stderr)
+
+    report = {
+        'benchmark': 'scan',
+        'revision': git_revision(),
+        'cpu_count': os.cpu_count(),
+        'synthetic': None if options.data_dir else {
+            'domains': options.domains, 'rtmpkeys': options.rtmpkeys,
+            'files_per_rtmpkey': options.files, 'recordings': recordings
+        },
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
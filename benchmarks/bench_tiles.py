@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark the basemap tile proxy against a local stand-in tile server.
+
+main.py is imported with --tile-url pointing at a stand-in server run by this
+script, which answers every tile with a noise PNG of --tile-kb after
+--upstream-ms of latency and counts the requests it receives. The benchmark
+measures cold (proxied) and warm (cached) tile latency, checks that
+concurrent requests for one missing tile reach the tile server once,
+prefetches the tiles around a synthetic track, then stops the tile server and
+serves those tiles again (offline). Finally enough distinct tiles are
+requested to overflow --tile-cache-mb and the cache size is checked against
+the cap.
+
+Usage:
+    python benchmarks/bench_tiles.py [--tiles 64] [--upstream-ms 50] [--tile-kb 16] [--tile-cache-mb 16]
+"""
+
+import argparse
+import http.server
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from run_benchmarks import git_revision
+from synthetic import import_main, write_track
+
+
+class StandInTileHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the same PNG for every /z/x/y.png after a fixed delay"""
+
+    tile = b''
+    delay = 0.0
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StandInTileHandler.lock:
+            StandInTileHandler.requests += 1
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(self.tile)))
+        self.end_headers()
+        self.wfile.write(self.tile)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_tiles(client, tiles):
+    """Request tiles through the proxy, returning per-request latencies in milliseconds"""
+    timings = []
+    for z, x, y in tiles:
+        start = time.perf_counter()
+        response = client.get(f'/tiles/{z}/{x}/{y}.png')
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"/tiles/{z}/{x}/{y}.png returned {response.status_code}")
+    return timings
+
+
+def summarise(timings):
+    """p50/p95 and mean of latencies in milliseconds"""
+    ordered = sorted(timings)
+    return {
+        'p50_ms': round(ordered[len(ordered) // 2], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'mean_ms': round(statistics.mean(ordered), 3),
+        'requests': len(ordered)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tiles', type=int, default=64, help='Distinct tiles for the cold/warm runs')
+    parser.add_argument('--upstream-ms', type=float, default=50.0, help='Latency of the stand-in tile server')
+    parser.add_argument('--tile-kb', type=int, default=16, help='Size of each stand-in tile')
+    parser.add_argument('--tile-cache-mb', type=int, default=16)
+    parser.add_argument('--zooms', default='12-14', help='Zoom levels prefetched around the synthetic track')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    options = parser.parse_args()
+
+    tile_server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInTileHandler)
+    tile_server.daemon_threads = True
+    threading.Thread(target=tile_server.serve_forever, daemon=True).start()
+    tile_url = f'http://127.0.0.1:{tile_server.server_address[1]}/{{z}}/{{x}}/{{y}}.png'
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.makedirs(os.path.join(data_dir, 'tracks'))
+        write_track(os.path.join(data_dir, 'tracks', 'walk.tsv'), 1700000000, 3600)
+        app = import_main(data_dir, '--tile-url', tile_url, '--tile-cache-mb', str(options.tile_cache_mb))
+        client = app.app.test_client()
+
+        side = int(math.sqrt(options.tile_kb * 1024 / 4))
+        StandInTileHandler.tile = app.encode_png_rgba(side, side, os.urandom(side * side * 4))
+        StandInTileHandler.delay = options.upstream_ms / 1000
+
+        results = {}
+        tiles = [(14, 8180 + i % 16, 5440 + i // 16) for i in range(options.tiles)]
+        upstream = StandInTileHandler.requests
+        results['cold'] = dict(summarise(get_tiles(client, tiles)),
+                               upstream_requests=StandInTileHandler.requests - upstream)
+        upstream = StandInTileHandler.requests
+        results['warm'] = dict(summarise(get_tiles(client, tiles)),
+                               upstream_requests=StandInTileHandler.requests - upstream)
+
+        upstream = StandInTileHandler.requests
+        threads = [threading.Thread(target=get_tiles, args=(app.app.test_client(), [(14, 9000, 6000)]))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results['coalesced'] = {'concurrent_requests': len(threads),
+                                'upstream_requests': StandInTileHandler.requests - upstream}
+
+        start = time.perf_counter()
+        response = client.post('/api/track/walk/prefetch-tiles', json={'zooms': options.zooms})
+        if response.status_code != 202:
+            raise SystemExit(f"Prefetch returned {response.status_code}: {response.get_json()}")
+        job_id = response.get_json()['job_id']
+        while True:
+            job = client.get(f'/api/tiles/prefetch/{job_id}').get_json()
+            if job['status'] != 'running':
+                break
+            time.sleep(0.05)
+        results['prefetch'] = {key: job[key] for key in ('zooms', 'total', 'fetched', 'cached', 'failed', 'status')}
+        results['prefetch']['seconds'] = round(time.perf_counter() - start, 3)
+
+        # Offline: every prefetched tile must now come from the cache
+        tile_server.shutdown()
+        tile_server.server_close()
+        bounds = app.refresh_density_index()['walk']['bounds']
+        prefetched = [tile for zoom in job['zooms'] for tile in app.tiles_covering(bounds, zoom)]
+        offline = [client.get(f'/tiles/{z}/{x}/{y}.png') for z, x, y in prefetched]
+        results['offline'] = {'tiles': len(offline),
+                              'served': sum(1 for response in offline if response.status_code == 200)}
+
+        # Overflow the cache and check the LRU keeps it under the cap
+        overflow_server = http.server.ThreadingHTTPServer(tile_server.server_address, StandInTileHandler)
+        overflow_server.daemon_threads = True
+        threading.Thread(target=overflow_server.serve_forever, daemon=True).start()
+        StandInTileHandler.delay = 0
+        count = int(options.tile_cache_mb * 1024 * 1.5 / options.tile_kb)
+        get_tiles(client, [(16, 30000 + i % 64, 20000 + i // 64) for i in range(count)])
+        overflow_server.shutdown()
+        status = client.get('/api/tiles').get_json()
+        results['lru'] = {key: status[key] for key in ('entries', 'bytes', 'max_bytes', 'evicted', 'hit_rate')}
+        results['lru']['within_cap'] = status['bytes'] <= status['max_bytes']
+        for name, result in results.items():
+            print(f"{name}: {result}", file=sys.stderr)
+
+    report = {
+        'benchmark': 'tiles',
+        'revision': git_revision(),
+        'upstream_ms': options.upstream_ms,
+        'tile_bytes': len(StandInTileHandler.tile),
+        'tile_cache_mb': options.tile_cache_mb,
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
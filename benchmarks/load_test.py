@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Load test a local Streamer Viewer instance with simulated viewers, seekers and uploaders.
+
+main.py is started as a separate process in server-only mode against a
+synthetic streamerData tree (or --data-dir), with --upload-url pointing at a
+throttled stand-in upload server run by this script. Virtual users then loop
+until the phase ends:
+
+    viewers    GET /, GET /view/<id> and GET /api/track/<id> for random tracks
+    seekers    ranged GET /video/<path> reads at random offsets
+    uploaders  POST /upload-recording, then follow /upload-progress-stream/<id>
+               until the upload finishes
+
+Each --scale step multiplies the user counts, so a sweep such as
+--scale 1 2 4 8 shows where latency starts to collapse. Per route the report
+gives p50/p95/p99 latency, requests per second and body throughput. For the
+SSE route the latency is the time until the stream closed, i.e. the upload
+duration seen by the client.
+
+Uploads are recorded in the data directory's upload manifest, so point
+--data-dir only at a scratch copy of real data.
+
+Usage:
+    python benchmarks/load_test.py [--viewers 4] [--seekers 4] [--uploaders 1] [--duration 20] [--scale 1 2 4]
+"""
+
+import argparse
+import http.server
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+from run_benchmarks import git_revision
+from synthetic import REPO_DIR, build_data_tree
+
+
+class StandInUploadHandler(http.server.BaseHTTPRequestHandler):
+    """Accept recording uploads like the real server, reading the body at a limited rate"""
+
+    bytes_per_second = 0
+
+    def do_POST(self):
+        remaining = int(self.headers.get('Content-Length', 0))
+        started = time.perf_counter()
+        received = 0
+        while remaining > 0:
+            data = self.rfile.read(min(65536, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            received += len(data)
+            if self.bytes_per_second:
+                delay = received / self.bytes_per_second - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+        body = json.dumps({'success': True, 'files_replaced': 1, 'error': ''}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def free_port():
+    """Ask the OS for an unused local port"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_instance(data_dir, port, upload_url, extra_args):
+    """Start main.py in server-only mode and wait until it answers"""
+    command = [sys.executable, os.path.join(REPO_DIR, 'main.py'), '--data-dir', data_dir,
+               '--server-only', '--port', str(port), '--upload-url', upload_url, *extra_args]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"main.py exited with status {process.returncode}")
+        try:
+            requests.get(f'http://127.0.0.1:{port}/api/page-cache', timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("main.py did not start within 60 seconds")
+
+
+def list_catalog(data_dir):
+    """Track IDs and (name, path, size) recordings of a data directory"""
+    tracks_dir = os.path.join(data_dir, 'tracks')
+    track_ids = sorted(os.path.splitext(name)[0] for name in os.listdir(tracks_dir)
+                       if name.endswith(('.tsv', '.ctrk')))
+    recordings_dir = os.path.join(data_dir, 'recordings', 'webcam')
+    videos = []
+    for dirpath, _, filenames in os.walk(recordings_dir):
+        for filename in filenames:
+            if filename.endswith('.mp4'):
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, recordings_dir).replace(os.sep, '/')
+                videos.append((name, path, os.path.getsize(path)))
+    return sorted(set(track_ids)), sorted(videos)
+
+
+class Recorder:
+    """Thread-safe per-route latency and byte counts"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.bytes = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, size, ok):
+        with self.lock:
+            if ok:
+                self.samples[route].append(seconds)
+                self.bytes[route] += size
+            else:
+                self.errors[route] += 1
+
+    def timed_get(self, session, route, url, **kwargs):
+        """GET a URL, reading the whole body, and record the outcome"""
+        started = time.perf_counter()
+        try:
+            response = session.get(url, timeout=60, **kwargs)
+            ok = response.status_code in (200, 206)
+            self.record(route, time.perf_counter() - started, len(response.content), ok)
+            return response if ok else None
+        except requests.RequestException:
+            self.record(route, time.perf_counter() - started, 0, False)
+            return None
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarise(recorder, elapsed):
+    """Per-route latency percentiles and throughput in milliseconds and MB/s"""
+    summary = {}
+    for route in sorted(set(recorder.samples) | set(recorder.errors)):
+        values = sorted(recorder.samples[route])
+        entry = {'requests': len(values), 'errors': recorder.errors[route],
+                 'requests_per_second': round(len(values) / elapsed, 2),
+                 'mb_per_second': round(recorder.bytes[route] / elapsed / 2**20, 3)}
+        if values:
+            entry.update({f'p{p}_ms': round(percentile(values, p / 100) * 1000, 2) for p in (50, 95, 99)})
+            entry['max_ms'] = round(values[-1] * 1000, 2)
+        summary[route] = entry
+    return summary
+
+
+def viewer(base_url, track_ids, recorder, deadline, rng):
+    """Open the index and viewer pages and fetch track data"""
+    session = requests.Session()
+    while time.time() < deadline:
+        recorder.timed_get(session, 'index', f'{base_url}/')
+        track_id = rng.choice(track_ids)
+        recorder.timed_get(session, 'view', f'{base_url}/view/{track_id}')
+        recorder.timed_get(session, 'api_track', f'{base_url}/api/track/{track_id}')
+
+
+def seeker(base_url, videos, recorder, deadline, rng, range_size):
+    """Scrub through recordings with ranged reads at random offsets"""
+    session = requests.Session()
+    while time.time() < deadline:
+        name, _, size = rng.choice(videos)
+        start = rng.randrange(max(1, size - range_size))
+        recorder.timed_get(session, 'video_range', f'{base_url}/video/{name}',
+                           headers={'Range': f'bytes={start}-{start + range_size - 1}'})
+
+
+def uploader(base_url, videos, recorder, deadline, rng):
+    """Upload random recordings and follow their progress streams to the end"""
+    session = requests.Session()
+    while time.time() < deadline:
+        _, path, _ = rng.choice(videos)
+        started = time.perf_counter()
+        try:
+            response = session.post(f'{base_url}/upload-recording', data={'file_path': path, 'force': '1'}, timeout=60)
+            ok = response.status_code == 200
+            recorder.record('upload_start', time.perf_counter() - started, 0, ok)
+            if not ok:
+                continue
+            upload_id = response.json()['upload_id']
+        except (requests.RequestException, ValueError, KeyError):
+            recorder.record('upload_start', time.perf_counter() - started, 0, False)
+            continue
+
+        # The stream closes once the upload has completed, failed or been cancelled. It
+        # gets its own connection, like a browser EventSource: the SSE responses
+        # announce keep-alive but the development server closes the socket after them
+        started = time.perf_counter()
+        status = None
+        size = 0
+        try:
+            with requests.get(f'{base_url}/upload-progress-stream/{upload_id}', stream=True, timeout=300) as stream:
+                for line in stream.iter_lines():
+                    size += len(line) + 1
+                    if line.startswith(b'data: '):
+                        event = json.loads(line[6:])
+                        if event.get('type') == 'progress':
+                            status = event.get('status')
+            recorder.record('upload_sse', time.perf_counter() - started, size, status == 'completed')
+        except (requests.RequestException, ValueError):
+            recorder.record('upload_sse', time.perf_counter() - started, size, False)
+
+
+def run_phase(base_url, track_ids, videos, counts, duration, range_size, seed):
+    """Run one load level and return the per-route summary"""
+    recorder = Recorder()
+    deadline = time.time() + duration
+    threads = []
+    for kind, count in counts.items():
+        for i in range(count):
+            rng = random.Random(f'{seed}-{kind}-{i}')
+            if kind == 'viewers':
+                target, extra = viewer, (track_ids,)
+            elif kind == 'seekers':
+                target, extra = seeker, (videos,)
+            else:
+                target, extra = uploader, (videos,)
+            arguments = (base_url, *extra, recorder, deadline, rng)
+            if kind == 'seekers':
+                arguments += (range_size,)
+            threads.append(threading.Thread(target=target, args=arguments, daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarise(recorder, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', help='Use an existing (scratch) streamerData directory instead of synthetic data')
+    parser.add_argument('--tracks', type=int, default=8)
+    parser.add_argument('--points', type=int, default=1800)
+    parser.add_argument('--video-sample-size', type=int, default=1000, help='Bytes per synthetic video frame (5 fps)')
+    parser.add_argument('--viewers', type=int, default=4)
+    parser.add_argument('--seekers', type=int, default=4)
+    parser.add_argument('--uploaders', type=int, default=1)
+    parser.add_argument('--scale', type=int, nargs='+', default=[1], help='Multipliers for the user counts, one phase each')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per phase')
+    parser.add_argument('--range-size', type=int, default=256 * 1024, help='Bytes per ranged video read')
+    parser.add_argument('--upload-kbps', type=int, default=8000, help='Stand-in upload server bandwidth (0 = unlimited)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--server-args', nargs=argparse.REMAINDER, default=[],
+                        help='Extra main.py arguments, e.g. --server-args --metrics')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    options = parser.parse_args()
+
+    StandInUploadHandler.bytes_per_second = options.upload_kbps * 1000 // 8
+    upload_server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInUploadHandler)
+    upload_server.daemon_threads = True
+    threading.Thread(target=upload_server.serve_forever, daemon=True).start()
+    upload_url = f'http://127.0.0.1:{upload_server.server_port}/upload?domain={{domain}}&rtmpkey={{rtmpkey}}'
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = options.data_dir or temp_dir
+        synthetic = None
+        if not options.data_dir:
+            synthetic = build_data_tree(data_dir, tracks=options.tracks, points=options.points,
+                                        video_sample_size=options.video_sample_size, seed=options.seed)
+            del synthetic['track_ids']
+        track_ids, videos = list_catalog(data_dir)
+        if not track_ids or not videos:
+            raise SystemExit("The data directory needs at least one track and one recording")
+
+        port = free_port()
+        process = start_instance(data_dir, port, upload_url, options.server_args)
+        base_url = f'http://127.0.0.1:{port}'
+        phases = []
+        try:
+            # Warm up the catalog and duration caches so the first phase is not a cold start
+            requests.get(f'{base_url}/', timeout=300)
+            requests.get(f'{base_url}/view/{track_ids[0]}', timeout=300)
+            for scale in options.scale:
+                counts = {'viewers': options.viewers * scale, 'seekers': options.seekers * scale,
+                          'uploaders': options.uploaders * scale}
+                routes = run_phase(base_url, track_ids, videos, counts, options.duration,
+                                   options.range_size, options.seed)
+                phases.append({'scale': scale, 'users': counts, 'routes': routes})
+                print(f"scale {scale} ({counts['viewers']} viewers, {counts['seekers']} seekers, "
+                      f"{counts['uploaders']} uploaders):", file=sys.stderr)
+                for route, entry in routes.items():
+                    print(f"  {route:<12} {entry['requests']:>6} ok {entry['errors']:>4} err  "
+                          f"p50 {entry.get('p50_ms', 0):>8.1f}  p95 {entry.get('p95_ms', 0):>8.1f}  "
+                          f"p99 {entry.get('p99_ms', 0):>8.1f} ms  {entry['requests_per_second']:>7.1f} req/s  "
+                          f"{entry['mb_per_second']:>7.2f} MB/s", file=sys.stderr)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+            upload_server.shutdown()
+
+    report = {
+        'benchmark': 'load',
+        'revision': git_revision(),
+        'cpu_count': os.cpu_count(),
+        'duration_per_phase': options.duration,
+        'synthetic': synthetic,
+        'upload_kbps': options.upload_kbps,
+        'phases': phases
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
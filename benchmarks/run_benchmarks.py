@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the catalog, parsing and matching hot paths of main.py.
+
+A synthetic streamerData tree is generated in a temporary directory (or
+--data-dir is used as is), each hot path is timed several times and the
+results are written as JSON so runs from different commits can be compared.
+On synthetic data it also checks that growing a recording in place
+invalidates the cached viewer page.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--tracks 20] [--points 3600] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import REPO_DIR, build_data_tree, import_main
+
+
+def time_call(function, repeat, setup=None):
+    """Run function repeat times and summarise the wall-clock timings in milliseconds; setup runs untimed before each call"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'runs': repeat
+    }
+
+
+def git_revision():
+    """Current commit of the repository, if available"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def clear_track_caches(app):
+    """Drop cached track tails and rendered pages so the next load starts cold"""
+    with app.track_tail_lock:
+        app.track_tail_cache.clear()
+    with app.page_cache_lock:
+        app.page_cache.clear()
+        app.page_cache_bytes = 0
+
+
+def run_suite(app, repeat):
+    """Time every hot path against the already configured data directory"""
+    from flask import render_template
+
+    results = {}
+    tracks = app.get_track_files()
+    videos = app.get_video_files()
+    if not tracks:
+        raise SystemExit("No tracks found in the data directory")
+    track = max(tracks, key=lambda t: t['coord_count'])
+    coordinates = app.load_track_data(track['filepath'])
+    related = app.find_all_related_videos(track['start_time'], track['end_time'], videos)
+
+    results['get_track_files'] = time_call(app.get_track_files, repeat)
+    results['get_video_files'] = time_call(app.get_video_files, repeat)
+    results['get_recording_files'] = time_call(app.get_recording_files, repeat)
+    results['load_track_data'] = time_call(lambda: app.load_track_data(track['filepath']), repeat,
+                                           setup=lambda: clear_track_caches(app))
+    results['load_track_data_warm'] = time_call(lambda: app.load_track_data(track['filepath']), repeat)
+    results['find_all_related_videos'] = time_call(
+        lambda: [app.find_all_related_videos(t['start_time'], t['end_time'], videos) for t in tracks], repeat)
+
+    # Catalog records are converted to dicts at the template boundary, as in the routes
+    with app.app.test_request_context('/'):
+        results['render_index'] = time_call(
+            lambda: render_template('index.html', tracks=[t.to_dict() for t in tracks],
+                                    videos=[v.to_dict() for v in videos]), repeat)
+    with app.app.test_request_context(f"/view/{track['track_id']}"):
+        results['render_view_track'] = time_call(
+            lambda: render_template('viewer.html', track=track.to_dict(), coordinates=coordinates,
+                                    videos=[v.to_dict() for v in related]), repeat)
+
+    client = app.app.test_client()
+    results['route_index'] = time_call(lambda: client.get('/'), repeat)
+    results['route_view_track'] = time_call(lambda: client.get(f"/view/{track['track_id']}"), repeat,
+                                            setup=lambda: clear_track_caches(app))
+    results['route_view_track_warm'] = time_call(lambda: client.get(f"/view/{track['track_id']}"), repeat)
+
+    return results, {'tracks': len(tracks), 'videos': len(videos),
+                     'largest_track_points': len(coordinates), 'related_videos': len(related)}
+
+
+def check_page_invalidation(app):
+    """Check that modifying a related recording in place re-renders the cached viewer page"""
+    client = app.app.test_client()
+    track = max(app.get_track_files(), key=lambda t: t['coord_count'])
+    related = app.find_all_related_videos(track['start_time'], track['end_time'], app.get_video_files())
+    if not related:
+        raise SystemExit("The largest track has no related recordings to modify")
+    url = f"/view/{track['track_id']}"
+    etag = client.get(url).headers['ETag']
+    client.get(url)
+    misses = app.page_cache_stats[('view', 'miss')]
+
+    with open(related[0]['filepath'], 'ab') as f:
+        f.write(b'\0' * 1024)  # The recording grows without its directory changing
+    response = client.get(url, headers={'If-None-Match': etag})
+    checks = {
+        'etag_changed': response.status_code == 200 and response.headers['ETag'] != etag,
+        'page_rerendered': app.page_cache_stats[('view', 'miss')] == misses + 1
+    }
+    if not all(checks.values()):
+        raise SystemExit(f"Cached viewer page survived an in-place recording change: {checks}")
+    return checks
+
+
+def compare(before_path, after_path):
+    """Print the median change per benchmark between two result files"""
+    with open(before_path, 'r') as f:
+        before = json.load(f)
+    with open(after_path, 'r') as f:
+        after = json.load(f)
+    print(f"{'benchmark':28} {'before ms':>12} {'after ms':>12} {'change':>9}")
+    for name, result in after['results'].items():
+        if name not in before['results']:
+            continue
+        old = before['results'][name]['median_ms']
+        new = result['median_ms']
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{name:28} {old:12.3f} {new:12.3f} {change:+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', help='Benchmark an existing streamerData directory instead of synthetic data')
+    parser.add_argument('--tracks', type=int, default=20)
+    parser.add_argument('--points', type=int, default=3600, help='Points per track (one per second)')
+    parser.add_argument('--domains', type=int, default=2)
+    parser.add_argument('--rtmpkeys', type=int, default=2, help='rtmpkeys per domain')
+    parser.add_argument('--segment-seconds', type=int, default=600, help='Length of each MP4 stub')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two result files')
+    options = parser.parse_args()
+
+    if options.compare:
+        compare(*options.compare)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = options.data_dir or temp_dir
+        config = None
+        if not options.data_dir:
+            start = time.perf_counter()
+            config = build_data_tree(data_dir, tracks=options.tracks, points=options.points,
+                                     domains=options.domains, rtmpkeys=options.rtmpkeys,
+                                     segment_seconds=options.segment_seconds)
+            config.pop('track_ids')
+            config['generate_seconds'] = round(time.perf_counter() - start, 3)
+        app = import_main(data_dir)
+        results, dataset = run_suite(app, options.repeat)
+        # Modifies a recording, so only on synthetic data
+        checks = None if options.data_dir else check_page_invalidation(app)
+
+    report = {
+        'benchmark': 'hot_paths',
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'synthetic': config,
+        'dataset': dataset,
+        'results': results,
+        'checks': checks
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
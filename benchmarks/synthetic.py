@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Synthetic data for Streamer Viewer benchmarks.
+
+Builds streamerData trees (TSV tracks plus domain/rtmpkey recordings) and
+MP4 files with valid moov headers (real sample tables, placeholder sample
+payloads) so the scanning and MP4 parsing paths in main.py can be exercised
+without any real recordings.
+"""
+
+import importlib
+import os
+import random
+import struct
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# H.264 baseline 320x240 parameter sets used in the avcC box
+SPS = bytes.fromhex('6742c00dd90141fb0110000003001000000303c0f142a0')
+PPS = bytes.fromhex('68ce3c80')
+
+
+def box(kind, *payload):
+    """Build an MP4 box from its type and payload parts"""
+    data = b''.join(payload)
+    return struct.pack('>I4s', 8 + len(data), kind) + data
+
+
+def full_box(kind, version, flags, *payload):
+    """Build an MP4 full box (version + 24-bit flags header)"""
+    return box(kind, struct.pack('>I', (version << 24) | flags), *payload)
+
+
+def u32_table(kind, values, fields=1, prefix=b''):
+    """Build a sample table full box with an entry count"""
+    count = len(values) // fields
+    return full_box(kind, 0, 0, prefix, struct.pack('>I', count),
+                    struct.pack(f'>{len(values)}I', *values))
+
+
+def video_sample_entry(width=320, height=240):
+    """avc1 sample description with an avcC configuration record"""
+    avcc = box(b'avcC',
+               bytes([1, SPS[1], SPS[2], SPS[3], 0xFF, 0xE1]),
+               struct.pack('>H', len(SPS)), SPS,
+               b'\x01', struct.pack('>H', len(PPS)), PPS)
+    return box(b'avc1',
+               b'\x00' * 6, struct.pack('>H', 1),
+               b'\x00' * 16,
+               struct.pack('>HHIIIH', width, height, 0x00480000, 0x00480000, 0, 1),
+               b'\x00' * 32,
+               struct.pack('>Hh', 0x0018, -1),
+               avcc)
+
+
+def audio_sample_entry(sample_rate=48000):
+    """mp4a sample description with a minimal AAC-LC esds box"""
+    decoder_specific = bytes([0x11, 0x90])  # AAC-LC, 48 kHz, stereo
+    esds = full_box(b'esds', 0, 0,
+                    bytes([0x03, 0x19]), struct.pack('>HB', 1, 0),
+                    bytes([0x04, 0x11, 0x40, 0x15]), b'\x00' * 3,
+                    struct.pack('>II', 128000, 128000),
+                    bytes([0x05, 0x02]), decoder_specific,
+                    bytes([0x06, 0x01, 0x02]))
+    return box(b'mp4a',
+               b'\x00' * 6, struct.pack('>H', 1),
+               b'\x00' * 8,
+               struct.pack('>HHHHI', 2, 16, 0, 0, sample_rate << 16),
+               esds)
+
+
+def trak(track_id, handler, timescale, sample_entry, sample_sizes, sample_delta,
+         chunk_offsets, samples_per_chunk, sync_samples=None, co64=False, header=b'\x00' * 8):
+    """Build a trak box for a constant-delta track"""
+    sample_count = len(sample_sizes)
+    duration = sample_count * sample_delta
+    if handler == b'vide':
+        media_header = full_box(b'vmhd', 0, 1, b'\x00' * 8)
+    else:
+        media_header = full_box(b'smhd', 0, 0, b'\x00' * 4)
+
+    stbl_boxes = [
+        full_box(b'stsd', 0, 0, struct.pack('>I', 1), sample_entry),
+        u32_table(b'stts', [sample_count, sample_delta], 2),
+    ]
+    if sync_samples is not None:
+        stbl_boxes.append(u32_table(b'stss', sync_samples))
+    stbl_boxes.append(u32_table(b'stsc', [1, samples_per_chunk, 1], 3))
+    stbl_boxes.append(full_box(b'stsz', 0, 0, struct.pack('>II', 0, sample_count),
+                               struct.pack(f'>{sample_count}I', *sample_sizes)))
+    if co64:
+        stbl_boxes.append(full_box(b'co64', 0, 0, struct.pack('>I', len(chunk_offsets)),
+                                   struct.pack(f'>{len(chunk_offsets)}Q', *chunk_offsets)))
+    else:
+        stbl_boxes.append(u32_table(b'stco', chunk_offsets))
+
+    return box(b'trak',
+               full_box(b'tkhd', 0, 3, struct.pack('>IIIII', 0, 0, track_id, 0, duration),
+                        b'\x00' * 52, header),
+               box(b'mdia',
+                   full_box(b'mdhd', 0, 0, struct.pack('>IIIIHH', 0, 0, timescale, duration, 0x55C4, 0)),
+                   full_box(b'hdlr', 0, 0, struct.pack('>I4s', 0, handler), b'\x00' * 12,
+                            b'VideoHandler\x00' if handler == b'vide' else b'SoundHandler\x00'),
+                   box(b'minf',
+                       media_header,
+                       box(b'dinf', full_box(b'dref', 0, 0, struct.pack('>I', 1), full_box(b'url ', 0, 1))),
+                       box(b'stbl', *stbl_boxes))))
+
+
+def write_mp4(path, duration=10.0, fps=30, gop=30, sample_size=2000, moov_first=False,
+              audio=False, mdat_size=None):
+    """
+    Write a synthetic MP4 recording.
+
+    Args:
+        path: Output file path
+        duration: Length in seconds
+        fps: Video frame rate
+        gop: Frames between keyframes (one chunk per GOP)
+        sample_size: Video sample size in bytes
+        moov_first: Place moov before mdat (faststart) instead of at the end
+        audio: Add an AAC audio track interleaved per GOP
+        mdat_size: Pad mdat to this many bytes with a sparse hole, to simulate
+                   multi-GB recordings without writing them
+    """
+    video_timescale = fps * 1000
+    frame_count = int(duration * fps)
+    video_sizes = [sample_size] * frame_count
+    sync_samples = list(range(1, frame_count + 1, gop))
+
+    # AAC frames are 1024 samples at 48 kHz
+    audio_rate = 48000
+    audio_per_gop = int(round(gop / fps * audio_rate / 1024)) if audio else 0
+    gop_count = (frame_count + gop - 1) // gop
+    audio_sizes = [256] * (audio_per_gop * gop_count)
+
+    payload_size = sum(video_sizes) + sum(audio_sizes)
+    total_mdat = max(payload_size, mdat_size or 0)
+    large_mdat = total_mdat + 8 > 0xFFFFFFFF
+    mdat_header_size = 16 if large_mdat else 8
+    use_co64 = total_mdat > 0xFFFFFFFF - 4096
+
+    ftyp = box(b'ftyp', b'isom', struct.pack('>I', 512), b'isomiso2avc1mp41')
+
+    def build_moov(mdat_start):
+        video_offsets = []
+        audio_offsets = []
+        offset = mdat_start + mdat_header_size
+        for g in range(gop_count):
+            frames = min(gop, frame_count - g * gop)
+            video_offsets.append(offset)
+            offset += frames * sample_size
+            if audio:
+                audio_offsets.append(offset)
+                offset += audio_per_gop * 256
+        traks = [trak(1, b'vide', video_timescale, video_sample_entry(), video_sizes, 1000,
+                      video_offsets, gop, sync_samples, use_co64,
+                      header=struct.pack('>II', 320 << 16, 240 << 16))]
+        if audio:
+            traks.append(trak(2, b'soun', audio_rate, audio_sample_entry(audio_rate), audio_sizes, 1024,
+                              audio_offsets, audio_per_gop, None, use_co64))
+        mvhd = full_box(b'mvhd', 0, 0,
+                        struct.pack('>IIII', 0, 0, 1000, int(duration * 1000)),
+                        struct.pack('>IH', 0x00010000, 0x0100), b'\x00' * 10,
+                        struct.pack('>9I', 0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000),
+                        b'\x00' * 24, struct.pack('>I', 3 if audio else 2))
+        return box(b'moov', mvhd, *traks)
+
+    if moov_first:
+        moov_size = len(build_moov(0))
+        moov = build_moov(len(ftyp) + moov_size)
+    else:
+        moov = build_moov(len(ftyp))
+
+    if large_mdat:
+        mdat_header = struct.pack('>I4sQ', 1, b'mdat', total_mdat + 16)
+    else:
+        mdat_header = struct.pack('>I4s', total_mdat + 8, b'mdat')
+
+    with open(path, 'wb') as f:
+        f.write(ftyp)
+        if moov_first:
+            f.write(moov)
+        f.write(mdat_header)
+        # Recognisable but cheap payload: each sample starts with its index
+        for g in range(gop_count):
+            frames = min(gop, frame_count - g * gop)
+            for i in range(frames):
+                f.write(struct.pack('>I', g * gop + i) + b'\x00' * (sample_size - 4))
+            if audio:
+                f.write(b'\x01' * (audio_per_gop * 256))
+        if total_mdat > payload_size:
+            f.seek(total_mdat - payload_size, os.SEEK_CUR)
+        if not moov_first:
+            f.write(moov)
+        f.truncate()
+    return path
+
+
+def write_track(path, start_time, points, latitude=51.5, longitude=-0.12, seed=0):
+    """Write a TSV track with one point per second wandering from the given origin"""
+    rng = random.Random(seed)
+    lines = ['timestamp\tlatitude\tlongitude\taltitude\taccuracy\taltitudeAccuracy\theading\tspeed\n']
+    for i in range(points):
+        latitude += rng.uniform(-1e-4, 2e-4)
+        longitude += rng.uniform(-1e-4, 2e-4)
+        lines.append(f"{start_time + i}\t{latitude:.7f}\t{longitude:.7f}\t{100 + i * 0.01:.1f}\t"
+                     f"3.0\t5.0\t{i % 360}\t{rng.uniform(0, 40):.2f}\n")
+    with open(path, 'w') as f:
+        f.writelines(lines)
+    return path
+
+
+def build_data_tree(root, tracks=20, points=3600, domains=2, rtmpkeys=2, segment_seconds=600,
+                    video_fps=5, video_sample_size=64, start_time=1700000000, seed=0):
+    """
+    Build a streamerData tree with tracks and matching recordings.
+
+    Each track gets a run of video segments covering it, spread round-robin
+    across the domain/rtmpkey directories. The MP4 stubs have valid moov
+    headers (real sample tables) but tiny sample payloads.
+
+    Returns:
+        dict: Counts and the track IDs written
+    """
+    tracks_dir = os.path.join(root, 'tracks')
+    recordings_dir = os.path.join(root, 'recordings', 'webcam')
+    os.makedirs(tracks_dir, exist_ok=True)
+    keys = [(f'domain{d}', f'key{k}') for d in range(domains) for k in range(rtmpkeys)]
+    for domain, rtmpkey in keys:
+        os.makedirs(os.path.join(recordings_dir, domain, rtmpkey), exist_ok=True)
+
+    track_ids = []
+    video_count = 0
+    for t in range(tracks):
+        track_start = start_time + t * (points + 3600)
+        track_id = f'track_{track_start}'
+        write_track(os.path.join(tracks_dir, f'{track_id}.tsv'), track_start, points,
+                    latitude=45 + (t % 10) * 0.5, longitude=7 + (t // 10) * 0.5, seed=seed + t)
+        track_ids.append(track_id)
+
+        domain, rtmpkey = keys[t % len(keys)]
+        for segment_start in range(track_start, track_start + points, segment_seconds):
+            duration = min(segment_seconds, track_start + points - segment_start)
+            write_mp4(os.path.join(recordings_dir, domain, rtmpkey, f'{segment_start}.mp4'),
+                      duration=duration, fps=video_fps, gop=video_fps * 2, sample_size=video_sample_size)
+            video_count += 1
+
+    return {'tracks': tracks, 'points': points, 'videos': video_count,
+            'domains': domains, 'rtmpkeys': rtmpkeys, 'track_ids': track_ids}
+
+
+def import_main(data_dir, *extra_args):
+    """Import main.py as a module configured for the given data directory"""
+    if 'main' in sys.modules:
+        return sys.modules['main']
+    sys.path.insert(0, REPO_DIR)
+    saved_argv = sys.argv
+    sys.argv = ['main.py', '--data-dir', data_dir, '--server-only', *extra_args]
+    try:
+        return importlib.import_module('main')
+    finally:
+        sys.argv = saved_argv
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else 'synthetic.mp4'
+    write_mp4(target)
+    print(f"Wrote {target}")
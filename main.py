@@ -4,13 +4,23 @@ Streamer Viewer - Standalone GPS Track and Video Viewer
 Displays GPS tracks as lines on a map with synchronized video playbook
 
 Command line usage:
-    python main.py [--data-dir PATH] [--server-only] [--port PORT]
+    python main.py [--data-dir PATH [PATH ...]] [--server-only] [--port PORT]
 
 Arguments:
     --data-dir PATH    Specify custom path to streamer data directory
-                      (default: ./streamerData)
+                      (default: ./streamerData). Several paths (e.g. one per
+                      USB stick) are scanned concurrently and merged.
     --server-only     Start only the web server without opening webview or splash screen
     --port PORT       Specify port for web server (default: auto-detect starting from 5001)
+    --metrics         Expose request/scan metrics in Prometheus format at /metrics
+    --profile         Allow per-request profiling (?__profile=1), listed at /debug/profiles
+    --scan-workers N  Threads for recording scans and duration probes (default: 4)
+    --page-cache-mb N Memory cap for rendered index/viewer pages (default: 64, 0 disables)
+    --upload-url URL  Upload endpoint template with {domain} and {rtmpkey} placeholders
+    --asgi            Serve through uvicorn (optional) with SSE streams as coroutines
+    --compact-tracks  Convert finished TSV tracks to the compact .ctrk format and exit
+    --auto-compact    Compact finished tracks in the background while serving
+    --compact-remove-tsv  Delete TSV tracks after their compact copy is verified
 
 Examples:
     python main.py
@@ -19,6 +29,7 @@ Examples:
     python main.py --server-only
     python main.py --port 8080
     python main.py --data-dir "/path/to/data" --server-only --port 3000
+    python main.py --data-dir /media/usb1/streamerData /media/usb2/streamerData
 """
 
 import threading
@@ -28,11 +39,26 @@ import os
 import socket
 import glob
 import re
+import math
+import bisect
+import zlib
+import zipfile
 import argparse
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file, Response
+import cProfile
+import functools
+import hashlib
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape as xml_escape
+from flask import Flask, render_template, request, jsonify, send_file, Response, g
 import json
 import uuid
+import queue
+import asyncio
+import io
 from werkzeug.utils import secure_filename
 import requests
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
@@ -74,7 +100,11 @@ def parse_arguments():
     parser.add_argument(
         '--data-dir', 
         type=str, 
-        help='Path to the streamer data directory (default: ./streamerData)'
+        nargs='+',
+        action='extend',
+        metavar='PATH',
+        help='Path to the streamer data directory (default: ./streamerData). '
+             'Several directories are merged into one catalog'
     )
     parser.add_argument(
         '--server-only',
@@ -91,6 +121,84 @@ def parse_arguments():
         action='store_true',
         help='Start the application window in fullscreen mode'
     )
+    parser.add_argument(
+        '--metrics',
+        action='store_true',
+        help='Collect request/scan metrics and expose them in Prometheus format at /metrics'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Allow profiling individual requests with ?__profile=1 or an "X-Profile: 1" header'
+    )
+    parser.add_argument(
+        '--page-cache-mb',
+        type=int,
+        default=64,
+        help='Memory cap for cached rendered index/viewer pages in MB (0 disables the cache; default: 64)'
+    )
+    parser.add_argument(
+        '--warmup-tracks',
+        type=int,
+        default=3,
+        help='Most recent tracks parsed by the startup warm-up (default: 3)'
+    )
+    parser.add_argument(
+        '--no-warmup',
+        action='store_true',
+        help='Skip the background warm-up of catalogs and video durations at startup'
+    )
+    parser.add_argument(
+        '--upload-url',
+        default='https://{domain}.org/ajaxservices.php?command=replacerecordings&rtmpkey={rtmpkey}',
+        help='Upload endpoint template; {domain} and {rtmpkey} are filled in per recording '
+             '(default: https://{domain}.org/ajaxservices.php?command=replacerecordings&rtmpkey={rtmpkey})'
+    )
+    parser.add_argument(
+        '--tile-url',
+        default='https://tile.openstreetmap.org/{z}/{x}/{y}.png',
+        help='Basemap tile server proxied and cached at /tiles/{z}/{x}/{y}.png '
+             '(default: https://tile.openstreetmap.org/{z}/{x}/{y}.png)'
+    )
+    parser.add_argument(
+        '--tile-cache-mb',
+        type=int,
+        default=512,
+        help='Disk space for cached basemap tiles in MB; least recently used tiles are removed (0 disables; default: 512)'
+    )
+    parser.add_argument(
+        '--vendor-assets',
+        action='store_true',
+        help='Download the Leaflet files into static/vendor/leaflet so they are served and bundled locally, then exit'
+    )
+    parser.add_argument(
+        '--asgi',
+        action='store_true',
+        help='Serve through uvicorn with event-driven SSE streams (falls back to the threaded server '
+             'if uvicorn is not installed)'
+    )
+    parser.add_argument(
+        '--compact-tracks',
+        action='store_true',
+        help='Convert finished TSV tracks to the compact format, report sizes and load times, then exit'
+    )
+    parser.add_argument(
+        '--auto-compact',
+        action='store_true',
+        help='Compact finished TSV tracks in the background while the server runs'
+    )
+    parser.add_argument(
+        '--compact-remove-tsv',
+        action='store_true',
+        help='Delete TSV tracks once their verified compact copy is written'
+    )
+    parser.add_argument(
+        '--scan-workers',
+        type=int,
+        default=4,
+        help='Threads used to scan recording directories and read video durations '
+             '(1-2 suits USB sticks, 8+ suits SSDs; default: 4)'
+    )
     return parser.parse_args()
 
 def open_browser(url):
@@ -120,237 +228,2027 @@ else:
     # Running as script
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Set STREAMER_DATA_DIR from command line argument or default
+# Set the data directories from command line arguments or default
 if args.data_dir:
-    # Use absolute path from command line argument
-    STREAMER_DATA_DIR = os.path.abspath(args.data_dir)
+    # Use absolute paths from command line arguments
+    DATA_DIRS = list(dict.fromkeys(os.path.abspath(path) for path in args.data_dir))
 else:
     # Use default path relative to the application directory
-    STREAMER_DATA_DIR = os.path.join(BASE_DIR, 'streamerData')
+    DATA_DIRS = [os.path.join(BASE_DIR, 'streamerData')]
+
+# The first data directory is the primary one: it holds the profiles and the
+# caches that combine all directories (density tiles)
+STREAMER_DATA_DIR = DATA_DIRS[0]
+CACHE_DIR = os.path.join(STREAMER_DATA_DIR, 'cache')
+PROFILES_DIR = os.path.join(STREAMER_DATA_DIR, 'profiles')
+DENSITY_CACHE_DIR = os.path.join(CACHE_DIR, 'density')
+
+# Data roots
+# Every data directory is a root with its own tracks, recordings and cache
+# directories. With more than one root, track IDs become "<root>:<track_id>"
+# and video paths "<root>/<domain>/<rtmpkey>/<file>" so they stay unique.
+# Each root is scanned on its own thread; a root that does not answer within
+# ROOT_SCAN_TIMEOUT (a sleeping or unplugged USB stick) contributes its last
+# complete scan while the others are served without waiting for it.
+ROOT_SCAN_TIMEOUT = 5.0
+
+def make_data_root(path, taken_names):
+    """Describe one data directory, giving it a unique URL-safe name"""
+    path = os.path.normpath(path)
+    base_name = os.path.basename(path)
+    if base_name.lower() == 'streamerdata':
+        # /media/usb1/streamerData is better known as "usb1"
+        base_name = os.path.basename(os.path.dirname(path)) or base_name
+    base_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', base_name) or 'data'
+    name = base_name
+    suffix = 2
+    while name in taken_names:
+        name = f"{base_name}-{suffix}"
+        suffix += 1
+    taken_names.add(name)
+    cache_dir = os.path.join(path, 'cache')
+    return {
+        'name': name,
+        'path': path,
+        'tracks_dir': os.path.join(path, 'tracks'),
+        'recordings_dir': os.path.join(path, 'recordings', 'webcam'),
+        'cache_dir': cache_dir,
+        'density_index_file': os.path.join(cache_dir, 'density', 'index.json'),
+        'upload_manifest_file': os.path.join(path, 'upload_manifest.json'),
+        'executor': ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'root-{name}'),
+        'scans': {},
+        'results': {},
+        'stalled': False
+    }
+
+_root_names = set()
+DATA_ROOTS = [make_data_root(path, _root_names) for path in DATA_DIRS]
+DATA_ROOTS_BY_NAME = {root['name']: root for root in DATA_ROOTS}
+MULTI_ROOT = len(DATA_ROOTS) > 1
+data_root_lock = threading.Lock()
+
+def namespaced_track_id(root, track_id):
+    """Prefix a track ID with its root name when several roots are configured"""
+    return f"{root['name']}:{track_id}" if MULTI_ROOT else track_id
+
+def namespaced_video_path(root, path):
+    """Prefix a domain/rtmpkey/file path with its root name when several roots are configured"""
+    return f"{root['name']}/{path}" if MULTI_ROOT else path
+
+def data_root_for_path(path):
+    """Return the data root containing a file, defaulting to the primary root"""
+    for root in DATA_ROOTS:
+        if path.startswith(os.path.join(root['path'], '')):
+            return root
+    return DATA_ROOTS[0]
 
-TRACKS_DIR = os.path.join(STREAMER_DATA_DIR, 'tracks')
-RECORDINGS_DIR = os.path.join(STREAMER_DATA_DIR, 'recordings', 'webcam')
+def scan_data_roots(kind, scan_function):
+    """
+    Run scan_function(root) on every data root concurrently and merge the results.
+
+    A root whose scan is still running after ROOT_SCAN_TIMEOUT is marked as
+    stalled and contributes its last complete result. Later calls do not wait
+    for a stalled root again, they just pick up its scan once it finishes.
+
+    Args:
+        kind: Result slot name ('tracks', 'videos', 'recordings')
+        scan_function: Callable returning a list for one root
+
+    Returns:
+        list: Concatenated results of all roots
+    """
+    if not MULTI_ROOT:
+        return scan_function(DATA_ROOTS[0])
+
+    waiting = []
+    with data_root_lock:
+        for root in DATA_ROOTS:
+            future = root['scans'].get(kind)
+            if future is not None and not future.done():
+                if not root['stalled']:
+                    waiting.append(future)
+                continue
+            if future is not None:
+                collect_root_scan(root, kind, future)
+            future = root['executor'].submit(scan_function, root)
+            root['scans'][kind] = future
+            if not root['stalled']:
+                waiting.append(future)
+    wait(waiting, timeout=ROOT_SCAN_TIMEOUT)
+
+    merged = []
+    with data_root_lock:
+        for root in DATA_ROOTS:
+            future = root['scans'][kind]
+            if future.done():
+                collect_root_scan(root, kind, future)
+            elif not root['stalled']:
+                root['stalled'] = True
+                print(f"Warning: data directory {root['path']} is not responding, using its last scan")
+            merged.extend(root['results'].get(kind, []))
+    return merged
+
+def collect_root_scan(root, kind, future):
+    """Store the result of a finished root scan"""
+    try:
+        root['results'][kind] = future.result()
+    except Exception as e:
+        print(f"Error scanning data directory {root['path']}: {e}")
+        root['results'][kind] = []
+    if root['stalled']:
+        print(f"Data directory {root['path']} is responding again")
+        root['stalled'] = False
 
 # Global dictionary to track upload progress and allow cancellation
 upload_progress = {}
 upload_threads = {}
-# SSE clients tracking for upload progress
-upload_sse_clients = {}
 
-def get_track_files():
-    """Get list of GPS track files (.tsv format)"""
+# Stream events
+# SSE endpoints are written as generators that yield message strings and
+# StreamWait objects. A StreamWait with a key waits until stream_events.notify()
+# is called for that key (e.g. an upload's ID on every progress change); one
+# without a key just waits out its timeout. Under the threaded Werkzeug server
+# the generator runs on the request thread (iter_sse); in --asgi mode it is
+# driven by a coroutine (stream_sse_async), so an idle stream holds no thread.
+class StreamWait:
+    """Wait request yielded by an SSE event generator"""
+    __slots__ = ('key', 'version', 'timeout')
+
+    def __init__(self, key, version, timeout):
+        self.key = key
+        self.version = version
+        self.timeout = timeout
+
+class ChangeNotifier:
+    """Per-key change counters that threads and asyncio tasks can wait on"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.versions = Counter()
+        self.async_waiters = {}
+
+    def version(self, key):
+        with self.condition:
+            return self.versions[key]
+
+    def notify(self, key):
+        with self.condition:
+            self.versions[key] += 1
+            self.condition.notify_all()
+            waiters = self.async_waiters.pop(key, ())
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._wake, future)
+
+    @staticmethod
+    def _wake(future):
+        if not future.done():
+            future.set_result(None)
+
+    def wait(self, key, version, timeout):
+        """Block until key changes from version or timeout seconds pass"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.versions[key] != version, timeout)
+
+    async def wait_async(self, key, version):
+        """Wait until key changes from version (callers add their own timeout)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self.condition:
+            if self.versions[key] != version:
+                return
+            self.async_waiters.setdefault(key, []).append(waiter)
+        try:
+            await future
+        finally:
+            with self.condition:
+                waiters = self.async_waiters.get(key)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self.async_waiters[key]
+
+stream_events = ChangeNotifier()
+
+def iter_sse(events):
+    """Run an SSE event generator on the calling server thread"""
+    try:
+        for item in events:
+            if isinstance(item, StreamWait):
+                if item.key is None:
+                    time.sleep(item.timeout)
+                else:
+                    stream_events.wait(item.key, item.version, item.timeout)
+            else:
+                yield item
+    finally:
+        events.close()
+
+def sse_response(events):
+    """
+    Build a Server-Sent Events response from an event generator.
+
+    The generator is also left in the WSGI environ, where the ASGI front end
+    picks it up to run it as a coroutine instead of iterating the response.
+    """
+    request.environ['streamer.sse_events'] = events
+    return Response(
+        iter_sse(events),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Cache-Control'
+        }
+    )
+
+# Metrics
+# Collected only when started with --metrics. Instrumented functions are
+# wrapped at definition time, so with metrics disabled they run unwrapped.
+METRICS_ENABLED = args.metrics
+METRICS_PREFIX = 'streamer_viewer_'
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_HELP = {
+    'http_request_duration_seconds': ('histogram', 'Time spent handling a request, by route'),
+    'function_duration_seconds': ('histogram', 'Time spent in instrumented scan and probe functions'),
+    'files_scanned_total': ('counter', 'Track and video files visited by catalog scans'),
+    'video_bytes_served_total': ('counter', 'Bytes of video sent by serve_video'),
+    'upload_bytes_total': ('counter', 'Bytes sent to the upload server'),
+    'upload_duration_seconds': ('histogram', 'Wall-clock time of finished uploads'),
+    'uploads_total': ('counter', 'Finished uploads, by final status'),
+    'sse_streams_active': ('gauge', 'Currently open Server-Sent Events streams'),
+    'page_cache_requests_total': ('counter', 'Rendered page cache lookups, by page and result'),
+    'coalesced_calls_total': ('counter', 'Catalog scans and track loads, run or joined to one in flight'),
+}
+
+metrics_values = {}      # (name, labels) -> counter or gauge value
+metrics_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+metrics_lock = threading.Lock()
+
+def metrics_inc(name, value=1, **labels):
+    """Add to a counter or gauge"""
+    key = (name, tuple(sorted(labels.items())))
+    with metrics_lock:
+        metrics_values[key] = metrics_values.get(key, 0) + value
+
+def metrics_observe(name, seconds, **labels):
+    """Record an observation in a latency histogram"""
+    key = (name, tuple(sorted(labels.items())))
+    with metrics_lock:
+        histogram = metrics_histograms.get(key)
+        if histogram is None:
+            histogram = metrics_histograms[key] = [0] * (len(METRICS_LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(METRICS_LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        histogram[-2] += seconds
+        histogram[-1] += 1
+
+def timed(function_name):
+    """Decorator recording call latency in function_duration_seconds when metrics are enabled"""
+    def decorator(function):
+        if not METRICS_ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics_observe('function_duration_seconds', time.perf_counter() - start, function=function_name)
+        return wrapper
+    return decorator
+
+def format_metric_labels(labels, extra=()):
+    """Format a label tuple as {name="value",...}"""
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def render_metrics():
+    """Render all collected metrics in the Prometheus text exposition format"""
+    with metrics_lock:
+        values = dict(metrics_values)
+        histograms = {key: list(value) for key, value in metrics_histograms.items()}
+
+    lines = []
+    for name, (metric_type, help_text) in METRICS_HELP.items():
+        full_name = METRICS_PREFIX + name
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        if metric_type == 'histogram':
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(METRICS_LATENCY_BUCKETS, histogram):
+                    cumulative += count
+                    lines.append(f"{full_name}_bucket{format_metric_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{full_name}_bucket{format_metric_labels(labels, [('le', '+Inf')])} {histogram[-1]}")
+                lines.append(f"{full_name}_sum{format_metric_labels(labels)} {histogram[-2]}")
+                lines.append(f"{full_name}_count{format_metric_labels(labels)} {histogram[-1]}")
+        else:
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{full_name}{format_metric_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+def list_track_sources(tracks_dir):
+    """
+    Pick the file to read for every track in a tracks directory.
+
+    A compact track is used when it is up to date with its TSV (or the TSV
+    has been removed); otherwise the TSV is read.
+
+    Returns:
+        dict: Track name to (path, stat, compact header or None, all files of the track)
+    """
+    tsv_entries = {}
+    compact_entries = {}
+    with os.scandir(tracks_dir) as entries:
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension == '.tsv':
+                tsv_entries[name] = entry
+            elif extension == COMPACT_TRACK_EXTENSION:
+                compact_entries[name] = entry
+
+    sources = {}
+    for name in list(tsv_entries) + [name for name in compact_entries if name not in tsv_entries]:
+        tsv_entry = tsv_entries.get(name)
+        compact_entry = compact_entries.get(name)
+        files = [entry.path for entry in (tsv_entry, compact_entry) if entry is not None]
+        try:
+            if compact_entry is not None:
+                try:
+                    compact_stat = compact_entry.stat()
+                    header = read_compact_header(compact_entry.path, compact_stat)
+                    if tsv_entry is None or compact_track_is_current(header, tsv_entry.stat()):
+                        sources[name] = (compact_entry.path, compact_stat, header, files)
+                        continue
+                except (OSError, ValueError) as e:
+                    print(f"Error reading compact track {compact_entry.path}: {e}")
+            if tsv_entry is not None:
+                sources[name] = (tsv_entry.path, tsv_entry.stat(), None, files)
+        except OSError:
+            continue
+    return sources
+
+# Request coalescing
+# Concurrent callers asking for the same catalog scan or track load share one
+# in-flight computation: the first caller runs it and the others wait for its
+# result (or exception) instead of walking the same directories or parsing the
+# same file again. Nothing is kept once the call returns, so a caller arriving
+# afterwards starts a new flight and never gets an older result than it would
+# have computed itself. Shared results must be treated as read-only.
+inflight_calls = {}  # key -> Future of the running call
+inflight_lock = threading.Lock()
+coalesce_stats = Counter()  # (kind, 'run' | 'joined') -> calls
+
+def coalesced(key, function, *args):
+    """Run function(*args) once for all concurrent callers using the same key; key[0] names the kind"""
+    with inflight_lock:
+        flight = inflight_calls.get(key)
+        leader = flight is None
+        if leader:
+            flight = inflight_calls[key] = Future()
+        coalesce_stats[(key[0], 'run' if leader else 'joined')] += 1
+    if METRICS_ENABLED:
+        metrics_inc('coalesced_calls_total', kind=key[0], result='run' if leader else 'joined')
+    if not leader:
+        return flight.result()
+
+    try:
+        result = function(*args)
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    else:
+        flight.set_result(result)
+        return result
+    finally:
+        with inflight_lock:
+            del inflight_calls[key]
+
+# Catalog records
+# Scans keep one small __slots__ object per track, video and recording instead
+# of a dict. Times are plain epoch numbers, root/domain/rtmpkey strings are interned
+# (thousands of recordings share a handful of them) and values derivable from
+# the others (file names, paths, datetimes, end times) are computed on access.
+# Code in this module reads records like the dicts they replace, through
+# record['key'] and record.get('key'); to_dict() rebuilds the full dict, with
+# datetime objects, where a catalog entry is handed to jsonify or a template.
+class CatalogRecord:
+    """Read-only mapping access and dict conversion shared by catalog records"""
+    __slots__ = ()
+    keys = ()
+    optional_keys = ()  # Left out of the mapping while None
+    datetime_keys = ()  # Epoch times handed out as datetime objects by to_dict()
+
+    def __getitem__(self, key):
+        if key not in self.keys:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None and key in self.optional_keys:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        result = {}
+        for key in self.keys:
+            value = getattr(self, key)
+            if value is None and key in self.optional_keys:
+                continue
+            if key in self.datetime_keys:
+                value = datetime.fromtimestamp(value)
+            elif isinstance(value, tuple):
+                value = list(value)
+            result[key] = value
+        return result
+
+class TrackRecord(CatalogRecord):
+    """One GPS track of the catalog"""
+    __slots__ = ('track_id', 'filepath', 'files', 'created', 'modified', 'size',
+                 'coord_count', 'start_time', 'end_time', 'root')
+    keys = ('track_id', 'filename', 'filepath', 'files', 'created', 'modified', 'size',
+            'coord_count', 'start_time', 'end_time', 'duration', 'root')
+    datetime_keys = ('created', 'modified')
+
+    def __init__(self, root, track_id, filepath, files, created, modified, size,
+                 coord_count, start_time, end_time):
+        self.root = sys.intern(root)
+        self.track_id = track_id
+        self.filepath = filepath
+        self.files = tuple(files)
+        self.created = created
+        self.modified = modified
+        self.size = size
+        self.coord_count = coord_count
+        self.start_time = start_time
+        self.end_time = end_time
+
+    @property
+    def filename(self):
+        return os.path.basename(self.filepath)
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time if self.start_time and self.end_time else 0
+
+class VideoRecord(CatalogRecord):
+    """One timestamp-named recording usable for track playback"""
+    __slots__ = ('root', 'domain', 'rtmpkey', 'basename', 'timestamp', 'size', 'duration')
+    keys = ('filename', 'filepath', 'timestamp', 'datetime', 'size', 'domain', 'rtmpkey',
+            'root', 'duration', 'end_time')
+    optional_keys = ('duration', 'end_time')
+
+    def __init__(self, root, domain, rtmpkey, basename, timestamp, size, duration):
+        self.root = sys.intern(root)
+        self.domain = sys.intern(domain)
+        self.rtmpkey = sys.intern(rtmpkey)
+        self.basename = basename
+        self.timestamp = timestamp
+        self.size = size
+        self.duration = duration
+
+    @property
+    def filepath(self):
+        return os.path.join(DATA_ROOTS_BY_NAME[self.root]['recordings_dir'],
+                            self.domain, self.rtmpkey, self.basename)
+
+    @property
+    def filename(self):
+        return namespaced_video_path(DATA_ROOTS_BY_NAME[self.root],
+                                     f"{self.domain}/{self.rtmpkey}/{self.basename}")
+
+    @property
+    def datetime(self):
+        # Inside methods "datetime" still names the datetime class
+        return datetime.fromtimestamp(self.timestamp)
+
+    @property
+    def end_time(self):
+        return self.timestamp + self.duration if self.duration is not None else None
+
+class RecordingRecord(VideoRecord):
+    """One .mp4 file of the recording uploader; timestamp is None for other file names"""
+    __slots__ = ('mtime_ns',)
+    keys = ('path', 'name', 'mtime', 'mtime_ns', 'size', 'location', 'active', 'duration',
+            'timestamp', 'domain', 'rtmpkey', 'root')
+    optional_keys = ()
+    location = 'Local'
+    active = False  # No active recordings in upload interface
+
+    def __init__(self, root, domain, rtmpkey, basename, timestamp, size, duration, mtime_ns):
+        super().__init__(root, domain, rtmpkey, basename, timestamp, size, duration)
+        self.mtime_ns = mtime_ns
+
+    path = VideoRecord.filepath
+    name = VideoRecord.filename
+
+    @property
+    def mtime(self):
+        return self.mtime_ns / 1e9
+
+# TSV track summaries (point count, first and last timestamp) are kept per file
+# signature, so only new or growing tracks are read again by catalog scans
+track_summary_cache = {}
+track_summary_lock = threading.Lock()
+
+def get_track_summary(track_file, stat):
+    """Return (coord_count, start_time, end_time) of a TSV track"""
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with track_summary_lock:
+        cached = track_summary_cache.get(track_file)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    # Count coordinates by reading the file
+    coord_count = 0
+    start_time = None
+    end_time = None
+    
+    with open(track_file, 'r') as f:
+        for line in f:
+            if line.startswith('#') or line.strip() == '':
+                continue
+            if line.startswith('timestamp'):  # Header line
+                continue
+            
+            parts = line.strip().split('\t')
+            if len(parts) >= 3:  # At least timestamp, lat, lon
+                try:
+                    timestamp = int(parts[0])
+                    if start_time is None:
+                        start_time = timestamp
+                    end_time = timestamp
+                    coord_count += 1
+                except ValueError:
+                    continue
+
+    summary = (coord_count, start_time, end_time)
+    with track_summary_lock:
+        track_summary_cache[track_file] = (signature, summary)
+    return summary
+
+def scan_track_files(root):
+    """Get list of GPS track files (.tsv or compact format) in one data root"""
     tracks = []
-    if os.path.exists(TRACKS_DIR):
-        track_files = glob.glob(os.path.join(TRACKS_DIR, '*.tsv'))
-        for track_file in track_files:
+    if os.path.exists(root['tracks_dir']):
+        track_sources = list_track_sources(root['tracks_dir'])
+        if METRICS_ENABLED:
+            metrics_inc('files_scanned_total', len(track_sources), kind='track')
+        for name, (track_file, stat, header, files) in track_sources.items():
             try:
                 # Extract track ID from filename
-                track_id = os.path.splitext(os.path.basename(track_file))[0]
-                
-                # Get file stats
-                stat = os.stat(track_file)
-                created = datetime.fromtimestamp(stat.st_ctime)
-                modified = datetime.fromtimestamp(stat.st_mtime)
-                size = stat.st_size
-                
-                # Count coordinates by reading the file
-                coord_count = 0
-                start_time = None
-                end_time = None
+                track_id = namespaced_track_id(root, name)
                 
-                with open(track_file, 'r') as f:
-                    for line in f:
-                        if line.startswith('#') or line.strip() == '':
-                            continue
-                        if line.startswith('timestamp'):  # Header line
-                            continue
-                        
-                        parts = line.strip().split('\t')
-                        if len(parts) >= 3:  # At least timestamp, lat, lon
-                            try:
-                                timestamp = int(parts[0])
-                                if start_time is None:
-                                    start_time = timestamp
-                                end_time = timestamp
-                                coord_count += 1
-                            except ValueError:
-                                continue
+                if header is not None:
+                    # Compact tracks carry their metadata in the header
+                    created = header['source']['ctime']
+                    modified = header['source']['mtime']
+                    coord_count = header['coord_count']
+                    start_time = header['start_time']
+                    end_time = header['end_time']
+                else:
+                    created = stat.st_ctime
+                    modified = stat.st_mtime
+                    coord_count, start_time, end_time = get_track_summary(track_file, stat)
                 
-                tracks.append({
-                    'track_id': track_id,
-                    'filename': os.path.basename(track_file),
-                    'filepath': track_file,
-                    'created': created,
-                    'modified': modified,
-                    'size': size,
-                    'coord_count': coord_count,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'duration': end_time - start_time if start_time and end_time else 0
-                })
+                tracks.append(TrackRecord(root['name'], track_id, track_file, files, created, modified,
+                                          stat.st_size, coord_count, start_time, end_time))
             except Exception as e:
                 print(f"Error processing track file {track_file}: {e}")
                 continue
+    return tracks
+
+@timed('get_track_files')
+def get_track_files():
+    """Get list of GPS track files (.tsv format) from all data roots"""
+    return coalesced(('tracks',), build_track_catalog)
+
+def build_track_catalog():
+    """Scan all data roots for tracks, newest first"""
+    tracks = scan_data_roots('tracks', scan_track_files)
     
     # Sort by creation time, newest first
     tracks.sort(key=lambda x: x['created'], reverse=True)
     return tracks
 
-def get_video_files():
-    """Get list of video recording files from hierarchical directory structure"""
+# Recording directory scanning
+# The domain/rtmpkey tree is listed with os.scandir, so file types and stat
+# results come from the directory entries instead of separate isdir/stat calls.
+# rtmpkey directories and MediaInfo duration probes are spread over a bounded
+# thread pool; fewer workers suit seek-bound USB sticks, more suit SSDs.
+SCAN_WORKERS = max(1, args.scan_workers)
+
+def scan_pool_map(function, items):
+    """Apply function to items on the scan thread pool, keeping their order"""
+    items = list(items)
+    if SCAN_WORKERS == 1 or len(items) < 2:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(items)), thread_name_prefix='scan') as executor:
+        return list(executor.map(function, items))
+
+def scan_rtmpkey_dirs(recordings_dir):
+    """List (domain, rtmpkey, path) for every rtmpkey directory under recordings_dir"""
+    rtmpkey_dirs = []
+    try:
+        with os.scandir(recordings_dir) as entries:
+            domain_entries = [entry for entry in entries if entry.is_dir()]
+    except OSError:
+        return rtmpkey_dirs
+
+    for domain_entry in domain_entries:
+        try:
+            with os.scandir(domain_entry.path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        rtmpkey_dirs.append((domain_entry.name, entry.name, entry.path))
+        except OSError as e:
+            print(f"Error scanning {domain_entry.path}: {e}")
+    return rtmpkey_dirs
+
+def scan_mp4_files(rtmpkey_dir):
+    """List (domain, rtmpkey, filename, path, stat) for the .mp4 files of one rtmpkey directory"""
+    domain, rtmpkey, rtmpkey_path = rtmpkey_dir
+    files = []
+    try:
+        with os.scandir(rtmpkey_path) as entries:
+            for entry in entries:
+                if entry.name.endswith('.mp4'):
+                    try:
+                        files.append((domain, rtmpkey, entry.name, entry.path, entry.stat()))
+                    except OSError:
+                        continue
+    except OSError as e:
+        print(f"Error scanning {rtmpkey_path}: {e}")
+    return files
+
+def scan_recording_dirs(recordings_dir):
+    """List every .mp4 file under recordings_dir, scanning rtmpkey directories concurrently"""
+    files = []
+    for rtmpkey_files in scan_pool_map(scan_mp4_files, scan_rtmpkey_dirs(recordings_dir)):
+        files.extend(rtmpkey_files)
+    return files
+
+def scan_video_files(root):
+    """Get list of video recording files in one data root"""
     videos = []
     
-    if not os.path.exists(RECORDINGS_DIR):
+    if not os.path.exists(root['recordings_dir']):
         return videos
     
     # Walk through hierarchical structure: domain/rtmpkey/files
-    for domain in os.listdir(RECORDINGS_DIR):
-        domain_path = os.path.join(RECORDINGS_DIR, domain)
-        if not os.path.isdir(domain_path):
-            continue
-            
-        for rtmpkey in os.listdir(domain_path):
-            rtmpkey_path = os.path.join(domain_path, rtmpkey)
-            if not os.path.isdir(rtmpkey_path):
-                continue
-                
-            # Get all mp4 files in this rtmpkey directory
-            for filename in os.listdir(rtmpkey_path):
-                if filename.endswith('.mp4'):
-                    video_file = os.path.join(rtmpkey_path, filename)
-                    try:
-                        # Extract timestamp from filename (format: timestamp.mp4)
-                        match = re.match(r'^(\d+)\.mp4$', filename)
-                        if match:
-                            timestamp = int(match.group(1))
-                            
-                            # Get file stats
-                            stat = os.stat(video_file)
-                            size = stat.st_size
-                            
-                            # Get video duration
-                            duration = get_video_duration_mediainfo(video_file)
-                            end_time = None
-                            if duration is not None:
-                                end_time = timestamp + duration
-                            
-                            # Create display name with domain/rtmpkey context
-                            display_name = f"{domain}/{rtmpkey}/{filename}"
-                            
-                            video_data = {
-                                'filename': display_name,
-                                'filepath': video_file,
-                                'timestamp': timestamp,
-                                'datetime': datetime.fromtimestamp(timestamp),
-                                'size': size,
-                                'domain': domain,
-                                'rtmpkey': rtmpkey
-                            }
-                            
-                            # Only add duration and end_time if we successfully got them
-                            if duration is not None:
-                                video_data['duration'] = duration
-                                video_data['end_time'] = end_time
-                            
-                            videos.append(video_data)
-                    except Exception as e:
-                        print(f"Error processing video file {video_file}: {e}")
-                        continue
+    candidates = []
+    for domain, rtmpkey, filename, video_file, stat in scan_recording_dirs(root['recordings_dir']):
+        # Extract timestamp from filename (format: timestamp.mp4)
+        match = re.match(r'^(\d+)\.mp4$', filename)
+        if match:
+            candidates.append((domain, rtmpkey, filename, video_file, stat, int(match.group(1))))
+
+    # Get video durations (while the startup warm-up runs, only those it already probed)
+    probe = not warmup_partial()
+    durations = scan_pool_map(lambda c: get_cached_video_duration(c[3], c[4], probe), candidates)
+
+    for (domain, rtmpkey, filename, video_file, stat, timestamp), duration in zip(candidates, durations):
+        videos.append(VideoRecord(root['name'], domain, rtmpkey, filename, timestamp, stat.st_size, duration))
     
+    if METRICS_ENABLED:
+        metrics_inc('files_scanned_total', len(videos), kind='video')
+    return videos
+
+@timed('get_video_files')
+def get_video_files():
+    """Get list of video recording files from all data roots"""
+    return coalesced(('videos',), build_video_catalog)
+
+def build_video_catalog():
+    """Scan all data roots for timestamped recordings, newest first"""
+    videos = scan_data_roots('videos', scan_video_files)
+
     # Sort by timestamp, newest first
     videos.sort(key=lambda x: x['timestamp'], reverse=True)
     return videos
 
-def load_track_data(track_file):
-    """Load GPS track data from TSV file"""
-    coordinates = []
-    
-    try:
-        with open(track_file, 'r') as f:
-            # Skip comments and header
-            lines = f.readlines()
-            header_found = False
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('#') or line == '':
-                    continue
-                    
-                if line.startswith('timestamp') and not header_found:
-                    header_found = True
-                    continue
-                
-                parts = line.split('\t')
-                if len(parts) >= 3:  # At least timestamp, lat, lon
-                    try:
-                        coordinate = {
-                            'timestamp': int(parts[0]),
-                            'location': {
-                                'latitude': float(parts[1]),
-                                'longitude': float(parts[2]),
-                                'altitude': float(parts[3]) if parts[3] and parts[3] != '' else None,
-                                'accuracy': float(parts[4]) if len(parts) > 4 and parts[4] and parts[4] != '' else None,
-                                'altitudeAccuracy': float(parts[5]) if len(parts) > 5 and parts[5] and parts[5] != '' else None,
-                                'heading': float(parts[6]) if len(parts) > 6 and parts[6] and parts[6] != '' else None,
-                                'speed': float(parts[7]) if len(parts) > 7 and parts[7] and parts[7] != '' else None
-                            }
-                        }
-                        coordinates.append(coordinate)
-                    except ValueError as e:
-                        print(f"Error parsing line: {line} - {e}")
-                        continue
-    
-    except Exception as e:
-        print(f"Error loading track data: {e}")
-        return []
-    
-    return coordinates
+# Incremental track reading
+# A track that is still being recorded only grows, so the parsed coordinates of
+# recently loaded tracks are kept together with the byte offset of the last
+# complete line. Reloading parses just the lines appended since then; a file
+# that shrank or was replaced is read again from the start. Only tracks
+# modified within TRACK_TAIL_MAX_AGE (still being recorded) are kept, and the
+# cache is capped by total points as well as by entries.
+TRACK_TAIL_CACHE_SIZE = 8
+TRACK_TAIL_MAX_AGE = 600  # Seconds since the last modification for a track to count as recording
+TRACK_TAIL_MAX_POINTS = 1000000
+FOLLOW_POLL_INTERVAL = 1.0  # Seconds between checks for appended lines
+FOLLOW_KEEPALIVE_INTERVAL = 15.0
 
-def get_video_duration_mediainfo(path):
-    """Get video duration using pymediainfo library"""
-    try:
-        from pymediainfo import MediaInfo
-        media_info = MediaInfo.parse(path)
-        
-        # Try Video track first (most accurate for video files)
-        for track in media_info.tracks:
-            if track.track_type == 'Video' and track.duration:
-                return track.duration / 1000.0  # ms to seconds
-        
-        # Fallback to General track
-        for track in media_info.tracks:
-            if track.track_type == 'General' and track.duration:
-                return track.duration / 1000.0
-                
-    except ImportError:
-        print(f"Error: pymediainfo not available. Please install with: pip install pymediainfo")
-        return None
-    except Exception as e:
-        print(f"Error reading video duration for {path}: {e}")
+track_tail_cache = OrderedDict()
+track_tail_lock = threading.Lock()
+
+def parse_track_line(line):
+    """Parse one TSV track line into a coordinate dict, or None for comments, headers and short lines"""
+    line = line.strip()
+    if line.startswith('#') or line == '' or line.startswith('timestamp'):
         return None
     
-    return None
+    parts = line.split('\t')
+    if len(parts) < 3:  # At least timestamp, lat, lon
+        return None
+    try:
+        return {
+            'timestamp': int(parts[0]),
+            'location': {
+                'latitude': float(parts[1]),
+                'longitude': float(parts[2]),
+                'altitude': float(parts[3]) if len(parts) > 3 and parts[3] and parts[3] != '' else None,
+                'accuracy': float(parts[4]) if len(parts) > 4 and parts[4] and parts[4] != '' else None,
+                'altitudeAccuracy': float(parts[5]) if len(parts) > 5 and parts[5] and parts[5] != '' else None,
+                'heading': float(parts[6]) if len(parts) > 6 and parts[6] and parts[6] != '' else None,
+                'speed': float(parts[7]) if len(parts) > 7 and parts[7] and parts[7] != '' else None
+            }
+        }
+    except ValueError as e:
+        print(f"Error parsing line: {line} - {e}")
+        return None
 
-def safe_remove_file(file_path):
+def read_track_lines(track_file, offset):
     """
-    Safely remove a file and ensure it's actually deleted from storage device.
-    
-    Args:
-        file_path (str): Path to the file to be removed
-        
+    Parse a TSV track from a byte offset on.
+
     Returns:
-        bool: True if file was successfully removed, False otherwise
+        tuple: (coordinates of the complete lines, offset after the last
+                complete line, coordinate of a trailing line without newline
+                or None)
     """
-    try:
-        os.remove(file_path)
-        
-        # Force filesystem sync to ensure deletion is written to disk
-        try:
-            if os.name == 'nt':  # Windows
-                import ctypes
-                # Get the drive letter of the file path
-                drive = os.path.splitdrive(file_path)[0]
-                if drive:
+    with open(track_file, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+
+    coordinates = []
+    for line in data[:end].decode('utf-8', errors='replace').splitlines():
+        coordinate = parse_track_line(line)
+        if coordinate:
+            coordinates.append(coordinate)
+    # A line without a newline is parsed but never consumed; load_track_tail
+    # only uses it once the track is finished (no final newline)
+    tail = parse_track_line(data[end:].decode('utf-8', errors='replace')) if end < len(data) else None
+    return coordinates, offset + end, tail
+
+def read_compact_track(track_file):
+    """Decode a whole compact track, returning (coordinates, size of its source TSV)"""
+    return list(iter_compact_points(track_file)), read_compact_header(track_file)['source']['size']
+
+def prune_track_tail_cache():
+    """Evict least recently used tails beyond the entry and point limits; call with track_tail_lock held"""
+    points = sum(len(state['coordinates']) for state in track_tail_cache.values())
+    while track_tail_cache and (len(track_tail_cache) > TRACK_TAIL_CACHE_SIZE
+                                or points > TRACK_TAIL_MAX_POINTS):
+        _, state = track_tail_cache.popitem(last=False)
+        points -= len(state['coordinates'])
+
+def read_track_state(track_file, stat, keep=False):
+    """
+    Parse a TSV track from the start, returning (state, trailing coordinate).
+
+    The state is only put in the tail cache while the track is still being
+    recorded, so finished tracks are not pinned in memory. With keep (the
+    startup warm-up) a finished track is cached until its next load.
+    """
+    coordinates, offset, tail = read_track_lines(track_file, 0)
+    state = {'inode': stat.st_ino, 'mtime_ns': stat.st_mtime_ns,
+             'offset': offset, 'coordinates': coordinates}
+    with track_tail_lock:
+        if keep or time.time() - stat.st_mtime < TRACK_TAIL_MAX_AGE:
+            track_tail_cache[track_file] = state
+            prune_track_tail_cache()
+        else:
+            track_tail_cache.pop(track_file, None)
+    return state, tail
+
+def load_track_tail(track_file, keep=False):
+    """
+    Load GPS track data, parsing only the lines appended since the last load.
+
+    Compact tracks are decoded as a whole; their offset is the size of the TSV
+    they were made from, which is where following the TSV would continue.
+    keep caches the parse of a finished track until its next load.
+
+    A trailing line without a newline is only included once the track has
+    stopped changing: while it is being recorded the line is still being
+    written, and /follow streams it from the returned offset once complete.
+
+    Returns:
+        tuple: (coordinates, byte offset after the last complete line)
+    """
+    if is_compact_track(track_file):
+        coordinates, offset = coalesced(('track', track_file), read_compact_track, track_file)
+        return list(coordinates), offset
+
+    stat = os.stat(track_file)
+    with track_tail_lock:
+        state = track_tail_cache.get(track_file)
+        if state is not None:
+            track_tail_cache.move_to_end(track_file)
+
+    if (state is None or state['inode'] != stat.st_ino or stat.st_size < state['offset']
+            or (stat.st_size == state['offset'] and stat.st_mtime_ns != state['mtime_ns'])):
+        # New, replaced, truncated or rewritten file: read from the start
+        state, tail = coalesced(('track', track_file), read_track_state, track_file, stat, keep)
+    else:
+        start = state['offset']
+        appended, offset, tail = read_track_lines(track_file, start) if stat.st_size > start else ([], start, None)
+        with track_tail_lock:
+            # Another request may have consumed the same lines meanwhile
+            if state['offset'] == start:
+                state['coordinates'].extend(appended)
+                state['offset'] = offset
+                state['mtime_ns'] = stat.st_mtime_ns
+                if appended:
+                    prune_track_tail_cache()
+            if time.time() - stat.st_mtime >= TRACK_TAIL_MAX_AGE:
+                # Recording has finished: stop keeping its tail
+                track_tail_cache.pop(track_file, None)
+
+    with track_tail_lock:
+        coordinates = list(state['coordinates'])
+        offset = state['offset']
+    if tail and time.time() - stat.st_mtime >= TRACK_TAIL_MAX_AGE:
+        coordinates.append(tail)
+    return coordinates, offset
+
+def load_track_data(track_file):
+    """Load GPS track data from TSV file"""
+    try:
+        return load_track_tail(track_file)[0]
+    except Exception as e:
+        print(f"Error loading track data: {e}")
+        return []
+
+# Compact track format
+# Finished TSV tracks can be converted to <track_id>.ctrk files:
+#   magic "SVCT", version byte, uint32 header length, JSON header, blocks
+# The JSON header carries the listing metadata (point count, start/end time,
+# source TSV signature and times) so catalog scans never decode the points.
+# Rows are stored in blocks of COMPACT_BLOCK_ROWS; within a block each column
+# is a zlib-compressed little-endian array: fixed-point integers (the smallest
+# decimal scale that reproduces every value exactly) delta-encoded against the
+# previous row, or raw float64 when no such scale exists. A leading flag byte
+# tells whether a per-row null mask precedes the values.
+COMPACT_TRACK_EXTENSION = '.ctrk'
+COMPACT_TRACK_MAGIC = b'SVCT'
+COMPACT_TRACK_VERSION = 1
+COMPACT_BLOCK_ROWS = 65536
+COMPACT_MAX_SCALE = 9
+COMPACT_MIN_AGE = 600  # Seconds without modification before a TSV track counts as finished
+COMPACT_INTERVAL = 3600  # Seconds between background compaction runs
+COMPACT_COLUMNS = ('timestamp', 'latitude', 'longitude', 'altitude', 'accuracy',
+                   'altitudeAccuracy', 'heading', 'speed')
+
+compact_header_cache = {}
+compact_header_lock = threading.Lock()
+
+def text_decimals(text):
+    """Number of decimal places of a numeric TSV field, or None for exponent notation"""
+    if 'e' in text or 'E' in text:
+        return None
+    point = text.find('.')
+    return 0 if point < 0 else len(text) - point - 1
+
+def encode_compact_column(values, decimals):
+    """Compress one block column; returns (scale or None for float64, compressed bytes)"""
+    mask = None
+    if None in values:
+        mask = bytes(value is None for value in values)
+        previous = 0
+        filled = []
+        for value in values:
+            if value is not None:
+                previous = value
+            filled.append(previous)  # Repeat the previous value so the delta is zero
+        values = filled
+
+    scale = decimals if decimals is not None and decimals <= COMPACT_MAX_SCALE else None
+    encoded = None
+    if scale is not None:
+        factor = 10 ** scale
+        try:
+            # NaN and infinity cannot be quantised (ValueError, OverflowError)
+            integers = [round(value * factor) for value in values]
+            if all(integer / factor == value for integer, value in zip(integers, values)):
+                encoded = array('q', [integers[0]] + [b - a for a, b in zip(integers, integers[1:])])
+        except (ValueError, OverflowError):
+            encoded = None
+    if encoded is None:
+        scale = None
+        encoded = array('d', values)
+    if sys.byteorder == 'big':
+        encoded.byteswap()
+
+    payload = (b'\x01' + mask if mask is not None else b'\x00') + encoded.tobytes()
+    return scale, zlib.compress(payload, 9)
+
+def decode_compact_column(data, scale, rows, integer=False):
+    """Decompress one block column back to a list of values (None for nulls)"""
+    payload = zlib.decompress(data)
+    mask = payload[1:1 + rows] if payload[0] else None
+    values = array('d' if scale is None else 'q')
+    values.frombytes(payload[1 + rows if mask is not None else 1:])
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    if scale is None:
+        values = values.tolist()
+    elif integer and scale == 0:
+        values = list(itertools.accumulate(values))
+    else:
+        factor = 10 ** scale
+        values = [value / factor for value in itertools.accumulate(values)]
+    if mask is not None:
+        values = [None if null else value for value, null in zip(values, mask)]
+    return values
+
+def encode_compact_block(rows):
+    """Encode a block of (coordinate, fields) rows; returns (block header, bytes)"""
+    scales = []
+    chunks = []
+    for column_index, name in enumerate(COMPACT_COLUMNS):
+        if column_index == 0:
+            values = [coordinate['timestamp'] for coordinate, _ in rows]
+        else:
+            values = [coordinate['location'][name] for coordinate, _ in rows]
+        decimals = 0
+        for (_, fields), value in zip(rows, values):
+            if value is not None:
+                field_decimals = text_decimals(fields[column_index].strip())
+                if field_decimals is None:
+                    decimals = None
+                    break
+                decimals = max(decimals, field_decimals)
+        scale, chunk = encode_compact_column(values, decimals)
+        scales.append(scale)
+        chunks.append(chunk)
+    return {'rows': len(rows), 'scales': scales, 'sizes': [len(chunk) for chunk in chunks]}, b''.join(chunks)
+
+def write_compact_track(track_file, compact_file):
+    """
+    Convert a TSV track to the compact format.
+
+    Returns:
+        dict: The header written to compact_file
+    """
+    stat = os.stat(track_file)
+    blocks = []
+    block_data = []
+    rows = []
+    coord_count = 0
+    start_time = None
+    end_time = None
+
+    with open(track_file, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            coordinate = parse_track_line(line)
+            if coordinate is None:
+                continue
+            if start_time is None:
+                start_time = coordinate['timestamp']
+            end_time = coordinate['timestamp']
+            coord_count += 1
+            rows.append((coordinate, line.strip().split('\t')))
+            if len(rows) == COMPACT_BLOCK_ROWS:
+                block, data = encode_compact_block(rows)
+                blocks.append(block)
+                block_data.append(data)
+                rows = []
+    if rows:
+        block, data = encode_compact_block(rows)
+        blocks.append(block)
+        block_data.append(data)
+
+    header = {
+        'version': COMPACT_TRACK_VERSION,
+        'columns': list(COMPACT_COLUMNS),
+        'coord_count': coord_count,
+        'start_time': start_time,
+        'end_time': end_time,
+        'source': {
+            'filename': os.path.basename(track_file),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'ctime': stat.st_ctime,
+            'mtime': stat.st_mtime
+        },
+        'blocks': blocks
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    tmp_path = f"{compact_file}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(COMPACT_TRACK_MAGIC + struct.pack('<BI', COMPACT_TRACK_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for data in block_data:
+            f.write(data)
+    os.replace(tmp_path, compact_file)
+    return header
+
+def read_compact_header(compact_file, stat=None):
+    """Read the JSON header of a compact track, cached per file signature"""
+    stat = stat or os.stat(compact_file)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with compact_header_lock:
+        cached = compact_header_cache.get(compact_file)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(compact_file, 'rb') as f:
+        prefix = f.read(9)
+        if len(prefix) < 9 or prefix[:4] != COMPACT_TRACK_MAGIC:
+            raise ValueError(f"Not a compact track file: {compact_file}")
+        version, header_size = struct.unpack('<BI', prefix[4:])
+        if version != COMPACT_TRACK_VERSION:
+            raise ValueError(f"Unsupported compact track version {version}: {compact_file}")
+        header = json.loads(f.read(header_size))
+    header['data_offset'] = 9 + header_size
+
+    with compact_header_lock:
+        compact_header_cache[compact_file] = (signature, header)
+    return header
+
+def compact_track_is_current(header, track_stat):
+    """Check whether a compact track was made from the TSV in its current state"""
+    return (header['source']['size'] == track_stat.st_size
+            and header['source']['mtime_ns'] == track_stat.st_mtime_ns)
+
+def iter_compact_blocks(compact_file, columns=COMPACT_COLUMNS):
+    """Yield the requested columns of a compact track one block at a time"""
+    header = read_compact_header(compact_file)
+    wanted = [COMPACT_COLUMNS.index(name) for name in columns]
+    with open(compact_file, 'rb') as f:
+        offset = header['data_offset']
+        for block in header['blocks']:
+            starts = [offset + sum(block['sizes'][:index]) for index in range(len(COMPACT_COLUMNS))]
+            decoded = []
+            for index in wanted:
+                f.seek(starts[index])
+                decoded.append(decode_compact_column(f.read(block['sizes'][index]), block['scales'][index],
+                                                     block['rows'], integer=index == 0))
+            offset += sum(block['sizes'])
+            yield decoded
+
+def iter_compact_points(compact_file):
+    """Yield the coordinates of a compact track in the same form as parse_track_line"""
+    for timestamps, *columns in iter_compact_blocks(compact_file):
+        for timestamp, latitude, longitude, altitude, accuracy, altitude_accuracy, heading, speed in zip(timestamps, *columns):
+            yield {
+                'timestamp': timestamp,
+                'location': {
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'altitude': altitude,
+                    'accuracy': accuracy,
+                    'altitudeAccuracy': altitude_accuracy,
+                    'heading': heading,
+                    'speed': speed
+                }
+            }
+
+def is_compact_track(track_file):
+    """Check whether a track path is in the compact format"""
+    return track_file.endswith(COMPACT_TRACK_EXTENSION)
+
+def compact_tracks(remove_tsv=False, min_age=COMPACT_MIN_AGE):
+    """
+    Compact every finished TSV track of every data root.
+
+    A track is finished when it has not been modified for min_age seconds and
+    it is skipped when an up to date compact file exists. Every new compact
+    file is decoded and compared with the TSV before the TSV is removed.
+
+    Returns:
+        list: One dict per compacted track with sizes and load times
+    """
+    results = []
+    now = time.time()
+    for root in DATA_ROOTS:
+        if root['stalled'] or not os.path.isdir(root['tracks_dir']):
+            continue
+        for track_file in sorted(glob.glob(os.path.join(root['tracks_dir'], '*.tsv'))):
+            compact_file = os.path.splitext(track_file)[0] + COMPACT_TRACK_EXTENSION
+            try:
+                stat = os.stat(track_file)
+                if now - stat.st_mtime < min_age:
+                    continue
+                if os.path.exists(compact_file) and compact_track_is_current(read_compact_header(compact_file), stat):
+                    if remove_tsv:
+                        safe_remove_file(track_file)
+                    continue
+
+                write_compact_track(track_file, compact_file)
+
+                # Verify the round trip, timing both loaders on the way
+                started = time.perf_counter()
+                tsv_points = list(iter_track_points(track_file))
+                tsv_seconds = time.perf_counter() - started
+                started = time.perf_counter()
+                compact_points = list(iter_compact_points(compact_file))
+                compact_seconds = time.perf_counter() - started
+                # NaN never compares equal, so tell real differences apart by their repr
+                if compact_points != tsv_points and repr(compact_points) != repr(tsv_points):
+                    safe_remove_file(compact_file)
+                    print(f"Compacted track {track_file} does not match its source, kept TSV only")
+                    continue
+
+                result = {
+                    'track_id': namespaced_track_id(root, os.path.splitext(os.path.basename(track_file))[0]),
+                    'points': len(tsv_points),
+                    'tsv_size': stat.st_size,
+                    'compact_size': os.path.getsize(compact_file),
+                    'tsv_load_seconds': tsv_seconds,
+                    'compact_load_seconds': compact_seconds
+                }
+                results.append(result)
+                print(f"Compacted {result['track_id']}: {result['points']} points, "
+                      f"{filesizeformat(result['tsv_size'])} -> {filesizeformat(result['compact_size'])} "
+                      f"({result['compact_size'] / max(result['tsv_size'], 1):.0%}), "
+                      f"load {tsv_seconds * 1000:.0f} ms -> {compact_seconds * 1000:.0f} ms")
+                if remove_tsv:
+                    safe_remove_file(track_file)
+            except Exception as e:
+                print(f"Error compacting track {track_file}: {e}")
+    return results
+
+def background_compactor():
+    """Compact finished tracks every COMPACT_INTERVAL seconds (started with --auto-compact)"""
+    time.sleep(60)  # Let startup scans finish first
+    while True:
+        try:
+            compact_tracks(remove_tsv=args.compact_remove_tsv)
+        except Exception as e:
+            print(f"Background compaction failed: {e}")
+        time.sleep(COMPACT_INTERVAL)
+
+# Startup warm-up
+# main() starts a background warm-up as soon as it knows it will serve: it
+# scans the track catalog, probes the duration of every recording into the
+# duration cache, builds the video and recording catalogs and the density
+# index of the overview map, and parses the most recent tracks
+# (--warmup-tracks) into the track tail cache, where they stay until their
+# first load even when they are no longer being recorded. Progress is shown on
+# the splash screen and reported by /api/status. Until it finishes, catalog
+# scans only use durations probed so far instead of probing on the request
+# thread and the overview uses the density index as far as it is built, so
+# early pages list unmatched videos rather than stalling; their recordings
+# ETag is marked partial so they are not served from cache later.
+WARMUP_PHASES = (
+    ('tracks', '🗺️ Loading GPS tracks'),
+    ('durations', '🎥 Reading video durations'),
+    ('catalogs', '📁 Indexing recordings'),
+    ('density', '🌍 Indexing the track overview'),
+    ('recent_tracks', '📍 Preparing recent tracks'),
+)
+WARMUP_SPLASH_TIMEOUT = 20.0  # Seconds the splash waits before opening a partially warmed app
+
+warmup_state = {
+    'running': False,
+    'phase': None,
+    'done': 0,
+    'total': 0,
+    'started': None,
+    'finished': None,
+    'error': None,
+    'counts': {}
+}
+warmup_lock = threading.Lock()
+
+def warmup_partial():
+    """True while the startup warm-up is still filling the duration cache"""
+    return warmup_state['running']
+
+def set_warmup_phase(phase, total):
+    """Start a warm-up phase with total steps"""
+    with warmup_lock:
+        warmup_state.update(phase=phase, done=0, total=total)
+
+def advance_warmup(steps=1):
+    """Count finished steps of the current warm-up phase"""
+    with warmup_lock:
+        warmup_state['done'] += steps
+
+def warmup_status():
+    """Return a snapshot of the warm-up state with an overall progress fraction"""
+    with warmup_lock:
+        state = dict(warmup_state, counts=dict(warmup_state['counts']))
+    names = [name for name, _ in WARMUP_PHASES]
+    if state['finished'] is not None or not state['running']:
+        progress = 1.0
+    else:
+        fraction = state['done'] / state['total'] if state['total'] else 0.0
+        progress = (names.index(state['phase']) + min(fraction, 1.0)) / len(names) if state['phase'] else 0.0
+    state['progress'] = round(progress, 4)
+    state['ready'] = not state['running']
+    return state
+
+def warmup_message(state):
+    """Splash screen text for a warm-up state"""
+    labels = dict(WARMUP_PHASES)
+    if state['ready']:
+        return "✅ Ready"
+    if state['phase'] is None:
+        return "✨ Almost ready..."
+    if state['total'] > 1:
+        return f"{labels[state['phase']]} ({state['done']}/{state['total']})..."
+    return f"{labels[state['phase']]}..."
+
+def list_recording_files(root):
+    """List every .mp4 file of one data root for the duration warm-up"""
+    if not os.path.exists(root['recordings_dir']):
+        return []
+    return scan_recording_dirs(root['recordings_dir'])
+
+def run_warmup(recent_tracks):
+    """Fill the track summary, duration and track caches in the background"""
+    counts = {}
+    try:
+        set_warmup_phase('tracks', 1)
+        tracks = get_track_files()
+        counts['tracks'] = len(tracks)
+        advance_warmup()
+
+        set_warmup_phase('durations', 0)
+        files = scan_data_roots('warmup', list_recording_files)
+        set_warmup_phase('durations', len(files))
+
+        def probe(file):
+            get_cached_video_duration(file[3], file[4])
+            advance_warmup()
+        scan_pool_map(probe, files)
+        counts['recordings'] = len(files)
+        del files
+        with data_root_lock:
+            for root in DATA_ROOTS:
+                root['results'].pop('warmup', None)
+
+        set_warmup_phase('catalogs', 2)
+        counts['videos'] = len(get_video_files())
+        advance_warmup()
+        get_recording_files()
+        advance_warmup()
+
+        set_warmup_phase('density', 1)
+        counts['density_tracks'] = len(refresh_density_index(force=True))
+        advance_warmup()
+
+        recent = tracks[:max(0, recent_tracks)]
+        set_warmup_phase('recent_tracks', len(recent))
+        for track in recent:
+            try:
+                load_track_tail(track['filepath'], keep=True)
+            except Exception as e:
+                print(f"Error preparing track {track['track_id']}: {e}")
+            advance_warmup()
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        with warmup_lock:
+            warmup_state['error'] = str(e)
+    finally:
+        with warmup_lock:
+            warmup_state.update(running=False, finished=time.time(), counts=counts)
+            elapsed = warmup_state['finished'] - warmup_state['started']
+    print(f"Warm-up finished in {elapsed:.1f} s: "
+          + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
+def start_warmup(recent_tracks):
+    """Start the background warm-up thread"""
+    with warmup_lock:
+        warmup_state.update(running=True, started=time.time(), finished=None, error=None)
+    thread = threading.Thread(target=run_warmup, args=(recent_tracks,), name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+# Track export
+# GPX, KML and GeoJSON documents are produced by generators that read the TSV
+# line by line, so exporting a track needs the same memory whatever its length.
+# Output is joined into EXPORT_CHUNK_SIZE pieces before it is handed to the
+# WSGI server. Simplification (?tolerance=<metres>) drops points closer than
+# the tolerance to the previously kept point, which needs no look-ahead.
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_FORMATS = {
+    'gpx': 'application/gpx+xml',
+    'kml': 'application/vnd.google-earth.kml+xml',
+    'geojson': 'application/geo+json'
+}
+EARTH_RADIUS = 6371008.8  # Mean earth radius in metres
+
+def iter_track_points(track_file):
+    """Yield the coordinates of a TSV track one line at a time (or a compact track one block at a time)"""
+    if is_compact_track(track_file):
+        yield from iter_compact_points(track_file)
+        return
+    with open(track_file, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            coordinate = parse_track_line(line)
+            if coordinate:
+                yield coordinate
+
+def simplify_track_points(points, tolerance):
+    """Keep points at least tolerance metres from the last kept point, plus the final point"""
+    last_kept = None
+    skipped = None
+    for point in points:
+        location = point['location']
+        if last_kept is not None:
+            mean_latitude = math.radians((location['latitude'] + last_kept['latitude']) / 2)
+            dx = math.radians(location['longitude'] - last_kept['longitude']) * math.cos(mean_latitude)
+            dy = math.radians(location['latitude'] - last_kept['latitude'])
+            if EARTH_RADIUS * math.hypot(dx, dy) < tolerance:
+                skipped = point
+                continue
+        last_kept = location
+        skipped = None
+        yield point
+    if skipped is not None:
+        yield skipped
+
+def export_track_points(track_file, tolerance=None):
+    """Yield the (optionally simplified) points of a track for export"""
+    points = iter_track_points(track_file)
+    if tolerance:
+        points = simplify_track_points(points, tolerance)
+    return points
+
+def export_timestamp(timestamp):
+    """Format a track timestamp (seconds or milliseconds) as ISO 8601 UTC"""
+    seconds = timestamp / 1000.0 if timestamp > 100000000000 else timestamp
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def iter_gpx(track, points):
+    """Yield a GPX 1.1 document for a track"""
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<gpx version="1.1" creator="Streamer Viewer" xmlns="http://www.topografix.com/GPX/1/1">\n'
+           f"<trk><name>{xml_escape(track['track_id'])}</name><trkseg>\n")
+    for point in points:
+        location = point['location']
+        elevation = f"<ele>{location['altitude']}</ele>" if location['altitude'] is not None else ''
+        yield (f"<trkpt lat=\"{location['latitude']}\" lon=\"{location['longitude']}\">"
+               f"{elevation}<time>{export_timestamp(point['timestamp'])}</time></trkpt>\n")
+    yield '</trkseg></trk>\n</gpx>\n'
+
+def iter_kml(track, points):
+    """Yield a KML document with the track as a LineString placemark"""
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>\n'
+           f"<name>{xml_escape(track['track_id'])}</name>\n"
+           f"<Placemark><name>{xml_escape(track['track_id'])}</name>"
+           '<LineString><tessellate>1</tessellate><altitudeMode>absolute</altitudeMode><coordinates>\n')
+    for point in points:
+        location = point['location']
+        yield f"{location['longitude']},{location['latitude']},{location['altitude'] or 0}\n"
+    yield '</coordinates></LineString></Placemark>\n</Document></kml>\n'
+
+def iter_geojson(track, points_factory):
+    """
+    Yield a GeoJSON FeatureCollection with the track as a LineString.
+
+    The point times go to the "coordTimes" property, which takes a second pass
+    over the track (points_factory is called twice) instead of buffering them.
+    """
+    yield '{"type": "FeatureCollection", "features": [{"type": "Feature", "geometry": {"type": "LineString", "coordinates": ['
+    separator = ''
+    for point in points_factory():
+        location = point['location']
+        position = [location['longitude'], location['latitude']]
+        if location['altitude'] is not None:
+            position.append(location['altitude'])
+        yield separator + json.dumps(position)
+        separator = ', '
+    properties = {'track_id': track['track_id'], 'start_time': track['start_time'], 'end_time': track['end_time']}
+    members = ''.join(f"{json.dumps(key)}: {json.dumps(value)}, " for key, value in properties.items())
+    yield ']}, "properties": {' + members + '"coordTimes": ['
+    separator = ''
+    for point in points_factory():
+        yield f"{separator}\"{export_timestamp(point['timestamp'])}\""
+        separator = ', '
+    yield ']}}]}\n'
+
+def iter_track_export(track, export_format, tolerance=None):
+    """Yield a track exported as gpx, kml or geojson in EXPORT_CHUNK_SIZE pieces"""
+    points_factory = lambda: export_track_points(track['filepath'], tolerance)
+    if export_format == 'gpx':
+        parts = iter_gpx(track, points_factory())
+    elif export_format == 'kml':
+        parts = iter_kml(track, points_factory())
+    else:
+        parts = iter_geojson(track, points_factory)
+
+    buffer = []
+    buffered = 0
+    for part in parts:
+        buffer.append(part)
+        buffered += len(part)
+        if buffered >= EXPORT_CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+class ZipStreamWriter:
+    """Write-only file object collecting the bytes zipfile writes, for streaming a ZIP archive"""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def iter_tracks_zip(tracks, export_format, tolerance=None):
+    """Yield a ZIP archive holding every track exported in one format"""
+    stream = ZipStreamWriter()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for track in tracks:
+            entry_name = f"{secure_filename(track['track_id'].replace(':', '_')) or 'track'}.{export_format}"
+            with archive.open(entry_name, 'w') as entry:
+                for chunk in iter_track_export(track, export_format, tolerance):
+                    entry.write(chunk)
+                    data = stream.drain()
+                    if data:
+                        yield data
+            data = stream.drain()
+            if data:
+                yield data
+    yield stream.drain()
+
+@timed('get_video_duration_mediainfo')
+def get_video_duration_mediainfo(path):
+    """Get video duration using pymediainfo library"""
+    try:
+        from pymediainfo import MediaInfo
+        media_info = MediaInfo.parse(path)
+        
+        # Try Video track first (most accurate for video files)
+        for track in media_info.tracks:
+            if track.track_type == 'Video' and track.duration:
+                return track.duration / 1000.0  # ms to seconds
+        
+        # Fallback to General track
+        for track in media_info.tracks:
+            if track.track_type == 'General' and track.duration:
+                return track.duration / 1000.0
+                
+    except ImportError:
+        print(f"Error: pymediainfo not available. Please install with: pip install pymediainfo")
+        return None
+    except Exception as e:
+        print(f"Error reading video duration for {path}: {e}")
+        return None
+
+    return None
+
+# Recording durations are kept per file signature, so catalog scans only run
+# MediaInfo on new or changed recordings
+video_duration_cache = {}
+video_duration_lock = threading.Lock()
+
+def get_cached_video_duration(path, stat, probe=True):
+    """
+    Return the duration of a recording, probing it unless cached for its current size and mtime.
+
+    With probe=False an uncached recording is reported as None (unknown) instead.
+    """
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with video_duration_lock:
+        cached = video_duration_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    if not probe:
+        return None
+
+    duration = get_video_duration_mediainfo(path)
+    with video_duration_lock:
+        video_duration_cache[path] = (signature, duration)
+    return duration
+
+# Pure Python MP4 parsing
+# Only box headers are read while walking the top level of the file, so the
+# (potentially multi-GB) mdat payload is skipped and just the moov box is loaded.
+MP4_CONTAINER_BOXES = (b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'mvex', b'dinf', b'udta')
+
+keyframe_index_cache = {}
+keyframe_index_lock = threading.Lock()
+
+def read_mp4_top_level_boxes(f):
+    """
+    List the top-level boxes of an open MP4 file without reading their payloads.
+
+    Returns:
+        list: (box_type, offset, size, header_size) tuples in file order
+    """
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    boxes = []
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        size, box_type = struct.unpack('>I4s', f.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            raise ValueError(f"Invalid MP4 box size {size} at offset {offset}")
+        boxes.append((box_type, offset, size, header_size))
+        offset += size
+    return boxes
+
+def iter_mp4_boxes(data, start=0, end=None):
+    """Yield (box_type, payload_start, box_end) for each box in data[start:end]"""
+    if end is None:
+        end = len(data)
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise ValueError(f"Invalid MP4 box {box_type!r} at offset {offset}")
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+def find_mp4_box(data, path, start=0, end=None):
+    """Follow a list of box types (e.g. [b'mdia', b'mdhd']) and return (payload_start, box_end) or None"""
+    for box_type, payload_start, box_end in iter_mp4_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload_start, box_end
+            return find_mp4_box(data, path[1:], payload_start, box_end)
+    return None
+
+def read_mp4_moov(path):
+    """
+    Read only the moov box of an MP4 file.
+
+    Returns:
+        tuple: (top-level box list, moov box bytes including its header)
+    """
+    with open(path, 'rb') as f:
+        boxes = read_mp4_top_level_boxes(f)
+        for box_type, offset, size, header_size in boxes:
+            if box_type == b'moov':
+                f.seek(offset)
+                moov = f.read(size)
+                if len(moov) != size:
+                    raise ValueError("Truncated moov box")
+                return boxes, moov
+    raise ValueError("No moov box found")
+
+def read_mp4_table(data, payload_start, item_format, fields=1, header_size=8):
+    """
+    Decode a full-box sample table (stss, stts, stsz, stco, ...) into a flat array.
+
+    The payload starts with version/flags followed by the entry count (stsz
+    carries an extra sample-size field, hence header_size).
+    """
+    count = struct.unpack_from('>I', data, payload_start + header_size - 4)[0]
+    table_start = payload_start + header_size
+    table = array(item_format)
+    table.frombytes(data[table_start:table_start + count * fields * table.itemsize])
+    if sys.byteorder == 'little':
+        table.byteswap()
+    return table
+
+def parse_mp4_track(moov, trak_start, trak_end):
+    """Extract the timing and sample tables of one trak box"""
+    track = {'handler': None, 'track_id': None, 'timescale': None, 'duration': 0, 'media_time': 0}
+
+    tkhd = find_mp4_box(moov, [b'tkhd'], trak_start, trak_end)
+    if tkhd:
+        version = moov[tkhd[0]]
+        track['track_id'] = struct.unpack_from('>I', moov, tkhd[0] + (20 if version == 1 else 12))[0]
+
+    mdhd = find_mp4_box(moov, [b'mdia', b'mdhd'], trak_start, trak_end)
+    if mdhd:
+        if moov[mdhd[0]] == 1:
+            track['timescale'], track['duration'] = struct.unpack_from('>IQ', moov, mdhd[0] + 20)
+        else:
+            track['timescale'], track['duration'] = struct.unpack_from('>II', moov, mdhd[0] + 12)
+
+    hdlr = find_mp4_box(moov, [b'mdia', b'hdlr'], trak_start, trak_end)
+    if hdlr:
+        track['handler'] = moov[hdlr[0] + 8:hdlr[0] + 12]
+
+    # The first edit list entry tells where presentation starts in the media timeline
+    elst = find_mp4_box(moov, [b'edts', b'elst'], trak_start, trak_end)
+    if elst:
+        if moov[elst[0]] == 1:
+            track['media_time'] = struct.unpack_from('>Qq', moov, elst[0] + 8)[1]
+        else:
+            track['media_time'] = struct.unpack_from('>Ii', moov, elst[0] + 8)[1]
+        track['media_time'] = max(track['media_time'], 0)
+
+    stbl = find_mp4_box(moov, [b'mdia', b'minf', b'stbl'], trak_start, trak_end)
+    if not stbl:
+        raise ValueError("Track has no sample table")
+    tables = {box_type: (start, end) for box_type, start, end in iter_mp4_boxes(moov, *stbl)}
+
+    track['stsd'] = moov[tables[b'stsd'][0] - 8:tables[b'stsd'][1]] if b'stsd' in tables else None
+    track['stts'] = read_mp4_table(moov, tables[b'stts'][0], 'I', 2) if b'stts' in tables else array('I')
+    track['stss'] = read_mp4_table(moov, tables[b'stss'][0], 'I') if b'stss' in tables else None
+    track['stsc'] = read_mp4_table(moov, tables[b'stsc'][0], 'I', 3) if b'stsc' in tables else array('I')
+    track['ctts'] = None
+    if b'ctts' in tables:
+        # Version 1 composition offsets are signed
+        track['ctts'] = read_mp4_table(moov, tables[b'ctts'][0], 'i' if moov[tables[b'ctts'][0]] == 1 else 'I', 2)
+
+    if b'stsz' in tables:
+        start = tables[b'stsz'][0]
+        sample_size, sample_count = struct.unpack_from('>II', moov, start + 4)
+        if sample_size:
+            track['stsz'] = array('I', [sample_size]) * sample_count
+        else:
+            track['stsz'] = read_mp4_table(moov, start, 'I', header_size=12)
+    else:
+        track['stsz'] = array('I')
+
+    if b'co64' in tables:
+        track['chunk_offsets'] = read_mp4_table(moov, tables[b'co64'][0], 'Q')
+    elif b'stco' in tables:
+        track['chunk_offsets'] = read_mp4_table(moov, tables[b'stco'][0], 'I')
+    else:
+        track['chunk_offsets'] = array('I')
+
+    return track
+
+def parse_mp4_tracks(moov):
+    """Parse every trak inside a moov box (bytes including the moov header)"""
+    moov_payload = next(iter_mp4_boxes(moov))[1]
+    return [parse_mp4_track(moov, start, end)
+            for box_type, start, end in iter_mp4_boxes(moov, moov_payload)
+            if box_type == b'trak']
+
+def mp4_sample_decode_times(track):
+    """Expand the stts run-length table into per-sample decode times (media timescale units)"""
+    times = array('q')
+    current = 0
+    stts = track['stts']
+    for i in range(0, len(stts), 2):
+        count, delta = stts[i], stts[i + 1]
+        times.extend(range(current, current + count * delta, delta) if delta else [current] * count)
+        current += count * delta
+    return times
+
+def mp4_sample_offsets(track):
+    """Resolve the file offset of every sample using stsc, stco/co64 and stsz"""
+    offsets = array('Q')
+    sizes = track['stsz']
+    chunk_offsets = track['chunk_offsets']
+    stsc = track['stsc']
+    sample = 0
+    entries = len(stsc) // 3
+    for i in range(entries):
+        first_chunk, samples_per_chunk = stsc[i * 3], stsc[i * 3 + 1]
+        last_chunk = stsc[(i + 1) * 3] - 1 if i + 1 < entries else len(chunk_offsets)
+        for chunk in range(first_chunk - 1, last_chunk):
+            offset = chunk_offsets[chunk]
+            for _ in range(samples_per_chunk):
+                if sample >= len(sizes):
+                    return offsets
+                offsets.append(offset)
+                offset += sizes[sample]
+                sample += 1
+    return offsets
+
+def build_keyframe_index(path):
+    """
+    Build the keyframe (sync sample) index of the first video track of an MP4 file.
+
+    Returns:
+        dict: Keyframe presentation times in seconds with their byte offsets,
+              or None if the file has no video track
+    """
+    boxes, moov = read_mp4_moov(path)
+    video = next((t for t in parse_mp4_tracks(moov) if t['handler'] == b'vide'), None)
+    if video is None or not video['timescale']:
+        return None
+
+    decode_times = mp4_sample_decode_times(video)
+    offsets = mp4_sample_offsets(video)
+    sample_count = len(decode_times)
+    if video['stss'] is None:
+        sync_samples = range(1, sample_count + 1)  # No stss box: every sample is a sync sample
+    else:
+        sync_samples = video['stss']
+
+    composition = None
+    if video['ctts'] is not None:
+        composition = array('q')
+        ctts = video['ctts']
+        for i in range(0, len(ctts), 2):
+            composition.extend([ctts[i + 1]] * ctts[i])
+
+    timescale = video['timescale']
+    keyframes = []
+    keyframe_offsets = []
+    for sample_number in sync_samples:
+        index = sample_number - 1
+        if index >= sample_count:
+            break
+        presentation = decode_times[index] - video['media_time']
+        if composition is not None and index < len(composition):
+            presentation += composition[index]
+        keyframes.append(round(max(presentation, 0) / timescale, 3))
+        keyframe_offsets.append(offsets[index] if index < len(offsets) else None)
+
+    return {
+        'timescale': timescale,
+        'duration': round(video['duration'] / timescale, 3),
+        'sample_count': sample_count,
+        'keyframes': keyframes,
+        'offsets': keyframe_offsets
+    }
+
+def get_keyframe_index(path):
+    """Return the keyframe index of a recording, cached in memory and on disk per file signature"""
+    stat = os.stat(path)
+    signature = [stat.st_mtime_ns, stat.st_size]
+
+    with keyframe_index_lock:
+        cached = keyframe_index_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    keyframe_cache_dir = os.path.join(data_root_for_path(path)['cache_dir'], 'keyframes')
+    cache_file = os.path.join(keyframe_cache_dir, uuid.uuid5(uuid.NAMESPACE_URL, path).hex + '.json')
+    index = None
+    try:
+        with open(cache_file, 'r') as f:
+            stored = json.load(f)
+        if stored.get('signature') == signature:
+            index = stored['index']
+    except (OSError, ValueError):
+        pass
+
+    if index is None:
+        index = build_keyframe_index(path)
+        try:
+            os.makedirs(keyframe_cache_dir, exist_ok=True)
+            tmp_path = f"{cache_file}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'path': path, 'signature': signature, 'index': index}, f)
+            os.replace(tmp_path, cache_file)
+        except OSError as e:
+            print(f"Error caching keyframe index for {path}: {e}")
+
+    with keyframe_index_lock:
+        keyframe_index_cache[path] = (signature, index)
+    return index
+
+# Virtual faststart layout
+# Recordings with a trailing moov are served as ftyp + moov + mdat without
+# touching the file on disk: the relocated moov (with patched chunk offsets)
+# is kept in memory and everything else is read from the original file.
+MP4_OFFSET_PARENT_BOXES = (b'moov', b'trak', b'mdia', b'minf', b'stbl')
+FASTSTART_CACHE_SIZE = 32
+VIRTUAL_READ_SIZE = 256 * 1024
+
+faststart_layout_cache = OrderedDict()
+faststart_layout_lock = threading.Lock()
+
+def mp4_box_bytes(box_type, payload):
+    """Serialise a box, switching to a 64-bit size header when needed"""
+    if len(payload) + 8 > 0xFFFFFFFF:
+        return struct.pack('>I4sQ', 1, box_type, len(payload) + 16) + payload
+    return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+def remap_mp4_chunk_offsets(data, start, end, remap):
+    """
+    Rebuild the boxes in data[start:end], passing every stco/co64 chunk offset through remap.
+
+    stco tables whose remapped offsets no longer fit in 32 bits are promoted
+    to co64, and all enclosing box sizes are recomputed.
+    """
+    parts = []
+    box_start = start
+    for box_type, payload_start, box_end in iter_mp4_boxes(data, start, end):
+        if box_type in MP4_OFFSET_PARENT_BOXES:
+            parts.append(mp4_box_bytes(box_type, remap_mp4_chunk_offsets(data, payload_start, box_end, remap)))
+        elif box_type in (b'stco', b'co64'):
+            offsets = read_mp4_table(data, payload_start, 'I' if box_type == b'stco' else 'Q')
+            remapped = array('Q', (remap(offset) for offset in offsets))
+            if box_type == b'stco' and (not remapped or max(remapped) <= 0xFFFFFFFF):
+                table = array('I', remapped)
+            else:
+                box_type = b'co64'
+                table = remapped
+            if sys.byteorder == 'little':
+                table.byteswap()
+            parts.append(mp4_box_bytes(box_type, struct.pack('>II', 0, len(remapped)) + table.tobytes()))
+        else:
+            parts.append(data[box_start:box_end])
+        box_start = box_end
+    return b''.join(parts)
+
+def build_virtual_layout(pieces):
+    """
+    Turn a list of pieces into a virtual file layout.
+
+    Each piece is either bytes (served from memory) or a (path, offset, length)
+    tuple read from disk; adjacent ranges of the same file are merged.
+
+    Returns:
+        dict: 'size' and 'segments' as (virtual_start, length, source) tuples
+    """
+    segments = []
+    position = 0
+    for piece in pieces:
+        if isinstance(piece, (bytes, bytearray)):
+            length = len(piece)
+            source = bytes(piece)
+        else:
+            path, offset, length = piece
+            source = (path, offset)
+            if segments and not isinstance(segments[-1][2], bytes):
+                last_start, last_length, (last_path, last_offset) = segments[-1]
+                if last_path == path and last_offset + last_length == offset:
+                    segments[-1] = (last_start, last_length + length, (last_path, last_offset))
+                    position += length
+                    continue
+        if length:
+            segments.append((position, length, source))
+            position += length
+    return {'size': position, 'segments': segments}
+
+def build_faststart_layout(path):
+    """
+    Plan a moov-first view of an MP4 file whose moov follows its mdat.
+
+    Returns:
+        dict: Virtual layout (see build_virtual_layout), or None when the file
+              is already moov-first and can be served as is
+    """
+    with open(path, 'rb') as f:
+        boxes = read_mp4_top_level_boxes(f)
+        moov_box = next((box for box in boxes if box[0] == b'moov'), None)
+        first_mdat = next((i for i, box in enumerate(boxes) if box[0] == b'mdat'), None)
+        if moov_box is None or first_mdat is None or boxes.index(moov_box) < first_mdat:
+            return None
+        f.seek(moov_box[1])
+        moov = f.read(moov_box[2])
+
+    others = [box for box in boxes if box is not moov_box]
+    head = others[:first_mdat]
+    tail = others[first_mdat:]
+    head_size = sum(box[2] for box in head)
+
+    # The patched moov can grow when stco tables are promoted to co64, which
+    # in turn shifts the data again, so iterate until its size is stable
+    moov_size = len(moov)
+    while True:
+        new_offsets = {}
+        position = head_size + moov_size
+        for box in tail:
+            new_offsets[box[1]] = position
+            position += box[2]
+
+        def remap(offset):
+            for box_type, box_offset, box_size, header_size in tail:
+                if box_offset <= offset < box_offset + box_size:
+                    return offset - box_offset + new_offsets[box_offset]
+            return offset
+
+        patched = remap_mp4_chunk_offsets(moov, 0, len(moov), remap)
+        if len(patched) == moov_size:
+            break
+        moov_size = len(patched)
+
+    pieces = [(path, box[1], box[2]) for box in head]
+    pieces.append(patched)
+    pieces.extend((path, box[1], box[2]) for box in tail)
+    return build_virtual_layout(pieces)
+
+def get_faststart_layout(path):
+    """Return the cached faststart layout of a recording (None if it is already moov-first)"""
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with faststart_layout_lock:
+        cached = faststart_layout_cache.get(path)
+        if cached and cached[0] == signature:
+            faststart_layout_cache.move_to_end(path)
+            return cached[1]
+
+    layout = build_faststart_layout(path)
+
+    with faststart_layout_lock:
+        faststart_layout_cache[path] = (signature, layout)
+        faststart_layout_cache.move_to_end(path)
+        while len(faststart_layout_cache) > FASTSTART_CACHE_SIZE:
+            faststart_layout_cache.popitem(last=False)
+    return layout
+
+def iter_virtual_range(layout, start, stop):
+    """Yield the bytes of a virtual layout between start (inclusive) and stop (exclusive)"""
+    handles = {}
+    try:
+        for segment_start, length, source in layout['segments']:
+            segment_end = segment_start + length
+            if segment_end <= start:
+                continue
+            if segment_start >= stop:
+                break
+            skip = max(start - segment_start, 0)
+            remaining = min(segment_end, stop) - segment_start - skip
+            if isinstance(source, bytes):
+                yield source[skip:skip + remaining]
+                continue
+            source_path, source_offset = source
+            f = handles.get(source_path)
+            if f is None:
+                f = handles[source_path] = open(source_path, 'rb')
+            f.seek(source_offset + skip)
+            while remaining > 0:
+                block = f.read(min(VIRTUAL_READ_SIZE, remaining))
+                if not block:
+                    raise IOError(f"Unexpected end of file in {source_path}")
+                remaining -= len(block)
+                yield block
+    finally:
+        for f in handles.values():
+            f.close()
+
+def serve_virtual_file(layout, mimetype='video/mp4', last_modified=None):
+    """Serve a virtual layout with single-range request support"""
+    total = layout['size']
+    headers = {'Accept-Ranges': 'bytes'}
+    start, stop, status = 0, total, 200
+
+    if request.range is not None:
+        byte_range = request.range.range_for_length(total)
+        if byte_range is None:
+            headers['Content-Range'] = f"bytes */{total}"
+            return Response(status=416, headers=headers)
+        start, stop = byte_range
+        status = 206
+        headers['Content-Range'] = f"bytes {start}-{stop - 1}/{total}"
+
+    headers['Content-Length'] = str(stop - start)
+    response = Response(iter_virtual_range(layout, start, stop), status=status,
+                        mimetype=mimetype, headers=headers, direct_passthrough=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+def safe_remove_file(file_path):
+    """
+    Safely remove a file and ensure it's actually deleted from storage device.
+    
+    Args:
+        file_path (str): Path to the file to be removed
+        
+    Returns:
+        bool: True if file was successfully removed, False otherwise
+    """
+    try:
+        os.remove(file_path)
+        
+        # Force filesystem sync to ensure deletion is written to disk
+        try:
+            if os.name == 'nt':  # Windows
+                import ctypes
+                # Get the drive letter of the file path
+                drive = os.path.splitdrive(file_path)[0]
+                if drive:
                     # Force flush of all cached writes for this drive
                     handle = ctypes.windll.kernel32.CreateFileW(
                         drive + "\\", 0x40000000, 3, None, 3, 0x02000000, None
@@ -370,107 +2268,1079 @@ def safe_remove_file(file_path):
 
 
 
-def find_all_related_videos(track_start_time, track_end_time, videos):
+def find_all_related_videos(track_start_time, track_end_time, videos):
+    """
+    Find all video files that temporally overlap with the track timing.
+    
+    Args:
+        track_start_time: Start timestamp of the track
+        track_end_time: End timestamp of the track
+        videos: List of video files with duration and end_time
+    
+    Returns:
+        List of video files that have temporal overlap with the track timespan
+    """
+    if not videos:
+        return []
+    
+    related_videos = []
+    
+    for video in videos:
+        video_start = video['timestamp']
+        video_end = video.get('end_time')
+        
+        # Skip videos without duration/end_time information
+        if video_end is None:
+            continue
+        
+        # Check for temporal overlap between video and track
+        # Two time ranges overlap if: max(start1, start2) < min(end1, end2)
+        overlap_start = max(track_start_time, video_start)
+        overlap_end = min(track_end_time, video_end)
+        
+        if overlap_start < overlap_end:
+            # There is an overlap
+            related_videos.append(video)
+    
+    # Sort by timestamp to return in chronological order
+    related_videos.sort(key=lambda x: x['timestamp'])
+
+    return related_videos
+
+# Virtual stream stitching
+# The related segments of a track are remuxed on the fly into one fragmented
+# MP4: an init segment built from the first segment's track headers, a sidx
+# index, then one moof+mdat fragment per GOP whose sample data is read straight
+# from the original files. Each segment is placed at its recording timestamp,
+# so gaps between segments are real gaps in the decode timeline (and are
+# listed in the manifest) and stream time is always "timestamp - stream start".
+STREAM_GAP_TOLERANCE = 0.5  # Seconds of missing video before a gap is reported
+STREAM_CACHE_SIZE = 8
+MP4_SYNC_SAMPLE_FLAGS = 0x02000000      # sample_depends_on = 2 (independent)
+MP4_NON_SYNC_SAMPLE_FLAGS = 0x01010000  # depends on others, is_non_sync_sample
+
+stream_layout_cache = OrderedDict()
+stream_layout_lock = threading.Lock()
+
+def read_mp4_track_headers(moov, trak_start, trak_end):
+    """Collect the raw header boxes of a trak needed to describe it in an init segment"""
+    headers = {}
+    tkhd = find_mp4_box(moov, [b'tkhd'], trak_start, trak_end)
+    mdhd = find_mp4_box(moov, [b'mdia', b'mdhd'], trak_start, trak_end)
+    headers['tkhd'] = moov[tkhd[0]:tkhd[1]]
+    headers['mdhd'] = moov[mdhd[0]:mdhd[1]]
+
+    # hdlr and the media information boxes are copied whole, headers included
+    mdia = find_mp4_box(moov, [b'mdia'], trak_start, trak_end)
+    minf = find_mp4_box(moov, [b'minf'], *mdia)
+    for start, end in (mdia, minf):
+        box_start = start
+        for box_type, payload_start, box_end in iter_mp4_boxes(moov, start, end):
+            if box_type in (b'hdlr', b'vmhd', b'smhd', b'nmhd', b'sthd', b'dinf'):
+                headers[box_type.decode()] = moov[box_start:box_end]
+            box_start = box_end
+    return headers
+
+def load_stream_segment(path):
+    """Parse the tracks of one segment, keeping the sample tables and raw headers"""
+    boxes, moov = read_mp4_moov(path)
+    moov_payload = next(iter_mp4_boxes(moov))[1]
+    tracks = []
+    for box_type, start, end in iter_mp4_boxes(moov, moov_payload):
+        if box_type != b'trak':
+            continue
+        track = parse_mp4_track(moov, start, end)
+        if track['handler'] not in (b'vide', b'soun') or not track['timescale'] or not track['stsd']:
+            continue
+        track['headers'] = read_mp4_track_headers(moov, start, end)
+        track['decode_times'] = mp4_sample_decode_times(track)
+        track['offsets'] = mp4_sample_offsets(track)
+        track['sync'] = None if track['stss'] is None else set(track['stss'])
+        if track['ctts'] is not None:
+            composition = array('q')
+            ctts = track['ctts']
+            for i in range(0, len(ctts), 2):
+                composition.extend([ctts[i + 1]] * ctts[i])
+            track['composition'] = composition
+        else:
+            track['composition'] = None
+        tracks.append(track)
+    tracks.sort(key=lambda t: t['handler'] != b'vide')  # Video first: it drives fragmentation
+    return tracks
+
+def build_stream_init_segment(tracks, duration_ms):
+    """Build ftyp + moov (with mvex) describing the stitched stream's tracks"""
+    ftyp = mp4_box_bytes(b'ftyp', b'iso6' + struct.pack('>I', 0) + b'iso6isomiso5mp41')
+
+    traks = []
+    trexs = []
+    for number, track in enumerate(tracks, start=1):
+        headers = track['headers']
+        tkhd = headers['tkhd']
+        # Keep layer/volume/matrix/size from the source header, reset ids and duration
+        tkhd_tail = tkhd[-60:]
+        tkhd_box = mp4_box_bytes(b'tkhd', struct.pack('>IIIIII', 3, 0, 0, number, 0, 0) + tkhd_tail)
+        language = headers['mdhd'][-4:]
+        mdhd_box = mp4_box_bytes(b'mdhd', struct.pack('>IIIII', 0, 0, 0, track['timescale'], 0) + language)
+        media_header = headers.get('vmhd') or headers.get('smhd') or headers.get('nmhd') or headers.get('sthd') or b''
+        dinf = headers.get('dinf') or mp4_box_bytes(b'dinf', mp4_box_bytes(
+            b'dref', struct.pack('>II', 0, 1) + mp4_box_bytes(b'url ', struct.pack('>I', 1))))
+        empty_tables = (mp4_box_bytes(b'stts', struct.pack('>II', 0, 0))
+                        + mp4_box_bytes(b'stsc', struct.pack('>II', 0, 0))
+                        + mp4_box_bytes(b'stsz', struct.pack('>III', 0, 0, 0))
+                        + mp4_box_bytes(b'stco', struct.pack('>II', 0, 0)))
+        stbl = mp4_box_bytes(b'stbl', track['stsd'] + empty_tables)
+        minf = mp4_box_bytes(b'minf', media_header + dinf + stbl)
+        mdia = mp4_box_bytes(b'mdia', mdhd_box + headers['hdlr'] + minf)
+        traks.append(mp4_box_bytes(b'trak', tkhd_box + mdia))
+        trexs.append(mp4_box_bytes(b'trex', struct.pack('>IIIIII', 0, number, 1, 0, 0, 0)))
+
+    mvhd = mp4_box_bytes(b'mvhd', struct.pack('>IIIII', 0, 0, 0, 1000, duration_ms)
+                         + struct.pack('>IH', 0x00010000, 0x0100) + b'\x00' * 10
+                         + struct.pack('>9I', 0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000)
+                         + b'\x00' * 24 + struct.pack('>I', len(tracks) + 1))
+    mvex = mp4_box_bytes(b'mvex', mp4_box_bytes(b'mehd', struct.pack('>II', 0, duration_ms)) + b''.join(trexs))
+    return ftyp + mp4_box_bytes(b'moov', mvhd + b''.join(traks) + mvex)
+
+def build_mp4_fragment(sequence, trafs):
+    """
+    Build the moof box and mdat header of one fragment.
+
+    Args:
+        sequence: Fragment sequence number
+        trafs: One dict per track run with track_id, base_time, durations,
+               sizes, flags and composition offsets (or None)
+
+    Returns:
+        bytes: moof box followed by the mdat header
+    """
+    def traf_bytes(traf, data_offset):
+        has_composition = traf['composition'] is not None
+        trun_flags = 0x000001 | 0x000100 | 0x000200 | 0x000400 | (0x000800 if has_composition else 0)
+        entries = []
+        for i in range(len(traf['sizes'])):
+            entries.append(struct.pack('>III', traf['durations'][i], traf['sizes'][i], traf['flags'][i]))
+            if has_composition:
+                entries.append(struct.pack('>i', traf['composition'][i]))
+        trun = mp4_box_bytes(b'trun', struct.pack('>IIi', (1 << 24 if has_composition else 0) | trun_flags,
+                                                  len(traf['sizes']), data_offset) + b''.join(entries))
+        tfhd = mp4_box_bytes(b'tfhd', struct.pack('>II', 0x020000, traf['track_id']))
+        tfdt = mp4_box_bytes(b'tfdt', struct.pack('>IQ', 1 << 24, traf['base_time']))
+        return mp4_box_bytes(b'traf', tfhd + tfdt + trun)
+
+    mfhd = mp4_box_bytes(b'mfhd', struct.pack('>II', 0, sequence))
+    # The moof size does not depend on the data offsets, so size it with zeros first
+    moof_size = len(mp4_box_bytes(b'moof', mfhd + b''.join(traf_bytes(traf, 0) for traf in trafs)))
+    data_size = sum(sum(traf['sizes']) for traf in trafs)
+    mdat_header = struct.pack('>I4s', data_size + 8, b'mdat')
+
+    parts = []
+    data_offset = moof_size + len(mdat_header)
+    for traf in trafs:
+        parts.append(traf_bytes(traf, data_offset))
+        data_offset += sum(traf['sizes'])
+    return mp4_box_bytes(b'moof', mfhd + b''.join(parts)) + mdat_header
+
+def plan_stream_segments(videos):
+    """
+    Place related videos on one timeline starting at the first video's timestamp.
+
+    A segment that starts before the previous one ends cuts the previous one
+    short; a segment that starts later than the previous one ends leaves a gap.
+
+    Returns:
+        tuple: (segments, gaps) with stream-relative start/end seconds
+    """
+    videos = [v for v in sorted(videos, key=lambda v: v['timestamp']) if v.get('duration')]
+    if not videos:
+        return [], []
+    base = videos[0]['timestamp']
+    segments = []
+    gaps = []
+    for i, video in enumerate(videos):
+        start = video['timestamp'] - base
+        end = start + video['duration']
+        if i + 1 < len(videos):
+            end = min(end, videos[i + 1]['timestamp'] - base)
+        if segments and start - segments[-1]['end'] > STREAM_GAP_TOLERANCE:
+            gaps.append({'start': segments[-1]['end'], 'end': start})
+        segments.append({
+            'filename': video['filename'],
+            'filepath': video['filepath'],
+            'timestamp': video['timestamp'],
+            'start': start,
+            'end': end,
+            'trimmed': round(video['duration'] - (end - start), 3)
+        })
+    return segments, gaps
+
+def build_stream_layout(videos):
+    """
+    Build the virtual fragmented MP4 stitching the given videos together.
+
+    Segments whose tracks or codec configuration differ from the first
+    segment cannot share its init segment and are skipped.
+
+    Returns:
+        dict: Virtual layout plus the 'manifest' describing the timeline
+    """
+    reference = None
+    loaded = {}
+    usable = []
+    skipped = []
+
+    # Probe and filter first, so skipped videos neither cut the previous
+    # segment short nor hide a gap on the planned timeline
+    for video in sorted(videos, key=lambda v: v['timestamp']):
+        if not video.get('duration'):
+            continue
+        try:
+            tracks = load_stream_segment(video['filepath'])
+        except Exception as e:
+            skipped.append({'filename': video['filename'], 'reason': f'Unreadable: {e}'})
+            continue
+        signature = [(t['handler'], t['timescale'], t['stsd']) for t in tracks]
+        if not tracks:
+            skipped.append({'filename': video['filename'], 'reason': 'No audio or video tracks'})
+            continue
+        if reference is None:
+            reference = tracks
+            reference_signature = signature
+        elif signature != reference_signature:
+            skipped.append({'filename': video['filename'], 'reason': 'Codec configuration differs from first segment'})
+            continue
+        loaded[video['filepath']] = tracks
+        usable.append(video)
+
+    if reference is None:
+        return None
+
+    included, gaps = plan_stream_segments(usable)
+    fragments = []  # (stream_start_seconds, moof_and_mdat_header, sample pieces)
+    sequence = 1
+
+    for segment in included:
+        tracks = loaded[segment['filepath']]
+        primary = tracks[0]
+        limits = []
+        for track in tracks:
+            # Drop samples decoded after this segment's slot ends (overlap with the next one)
+            cut = int(round((segment['end'] - segment['start']) * track['timescale'])) + track['media_time']
+            limits.append(min(bisect.bisect_left(track['decode_times'], cut), len(track['decode_times'])))
+
+        # Fragment boundaries (seconds into the segment) at the primary track's sync samples
+        if primary['sync'] is None:
+            # Every sample is a sync sample: cut fragments roughly every two seconds instead
+            boundaries = [float(b) for b in range(0, max(int(segment['end'] - segment['start']), 1), 2)]
+        else:
+            boundaries = [0.0] + [(primary['decode_times'][i] - primary['media_time']) / primary['timescale']
+                                  for i in range(1, limits[0]) if (i + 1) in primary['sync']]
+
+        positions = [0] * len(tracks)
+        for k, boundary in enumerate(boundaries):
+            next_boundary = boundaries[k + 1] if k + 1 < len(boundaries) else None
+            trafs = []
+            pieces = []
+            for number, track in enumerate(tracks, start=1):
+                first = positions[number - 1]
+                if next_boundary is None:
+                    last = limits[number - 1]
+                else:
+                    edge = int(round(next_boundary * track['timescale'])) + track['media_time']
+                    last = min(bisect.bisect_left(track['decode_times'], edge, first), limits[number - 1])
+                positions[number - 1] = last
+                if last <= first:
+                    continue
+                decode_times = track['decode_times']
+                stts_last = track['stts'][-1] if len(track['stts']) else 0
+                durations = [(decode_times[i + 1] if i + 1 < len(decode_times) else decode_times[i] + stts_last) - decode_times[i]
+                             for i in range(first, last)]
+                sizes = list(track['stsz'][first:last])
+                if track['sync'] is None:
+                    flags = [MP4_SYNC_SAMPLE_FLAGS] * (last - first)
+                else:
+                    flags = [MP4_SYNC_SAMPLE_FLAGS if (i + 1) in track['sync'] else MP4_NON_SYNC_SAMPLE_FLAGS
+                             for i in range(first, last)]
+                # There is no edit list in the stitched stream, so the edit list
+                # offset is folded into the composition offsets instead
+                composition = None
+                if track['composition'] is not None or track['media_time']:
+                    source = track['composition']
+                    composition = [(source[i] if source is not None and i < len(source) else 0) - track['media_time']
+                                   for i in range(first, last)]
+                trafs.append({
+                    'track_id': number,
+                    'base_time': int(round(segment['start'] * track['timescale'])) + decode_times[first],
+                    'durations': durations,
+                    'sizes': sizes,
+                    'flags': flags,
+                    'composition': composition
+                })
+                pieces.extend((segment['filepath'], track['offsets'][i], track['stsz'][i]) for i in range(first, last))
+            if trafs:
+                fragments.append((segment['start'] + boundary, build_mp4_fragment(sequence, trafs), pieces))
+                sequence += 1
+
+    duration = included[-1]['end'] if included else 0
+    init = build_stream_init_segment(reference, int(round(duration * 1000)))
+
+    # sidx: one reference per fragment so players can seek without scanning
+    timescale = reference[0]['timescale']
+    fragment_sizes = [len(header) + sum(piece[2] for piece in pieces) for start, header, pieces in fragments]
+    starts = [int(round(start * timescale)) for start, header, pieces in fragments]
+    references = []
+    for i, size in enumerate(fragment_sizes):
+        end = starts[i + 1] if i + 1 < len(starts) else int(round(duration * timescale))
+        references.append(struct.pack('>III', size & 0x7FFFFFFF, max(end - starts[i], 0), 0x90000000))
+    sidx = mp4_box_bytes(b'sidx', struct.pack('>IIIQQHH', 1 << 24, 1, timescale,
+                                              starts[0] if starts else 0, 0, 0, len(references))
+                         + b''.join(references))
+
+    layout_pieces = [init, sidx]
+    for start, header, pieces in fragments:
+        layout_pieces.append(header)
+        layout_pieces.extend(pieces)
+    layout = build_virtual_layout(layout_pieces)
+    layout['manifest'] = {
+        'start_time': included[0]['timestamp'] if included else None,
+        'duration': round(duration, 3),
+        'segments': [{key: segment[key] for key in ('filename', 'timestamp', 'start', 'end', 'trimmed')}
+                     for segment in included],
+        'gaps': gaps,
+        'skipped': skipped
+    }
+    return layout
+
+def get_stream_layout(track_id, videos):
+    """Return the cached stitched stream layout for a track's related videos"""
+    key = (track_id, tuple((v['filepath'], v['timestamp'], v.get('duration'), v['size']) for v in videos))
+    with stream_layout_lock:
+        cached = stream_layout_cache.get(track_id)
+        if cached and cached[0] == key:
+            stream_layout_cache.move_to_end(track_id)
+            return cached[1]
+
+    layout = build_stream_layout(videos)
+
+    with stream_layout_lock:
+        stream_layout_cache[track_id] = (key, layout)
+        stream_layout_cache.move_to_end(track_id)
+        while len(stream_layout_cache) > STREAM_CACHE_SIZE:
+            stream_layout_cache.popitem(last=False)
+    return layout
+
+def scan_recording_files(root):
+    """Get list of recording files in one data root"""
+    files = []
+    
+    if not os.path.exists(root['recordings_dir']):
+        return files
+    
+    # Collect all files with their modification times for sorting
+    all_files = scan_recording_dirs(root['recordings_dir'])
+    
+    if METRICS_ENABLED:
+        metrics_inc('files_scanned_total', len(all_files), kind='recording')
+
+    # Process files
+    probe = not warmup_partial()
+    durations = scan_pool_map(lambda f: get_cached_video_duration(f[3], f[4], probe), all_files)
+    for (domain, rtmpkey, filename, file_path, stat), duration in zip(all_files, durations):
+        # Extract timestamp from filename if possible (format: timestamp.mp4)
+        m = re.match(r'^(\d+)\.mp4$', filename)
+        timestamp = int(m.group(1)) if m else None
+        
+        files.append(RecordingRecord(root['name'], domain, rtmpkey, filename, timestamp,
+                                     stat.st_size, duration, stat.st_mtime_ns))
+    return files
+
+def get_recording_files():
+    """Get list of recording files from the hierarchical recordings directories of all data roots"""
+    return coalesced(('recordings',), build_recording_catalog)
+
+def build_recording_catalog():
+    """Scan all data roots for .mp4 files, most recently modified first"""
+    files = scan_data_roots('recordings', scan_recording_files)
+
+    # Sort all files by modification time, newest first
+    files.sort(key=lambda x: x['mtime'], reverse=True)
+    return files
+
+# Density tile aggregation
+# Every track is projected to normalised Web Mercator coordinates (0..1) and
+# binned into 256x256 tiles on demand. Binned tiles are cached on disk and only
+# the tiles overlapping an added, changed or deleted track are invalidated.
+DENSITY_TILE_SIZE = 256
+DENSITY_MAX_ZOOM = 18
+DENSITY_SATURATION = 64  # Point count rendered at full intensity
+DENSITY_REFRESH_INTERVAL = 5.0  # Seconds between track directory rescans
+
+density_index = {}
+density_index_lock = threading.Lock()
+density_index_checked = 0.0
+density_generation = 0  # Bumped whenever cached tiles are invalidated
+
+def mercator_project(latitude, longitude):
+    """Project a WGS84 position to normalised Web Mercator coordinates (0..1)"""
+    latitude = max(-85.05112878, min(85.05112878, latitude))
+    lat_rad = math.radians(latitude)
+    x = (longitude + 180.0) / 360.0
+    y = (1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0
+    return min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+
+def iter_track_positions(track_file):
+    """Yield (latitude, longitude) pairs from a track without building coordinate dicts"""
+    if is_compact_track(track_file):
+        for latitudes, longitudes in iter_compact_blocks(track_file, ('latitude', 'longitude')):
+            yield from zip(latitudes, longitudes)
+        return
+    with open(track_file, 'r') as f:
+        for line in f:
+            if line.startswith('#') or line.startswith('timestamp'):
+                continue
+            parts = line.split('\t', 3)
+            if len(parts) >= 3:
+                try:
+                    yield float(parts[1]), float(parts[2])
+                except ValueError:
+                    continue
+
+def load_projected_track(track_file):
+    """Load a track as two arrays of normalised Web Mercator x/y coordinates"""
+    xs = array('d')
+    ys = array('d')
+    for latitude, longitude in iter_track_positions(track_file):
+        x, y = mercator_project(latitude, longitude)
+        xs.append(x)
+        ys.append(y)
+    return xs, ys
+
+def density_tile_bounds(z, x, y):
+    """Return the normalised (min_x, min_y, max_x, max_y) extent of a tile"""
+    n = 1 << z
+    return x / n, y / n, (x + 1) / n, (y + 1) / n
+
+def bounds_intersect(a, b):
+    """Check whether two (min_x, min_y, max_x, max_y) boxes overlap"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def invalidate_density_tiles(changed_bounds):
+    """Remove cached density tiles overlapping any of the given bounding boxes"""
+    if not changed_bounds or not os.path.isdir(DENSITY_CACHE_DIR):
+        return 0
+    removed = 0
+    for z_name in os.listdir(DENSITY_CACHE_DIR):
+        z_path = os.path.join(DENSITY_CACHE_DIR, z_name)
+        if not z_name.isdigit() or not os.path.isdir(z_path):
+            continue
+        z = int(z_name)
+        n = 1 << z
+        # Only look at tile columns that can overlap a changed box
+        columns = set()
+        for bounds in changed_bounds:
+            columns.update(range(int(bounds[0] * n), min(int(bounds[2] * n), n - 1) + 1))
+        for x in columns:
+            x_path = os.path.join(z_path, str(x))
+            if not os.path.isdir(x_path):
+                continue
+            for tile_name in os.listdir(x_path):
+                y_name = tile_name.split('.', 1)[0]
+                if not y_name.isdigit():
+                    continue
+                tile_bounds = density_tile_bounds(z, x, int(y_name))
+                if any(bounds_intersect(tile_bounds, bounds) for bounds in changed_bounds):
+                    try:
+                        os.remove(os.path.join(x_path, tile_name))
+                        removed += 1
+                    except OSError:
+                        pass
+    return removed
+
+def refresh_density_index(force=False):
+    """Bring the density index in line with the tracks directories and return it"""
+    return refresh_density_state(force)[0]
+
+def refresh_density_state(force=False):
+    """
+    Bring the density index in line with the tracks directories.
+
+    The index maps track IDs to a file signature and a projected bounding box.
+    Tracks whose signature changed, new tracks and deleted tracks have their
+    bounding boxes collected so that only the overlapping cached tiles are
+    discarded. Each data root keeps the index of its own tracks; the tiles
+    combine all roots and are cached in the primary root. A stalled root keeps
+    its last indexed tracks.
+
+    Returns:
+        tuple: (current density index, generation of its cached tiles)
+    """
+    global density_index, density_index_checked, density_generation
+
+    with density_index_lock:
+        now = time.time()
+        if not force and density_index and now - density_index_checked < DENSITY_REFRESH_INTERVAL:
+            return density_index, density_generation
+        density_index_checked = now
+
+        if not density_index:
+            for root in DATA_ROOTS:
+                if not os.path.exists(root['density_index_file']):
+                    continue
+                try:
+                    with open(root['density_index_file'], 'r') as f:
+                        stored = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Error reading density index of {root['path']}, rebuilding: {e}")
+                    continue
+                for track_id, entry in stored.items():
+                    density_index[namespaced_track_id(root, track_id)] = dict(entry, root=root['name'])
+
+        current = {}
+        changed_bounds = []
+        for root in DATA_ROOTS:
+            if root['stalled']:
+                current.update((track_id, entry) for track_id, entry in density_index.items()
+                               if entry.get('root') == root['name'])
+                continue
+            try:
+                track_sources = list_track_sources(root['tracks_dir'])
+            except OSError:
+                track_sources = {}
+            for name, (track_file, stat, _, _) in track_sources.items():
+                track_id = namespaced_track_id(root, name)
+                signature = [stat.st_mtime_ns, stat.st_size]
+                entry = density_index.get(track_id)
+                if entry and entry['signature'] == signature:
+                    current[track_id] = entry
+                    continue
+
+                try:
+                    xs, ys = load_projected_track(track_file)
+                except Exception as e:
+                    print(f"Error indexing track {track_file} for density tiles: {e}")
+                    continue
+                bounds = [min(xs), min(ys), max(xs), max(ys)] if xs else None
+                current[track_id] = {
+                    'filepath': track_file,
+                    'signature': signature,
+                    'bounds': bounds,
+                    'points': len(xs),
+                    'root': root['name']
+                }
+                if (entry and entry['filepath'] != track_file
+                        and entry.get('bounds') == bounds and entry.get('points') == len(xs)):
+                    continue  # Same track read from another file (it was compacted)
+                if entry and entry.get('bounds'):
+                    changed_bounds.append(entry['bounds'])
+                if bounds:
+                    changed_bounds.append(bounds)
+
+        for track_id, entry in density_index.items():
+            if track_id not in current and entry.get('bounds'):
+                changed_bounds.append(entry['bounds'])
+
+        if changed_bounds or set(current) != set(density_index):
+            density_generation += 1
+            removed = invalidate_density_tiles(changed_bounds)
+            if removed:
+                print(f"Invalidated {removed} cached density tile(s)")
+            density_index = current
+            for root in DATA_ROOTS:
+                if root['stalled'] or not os.path.isdir(root['path']):
+                    continue
+                stored = {os.path.splitext(os.path.basename(entry['filepath']))[0]:
+                          {key: value for key, value in entry.items() if key != 'root'}
+                          for entry in density_index.values() if entry['root'] == root['name']}
+                try:
+                    os.makedirs(os.path.dirname(root['density_index_file']), exist_ok=True)
+                    tmp_path = root['density_index_file'] + '.tmp'
+                    with open(tmp_path, 'w') as f:
+                        json.dump(stored, f)
+                    os.replace(tmp_path, root['density_index_file'])
+                except OSError as e:
+                    print(f"Error writing density index of {root['path']}: {e}")
+
+        return density_index, density_generation
+
+def density_snapshot():
+    """
+    Return (density index, tile generation) for the overview and its tiles.
+
+    While the startup warm-up is building the index, the index as it stands is
+    returned instead of parsing tracks on the request thread, with generation
+    None so that tiles binned from it are not cached (tiles cached by earlier
+    runs are still served).
+    """
+    if warmup_partial():
+        return density_index, None
+    return refresh_density_state()
+
+def bin_density_tile(z, x, y, index):
+    """
+    Bin every indexed track point that falls inside tile z/x/y.
+
+    Returns:
+        Counter: Cell index (row * DENSITY_TILE_SIZE + column) to point count
+    """
+    tile_bounds = density_tile_bounds(z, x, y)
+    scale = (1 << z) * DENSITY_TILE_SIZE
+    origin_x = x * DENSITY_TILE_SIZE
+    origin_y = y * DENSITY_TILE_SIZE
+    size = DENSITY_TILE_SIZE
+    counts = Counter()
+
+    for entry in index.values():
+        if not entry.get('bounds') or not bounds_intersect(tile_bounds, entry['bounds']):
+            continue
+        try:
+            xs, ys = load_projected_track(entry['filepath'])
+        except Exception as e:
+            print(f"Error loading track {entry['filepath']} for density tile: {e}")
+            continue
+        columns = [int(px * scale) - origin_x for px in xs]
+        rows = [int(py * scale) - origin_y for py in ys]
+        counts.update(row * size + column
+                      for column, row in zip(columns, rows)
+                      if 0 <= column < size and 0 <= row < size)
+    return counts
+
+def write_density_cache(path, data, generation):
     """
-    Find all video files that temporally overlap with the track timing.
-    
-    Args:
-        track_start_time: Start timestamp of the track
-        track_end_time: End timestamp of the track
-        videos: List of video files with duration and end_time
-    
+    Atomically write a cached density tile file.
+
+    The file is only moved into place if no tiles were invalidated since
+    generation was read, so counts binned from an outdated index are never
+    cached over a fresh invalidation. Counts without a generation (binned while
+    the warm-up builds the index) are never cached.
+    """
+    if generation is None:
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    with density_index_lock:
+        if generation == density_generation:
+            os.replace(tmp_path, path)
+            return True
+    os.remove(tmp_path)
+    return False
+
+def get_density_tile(z, x, y):
+    """
+    Return the cell counts for tile z/x/y, binning and caching them if needed.
+
     Returns:
-        List of video files that have temporal overlap with the track timespan
+        tuple: (counts, generation of the index they were binned from)
     """
-    if not videos:
-        return []
-    
-    related_videos = []
-    
-    for video in videos:
-        video_start = video['timestamp']
-        video_end = video.get('end_time')
-        
-        # Skip videos without duration/end_time information
-        if video_end is None:
-            continue
-        
-        # Check for temporal overlap between video and track
-        # Two time ranges overlap if: max(start1, start2) < min(end1, end2)
-        overlap_start = max(track_start_time, video_start)
-        overlap_end = min(track_end_time, video_end)
-        
-        if overlap_start < overlap_end:
-            # There is an overlap
-            related_videos.append(video)
-    
-    # Sort by timestamp to return in chronological order
-    related_videos.sort(key=lambda x: x['timestamp'])
-    
-    return related_videos
+    index, generation = density_snapshot()
+    tile_path = os.path.join(DENSITY_CACHE_DIR, str(z), str(x), f"{y}.json")
+    if os.path.exists(tile_path):
+        try:
+            with open(tile_path, 'r') as f:
+                return {int(cell): count for cell, count in json.load(f).items()}, generation
+        except (OSError, ValueError):
+            pass
 
-def get_recording_files():
-    """Get list of recording files from the hierarchical recordings directory structure"""
-    files = []
-    
-    if not os.path.exists(RECORDINGS_DIR):
-        return files
-    
-    # Collect all files with their modification times for sorting
-    all_files = []
-    
-    # Walk through hierarchical structure: domain/rtmpkey/files
-    for domain in os.listdir(RECORDINGS_DIR):
-        domain_path = os.path.join(RECORDINGS_DIR, domain)
-        if not os.path.isdir(domain_path):
-            continue
-            
-        for rtmpkey in os.listdir(domain_path):
-            rtmpkey_path = os.path.join(domain_path, rtmpkey)
-            if not os.path.isdir(rtmpkey_path):
+    counts = dict(bin_density_tile(z, x, y, index))
+    try:
+        write_density_cache(tile_path, json.dumps(counts).encode(), generation)
+    except OSError as e:
+        print(f"Error caching density tile {z}/{x}/{y}: {e}")
+    return counts, generation
+
+def encode_png_rgba(width, height, pixels):
+    """Encode raw RGBA bytes as a PNG image"""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    stride = width * 4
+    raw = b''.join(b'\x00' + bytes(pixels[row * stride:(row + 1) * stride]) for row in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+def render_density_png(counts):
+    """Render cell counts as a transparent yellow-to-red heat tile"""
+    size = DENSITY_TILE_SIZE
+    pixels = bytearray(size * size * 4)
+    log_saturation = math.log1p(DENSITY_SATURATION)
+    for cell, count in counts.items():
+        intensity = min(1.0, math.log1p(count) / log_saturation)
+        offset = cell * 4
+        pixels[offset] = 255
+        pixels[offset + 1] = int(220 * (1.0 - intensity))
+        pixels[offset + 2] = 0
+        pixels[offset + 3] = int(96 + 159 * intensity)
+    return encode_png_rgba(size, size, pixels)
+
+# Map tile proxy
+# Basemap tiles are requested from --tile-url through /tiles/<z>/<x>/<y>.png
+# and kept under the primary root's cache directory (one subdirectory per tile
+# server), so areas seen before need no round-trip and still show offline. The
+# cache is an LRU bounded by --tile-cache-mb: a hit touches the file's mtime,
+# and the least recently used tiles are deleted once the total is over the cap.
+# The in-memory index of cached tiles is built from the directory on first use.
+# Concurrent requests for the same missing tile share one upstream fetch.
+TILE_CACHE_DIR = os.path.join(CACHE_DIR, 'tiles')
+TILE_CACHE_MAX_BYTES = max(0, args.tile_cache_mb) * 1024 * 1024
+TILE_MAX_ZOOM = 19
+TILE_FETCH_TIMEOUT = 10  # Seconds per upstream request
+TILE_BROWSER_MAX_AGE = 7 * 24 * 3600
+TILE_USER_AGENT = 'StreamerViewer tile cache'
+TILE_PREFETCH_MAX_TILES = 2000  # Per prefetch request; keep bulk downloads polite
+TILE_PREFETCH_WORKERS = 2
+TILE_PREFETCH_MARGIN = 1  # Extra tiles around the bounding box at every zoom
+TILE_PREFETCH_JOB_TTL = 3600  # Seconds a finished prefetch job stays available for status polling
+
+tile_server_dir = os.path.join(TILE_CACHE_DIR, hashlib.sha1(args.tile_url.encode('utf-8')).hexdigest()[:12])
+tile_cache_index = None  # path -> size, least recently used first
+tile_cache_bytes = 0
+tile_cache_lock = threading.Lock()
+tile_cache_stats = Counter()
+tile_prefetch_jobs = {}
+tile_prefetch_lock = threading.Lock()
+
+def load_tile_cache_index():
+    """Index the cached tiles of all tile servers by last use (call with tile_cache_lock held)"""
+    global tile_cache_index, tile_cache_bytes
+    tiles = []
+    for directory, _, filenames in os.walk(TILE_CACHE_DIR):
+        for filename in filenames:
+            if not filename.endswith('.png'):
                 continue
-                
-            # Get all mp4 files in this rtmpkey directory
-            for filename in os.listdir(rtmpkey_path):
-                if filename.endswith('.mp4'):
-                    file_path = os.path.join(rtmpkey_path, filename)
-                    try:
-                        mtime = os.path.getmtime(file_path)
-                        display_name = f"{domain}/{rtmpkey}/{filename}"
-                        all_files.append((mtime, file_path, display_name, domain, rtmpkey))
-                    except OSError:
-                        continue
-    
-    # Sort all files by modification time, newest first
-    all_files.sort(key=lambda x: x[0], reverse=True)
-    
-    # Process sorted files
-    for mtime, file_path, display_name, domain, rtmpkey in all_files:
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            tiles.append((stat.st_mtime, path, stat.st_size))
+    tiles.sort()
+    tile_cache_index = OrderedDict((path, size) for _, path, size in tiles)
+    tile_cache_bytes = sum(tile_cache_index.values())
+
+def tile_cache_path(z, x, y):
+    """Path of a cached tile of the configured tile server"""
+    return os.path.join(tile_server_dir, str(z), str(x), f"{y}.png")
+
+def read_cached_tile(path):
+    """Return a cached tile and mark it as recently used, or None"""
+    global tile_cache_bytes
+    with tile_cache_lock:
+        if tile_cache_index is None:
+            load_tile_cache_index()
+        if path not in tile_cache_index:
+            return None
+        tile_cache_index.move_to_end(path)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)  # Keeps the LRU order across restarts
+    except OSError:
+        with tile_cache_lock:
+            tile_cache_bytes -= tile_cache_index.pop(path, 0)
+        return None
+    return data
+
+def store_cached_tile(path, data):
+    """Write a tile to the cache and delete least recently used tiles over the size cap"""
+    global tile_cache_bytes
+    if len(data) > TILE_CACHE_MAX_BYTES:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error caching map tile {path}: {e}")
+        return
+
+    evicted = []
+    with tile_cache_lock:
+        if tile_cache_index is None:
+            load_tile_cache_index()
+        else:
+            tile_cache_bytes += len(data) - tile_cache_index.pop(path, 0)
+            tile_cache_index[path] = len(data)
+        while tile_cache_bytes > TILE_CACHE_MAX_BYTES and tile_cache_index:
+            old_path, size = tile_cache_index.popitem(last=False)
+            tile_cache_bytes -= size
+            evicted.append(old_path)
+        tile_cache_stats['evicted'] += len(evicted)
+    for old_path in evicted:
         try:
-            size = os.path.getsize(file_path)
-            duration = get_video_duration_mediainfo(file_path)
-            
-            # Extract timestamp from filename if possible (format: timestamp.mp4)
-            filename = os.path.basename(file_path)
-            m = re.match(r'^(\d+)\.mp4$', filename)
-            timestamp = int(m.group(1)) if m else None
-            
-            files.append({
-                'path': file_path,
-                'name': display_name,
-                'size': size,
-                'location': 'Local',
-                'active': False,  # No active recordings in upload interface
-                'duration': duration,
-                'timestamp': timestamp,
-                'domain': domain,
-                'rtmpkey': rtmpkey
-            })
-            
+            os.remove(old_path)
         except OSError:
-            continue
-    
-    return files
+            pass
+
+def fetch_map_tile(z, x, y):
+    """Download a tile from the tile server and cache it"""
+    url = args.tile_url.format(z=z, x=x, y=y, s='a')
+    with tile_cache_lock:
+        tile_cache_stats['upstream'] += 1
+    response = requests.get(url, headers={'User-Agent': TILE_USER_AGENT}, timeout=TILE_FETCH_TIMEOUT)
+    if response.status_code != 200:
+        raise LookupError(f"Tile server returned {response.status_code} for {z}/{x}/{y}")
+    data = response.content
+    if TILE_CACHE_MAX_BYTES:
+        store_cached_tile(tile_cache_path(z, x, y), data)
+    return data
+
+def get_map_tile(z, x, y):
+    """
+    Return a basemap tile from the cache or the tile server.
+
+    Returns:
+        tuple: (PNG bytes, True when it came from the cache)
+
+    Raises:
+        LookupError: The tile server has no such tile
+        requests.RequestException: The tile server could not be reached
+    """
+    if TILE_CACHE_MAX_BYTES:
+        data = read_cached_tile(tile_cache_path(z, x, y))
+        if data is not None:
+            with tile_cache_lock:
+                tile_cache_stats['hits'] += 1
+            return data, True
+    with tile_cache_lock:
+        tile_cache_stats['misses'] += 1
+    return coalesced(('tile', z, x, y), fetch_map_tile, z, x, y), False
+
+def tiles_covering(bounds, zoom, margin=TILE_PREFETCH_MARGIN):
+    """List the (z, x, y) tiles covering normalised Web Mercator bounds at one zoom level"""
+    n = 1 << zoom
+    min_x = max(0, int(bounds[0] * n) - margin)
+    max_x = min(n - 1, int(bounds[2] * n) + margin)
+    min_y = max(0, int(bounds[1] * n) - margin)
+    max_y = min(n - 1, int(bounds[3] * n) + margin)
+    return [(zoom, x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+def parse_zoom_levels(value):
+    """Parse zoom levels given as a list, "12,14" or "12-16"; raises ValueError"""
+    if isinstance(value, list):
+        zooms = {int(zoom) for zoom in value}
+    else:
+        zooms = set()
+        for part in str(value).split(','):
+            if '-' in part:
+                first, last = part.split('-', 1)
+                zooms.update(range(int(first), int(last) + 1))
+            elif part.strip():
+                zooms.add(int(part))
+    if not zooms or min(zooms) < 0 or max(zooms) > TILE_MAX_ZOOM:
+        raise ValueError(f"Zoom levels must be between 0 and {TILE_MAX_ZOOM}")
+    return sorted(zooms)
+
+def prune_tile_prefetch_jobs():
+    """Forget prefetch jobs finished more than TILE_PREFETCH_JOB_TTL ago (call with tile_prefetch_lock held)"""
+    expired = time.time() - TILE_PREFETCH_JOB_TTL
+    for job_id in [job_id for job_id, job in tile_prefetch_jobs.items()
+                   if job['finished'] is not None and job['finished'] < expired]:
+        del tile_prefetch_jobs[job_id]
+
+def run_tile_prefetch(job_id, tiles):
+    """Download the missing tiles of a prefetch job"""
+    job = tile_prefetch_jobs[job_id]
+
+    def prefetch(tile):
+        try:
+            if read_cached_tile(tile_cache_path(*tile)) is not None:
+                outcome = 'cached'
+            else:
+                coalesced(('tile',) + tile, fetch_map_tile, *tile)
+                outcome = 'fetched'
+        except (LookupError, requests.RequestException) as e:
+            outcome = 'failed'
+            with tile_prefetch_lock:
+                job['error'] = str(e)
+        with tile_prefetch_lock:
+            job[outcome] += 1
+            job['done'] += 1
+
+    with ThreadPoolExecutor(max_workers=TILE_PREFETCH_WORKERS, thread_name_prefix='tiles') as executor:
+        list(executor.map(prefetch, tiles))
+    with tile_prefetch_lock:
+        job['status'] = 'completed' if not job['failed'] else 'completed_with_errors'
+        job['finished'] = time.time()
+
+# Front-end assets
+# Leaflet is served from /assets/leaflet/ instead of a CDN, from the copy
+# vendored in static/vendor/leaflet (refresh it with --vendor-assets after
+# changing LEAFLET_VERSION). A file missing there is downloaded from the CDN
+# once and kept in the cache directory.
+LEAFLET_VERSION = '1.9.4'
+LEAFLET_CDN_URL = f"https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/"
+LEAFLET_ASSETS = ('leaflet.css', 'leaflet.js', 'images/layers.png', 'images/layers-2x.png',
+                  'images/marker-icon.png', 'images/marker-icon-2x.png', 'images/marker-shadow.png')
+LEAFLET_VENDOR_DIR = os.path.join(app.static_folder, 'vendor', 'leaflet')
+LEAFLET_CACHE_DIR = os.path.join(CACHE_DIR, 'assets', f"leaflet-{LEAFLET_VERSION}")
+
+def download_asset(url, path):
+    """Download a file to path atomically"""
+    response = requests.get(url, timeout=TILE_FETCH_TIMEOUT)
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(response.content)
+    os.replace(tmp_path, path)
+
+def leaflet_asset_path(filename):
+    """Return a local copy of a Leaflet file, downloading it into the cache when needed"""
+    vendored = os.path.join(LEAFLET_VENDOR_DIR, filename)
+    if os.path.isfile(vendored):
+        return vendored
+    cached = os.path.join(LEAFLET_CACHE_DIR, filename)
+    if not os.path.isfile(cached):
+        coalesced(('asset', filename), download_asset, LEAFLET_CDN_URL + filename, cached)
+    return cached
+
+def vendor_leaflet_assets():
+    """Download every Leaflet file into static/vendor/leaflet (--vendor-assets)"""
+    for filename in LEAFLET_ASSETS:
+        download_asset(LEAFLET_CDN_URL + filename, os.path.join(LEAFLET_VENDOR_DIR, filename))
+        print(f"Vendored leaflet/{filename}")
+
+if METRICS_ENABLED:
+    @app.before_request
+    def start_request_timer():
+        """Remember when the request started for the latency histogram"""
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_latency(response):
+        """Record per-route request latency"""
+        started = g.get('request_started')
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics_observe('http_request_duration_seconds', time.perf_counter() - started,
+                            route=route, method=request.method, status=response.status_code)
+        return response
+
+# Request profiling
+# With --profile, a request carrying ?__profile=1 or "X-Profile: 1" runs under
+# cProfile while a sampler thread records its stack every few milliseconds.
+# The pstats file and the collapsed stacks (flamegraph.pl / speedscope input)
+# are written to PROFILES_DIR. Without --profile no hooks are installed.
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+def sample_thread_stacks(thread_id, samples, stop_event):
+    """Collect collapsed stacks of one thread until stop_event is set"""
+    while not stop_event.wait(PROFILE_SAMPLE_INTERVAL):
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if stack:
+            samples[';'.join(reversed(stack))] += 1
+
+def save_request_profile(profile_state, duration):
+    """Write the pstats and collapsed-stack files of a profiled request"""
+    endpoint = re.sub(r'[^A-Za-z0-9_-]+', '_', request.endpoint or 'unmatched')
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:6]}"
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+
+    if profile_state['profiler'] is not None:
+        profile_state['profiler'].dump_stats(os.path.join(PROFILES_DIR, name + '.pstats'))
+    with open(os.path.join(PROFILES_DIR, name + '.folded'), 'w') as f:
+        for stack, count in profile_state['samples'].most_common():
+            f.write(f"{stack} {count}\n")
+    with open(os.path.join(PROFILES_DIR, name + '.json'), 'w') as f:
+        json.dump({
+            'name': name,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'duration': round(duration, 6),
+            'samples': sum(profile_state['samples'].values()),
+            'created': time.time()
+        }, f)
+    print(f"Saved request profile {name} ({duration * 1000:.1f} ms)")
+
+if args.profile:
+    @app.before_request
+    def start_request_profile():
+        """Start profiling the request if it asks for it"""
+        if request.args.get('__profile') != '1' and request.headers.get('X-Profile') != '1':
+            return
+        if request.path.startswith('/debug/profiles'):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            profiler = None  # Another profiler is active (concurrent request); sample only
+        stop_event = threading.Event()
+        samples = Counter()
+        sampler = threading.Thread(target=sample_thread_stacks,
+                                   args=(threading.get_ident(), samples, stop_event), daemon=True)
+        sampler.start()
+        g.profile_state = {'profiler': profiler, 'samples': samples, 'stop': stop_event,
+                           'sampler': sampler, 'started': time.perf_counter()}
+
+    @app.teardown_request
+    def finish_request_profile(exc):
+        """Stop profiling and save the results"""
+        profile_state = g.pop('profile_state', None)
+        if profile_state is None:
+            return
+        duration = time.perf_counter() - profile_state['started']
+        if profile_state['profiler'] is not None:
+            profile_state['profiler'].disable()
+        profile_state['stop'].set()
+        profile_state['sampler'].join()
+        try:
+            save_request_profile(profile_state, duration)
+        except OSError as e:
+            print(f"Error saving request profile: {e}")
+
+@app.route('/debug/profiles')
+def debug_profiles():
+    """List saved request profiles (requires --profile)"""
+    if not args.profile:
+        return jsonify({'error': 'Profiling is disabled. Start with --profile to enable it.'}), 404
+
+    profiles = []
+    if os.path.isdir(PROFILES_DIR):
+        for filename in os.listdir(PROFILES_DIR):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(PROFILES_DIR, filename), 'r') as f:
+                    info = json.load(f)
+            except (OSError, ValueError):
+                continue
+            info['files'] = {kind: f"/debug/profiles/{info['name']}.{kind}"
+                             for kind in ('pstats', 'folded')
+                             if os.path.exists(os.path.join(PROFILES_DIR, f"{info['name']}.{kind}"))}
+            profiles.append(info)
+    profiles.sort(key=lambda p: p['created'], reverse=True)
+    return jsonify({'directory': PROFILES_DIR, 'profiles': profiles})
+
+@app.route('/debug/profiles/<name>.<kind>')
+def debug_profile_file(name, kind):
+    """Download a saved profile as pstats or collapsed stacks"""
+    if not args.profile or kind not in ('pstats', 'folded', 'json'):
+        return "Profile not found", 404
+    profile_path = os.path.join(PROFILES_DIR, secure_filename(f"{name}.{kind}"))
+    if not os.path.isfile(profile_path):
+        return "Profile not found", 404
+    return send_file(profile_path, as_attachment=kind == 'pstats',
+                     mimetype='text/plain' if kind == 'folded' else None)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics endpoint (requires --metrics)"""
+    if not METRICS_ENABLED:
+        return "Metrics are disabled. Start with --metrics to enable them.", 404
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
 
 @app.template_filter('datetimeformat')
 def datetimeformat(value):
@@ -517,19 +3387,267 @@ def filesizeformat(num_bytes):
     except:
         return str(num_bytes)
 
+# HTTP caching
+# Track pages and APIs carry strong ETags built from file signatures only (no
+# parsing): the track's own files for /api/track/<id>, those plus the
+# recordings generation (every recording's mtime and size, so recordings that
+# grow or are finalized in place count too) for /view/<id>, and the tracks and
+# recordings generations for the index, which lists both. Requests with
+# a matching If-None-Match or If-Modified-Since get a 304 after a directory
+# listing, before anything is parsed or probed. "no-cache" lets the webview and browsers keep their copy
+# and revalidate it on each use.
+APP_STARTED = int(time.time())
+APP_GENERATION = f"{APP_STARTED:x}"  # Templates and JSON layout may change between runs
+HTTP_CACHE_CONTROL = 'no-cache'
+
+def resolve_track_files(track_id):
+    """Return (path, stat) of the existing files (TSV and compact) of a track ID, without a catalog scan"""
+    root = DATA_ROOTS[0]
+    name = track_id
+    if MULTI_ROOT:
+        root_name, separator, name = track_id.partition(':')
+        root = DATA_ROOTS_BY_NAME.get(root_name) if separator else None
+        if root is None:
+            return []
+    if not name or name.startswith('.') or os.sep in name or (os.altsep and os.altsep in name):
+        return []
+
+    files = []
+    for extension in ('.tsv', COMPACT_TRACK_EXTENSION):
+        path = os.path.join(root['tracks_dir'], name + extension)
+        try:
+            files.append((path, os.stat(path)))
+        except OSError:
+            continue
+    return files
+
+def digest_signatures(parts):
+    """Hash a list of signature strings into a short hex digest"""
+    return hashlib.sha1('\n'.join(parts).encode('utf-8', errors='replace')).hexdigest()[:20]
+
+def tracks_generation():
+    """Return (digest, newest mtime) over the track files of all data roots"""
+    parts = []
+    newest = 0
+    for root in DATA_ROOTS:
+        if root['stalled']:
+            parts.append(f"{root['name']}:stalled")
+            continue
+        try:
+            with os.scandir(root['tracks_dir']) as entries:
+                for entry in entries:
+                    if entry.name.endswith(('.tsv', COMPACT_TRACK_EXTENSION)):
+                        stat = entry.stat()
+                        parts.append(f"{entry.path}:{stat.st_mtime_ns}:{stat.st_size}")
+                        newest = max(newest, stat.st_mtime)
+        except OSError:
+            parts.append(f"{root['tracks_dir']}:-")
+    parts.sort()
+    return digest_signatures(parts), newest
+
+def recordings_generation():
+    """
+    Return (digest, newest mtime) over the recordings of all data roots.
+
+    Every .mp4 file contributes its mtime and size, so a recording that grows
+    or is finalized in place changes the digest as well as added and removed
+    ones.
+    """
+    parts = []
+    newest = 0
+    for root in DATA_ROOTS:
+        if root['stalled']:
+            parts.append(f"{root['name']}:stalled")
+            continue
+        for _, _, _, path, stat in scan_recording_dirs(root['recordings_dir']):
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+            newest = max(newest, stat.st_mtime)
+    parts.sort()
+    if warmup_partial():
+        parts.append('warmup:partial')  # Video durations are still being probed
+    return digest_signatures(parts), newest
+
+def track_validators(track_id, include_recordings=False, variant=''):
+    """
+    Build the ETag and Last-Modified time of a track resource.
+
+    variant distinguishes representations of the same track (e.g. export formats).
+
+    Returns:
+        tuple: (etag, last modified timestamp), or None when the track has no files
+    """
+    files = resolve_track_files(track_id)
+    if not files:
+        return None
+    parts = [APP_GENERATION, variant] + [f"{path}:{stat.st_mtime_ns}:{stat.st_size}" for path, stat in files]
+    last_modified = max(stat.st_mtime for _, stat in files)
+    if include_recordings:
+        recordings_digest, recordings_modified = recordings_generation()
+        parts.append(recordings_digest)
+        last_modified = max(last_modified, recordings_modified)
+    return digest_signatures(parts), max(last_modified, APP_STARTED)
+
+def not_modified_response(etag, last_modified):
+    """Return a 304 response when the request's validators match, otherwise None"""
+    if request.if_none_match:
+        matched = request.if_none_match.contains(etag)
+    elif request.if_modified_since:
+        matched = int(last_modified) <= request.if_modified_since.timestamp()
+    else:
+        matched = False
+    if not matched:
+        return None
+    response = Response(status=304)
+    return cache_validated(response, etag, last_modified)
+
+def cache_validated(response, etag, last_modified):
+    """Attach the ETag, Last-Modified and Cache-Control headers to a response"""
+    if not isinstance(response, Response):
+        response = app.make_response(response)
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+    response.headers['Cache-Control'] = HTTP_CACHE_CONTROL
+    return response
+
+# Rendered page cache
+# The index and viewer pages are cached as rendered bytes under their ETag,
+# which already covers everything they show (track file signatures, the
+# recordings generation with every recording's mtime and size, the app
+# generation). Entries are evicted least
+# recently used first once PAGE_CACHE_MAX_ENTRIES or PAGE_CACHE_MAX_BYTES is
+# exceeded; a repeat view of an unchanged track costs no rendering at all.
+PAGE_CACHE_MAX_BYTES = max(0, args.page_cache_mb) * 1024 * 1024
+PAGE_CACHE_MAX_ENTRIES = 256
+
+page_cache = OrderedDict()
+page_cache_bytes = 0
+page_cache_stats = Counter()
+page_cache_lock = threading.Lock()
+
+def get_cached_page(page, key):
+    """Return the cached rendering of a page, or None"""
+    if not PAGE_CACHE_MAX_BYTES:
+        return None
+    with page_cache_lock:
+        body = page_cache.get((page, key))
+        if body is not None:
+            page_cache.move_to_end((page, key))
+        result = 'hit' if body is not None else 'miss'
+        page_cache_stats[(page, result)] += 1
+    if METRICS_ENABLED:
+        metrics_inc('page_cache_requests_total', page=page, result=result)
+    return body
+
+def store_cached_page(page, key, html):
+    """Cache a rendered page, evicting least recently used pages beyond the limits"""
+    global page_cache_bytes
+    body = html.encode('utf-8')
+    if not PAGE_CACHE_MAX_BYTES or len(body) > PAGE_CACHE_MAX_BYTES // 4:
+        return body
+    with page_cache_lock:
+        previous = page_cache.pop((page, key), None)
+        if previous is not None:
+            page_cache_bytes -= len(previous)
+        page_cache[(page, key)] = body
+        page_cache_bytes += len(body)
+        while page_cache and (page_cache_bytes > PAGE_CACHE_MAX_BYTES or len(page_cache) > PAGE_CACHE_MAX_ENTRIES):
+            _, evicted = page_cache.popitem(last=False)
+            page_cache_bytes -= len(evicted)
+    return body
+
+def html_response(body):
+    """Wrap rendered page bytes in an HTML response"""
+    return Response(body, mimetype='text/html')
+
+@app.route('/api/page-cache')
+def page_cache_status():
+    """API endpoint reporting the rendered page cache size and hit/miss rates"""
+    with page_cache_lock:
+        stats = dict(page_cache_stats)
+        pages = {}
+        for (page, _), body in page_cache.items():
+            pages.setdefault(page, {'entries': 0, 'bytes': 0})
+            pages[page]['entries'] += 1
+            pages[page]['bytes'] += len(body)
+        total_bytes = page_cache_bytes
+
+    for page in {page for page, _ in stats} | set(pages):
+        hits = stats.get((page, 'hit'), 0)
+        misses = stats.get((page, 'miss'), 0)
+        pages.setdefault(page, {'entries': 0, 'bytes': 0})
+        pages[page].update({
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None
+        })
+    return jsonify({
+        'enabled': bool(PAGE_CACHE_MAX_BYTES),
+        'bytes': total_bytes,
+        'max_bytes': PAGE_CACHE_MAX_BYTES,
+        'max_entries': PAGE_CACHE_MAX_ENTRIES,
+        'pages': pages
+    })
+
+@app.route('/api/status')
+def api_status():
+    """Readiness endpoint: startup warm-up phase and progress; 503 until the warm-up has finished"""
+    state = warmup_status()
+    state['message'] = warmup_message(state)
+    return jsonify(state), 200 if state['ready'] else 503
+
+@app.route('/api/coalescing')
+def coalescing_status():
+    """API endpoint reporting how many catalog scans and track loads ran or joined one in flight"""
+    with inflight_lock:
+        stats = dict(coalesce_stats)
+        in_flight = Counter(key[0] for key in inflight_calls)
+
+    kinds = {}
+    for kind in sorted({kind for kind, _ in stats} | set(in_flight)):
+        run = stats.get((kind, 'run'), 0)
+        joined = stats.get((kind, 'joined'), 0)
+        kinds[kind] = {
+            'run': run,
+            'joined': joined,
+            'in_flight': in_flight.get(kind, 0),
+            'coalesced_rate': round(joined / (run + joined), 4) if run + joined else None
+        }
+    return jsonify({'kinds': kinds})
+
 @app.route('/')
 def index():
     """Main page - Track and Video Viewer"""
-    tracks = get_track_files()
-    videos = get_video_files()
+    digest, newest = tracks_generation()
+    recordings_digest, recordings_modified = recordings_generation()
+    etag = digest_signatures([APP_GENERATION, digest, recordings_digest])
+    last_modified = max(newest, recordings_modified, APP_STARTED)
+    cached = not_modified_response(etag, last_modified)
+    if cached is not None:
+        return cached
+    body = get_cached_page('index', etag)
+    if body is not None:
+        return cache_validated(html_response(body), etag, last_modified)
+
+    tracks = [track.to_dict() for track in get_track_files()]
+    videos = [video.to_dict() for video in get_video_files()]
     
-    return render_template('index.html', 
+    page = render_template('index.html', 
                          tracks=tracks,
                          videos=videos)
+    return cache_validated(html_response(store_cached_page('index', etag, page)), etag, last_modified)
 
 @app.route('/view/<track_id>')
 def view_track(track_id):
     """View specific track with synchronized multi-video playback"""
+    validators = track_validators(track_id, include_recordings=True)
+    if validators:
+        cached = not_modified_response(*validators)
+        if cached is not None:
+            return cached
+        body = get_cached_page('view', (track_id, validators[0]))
+        if body is not None:
+            return cache_validated(html_response(body), *validators)
+
     tracks = get_track_files()
     videos = get_video_files()
     
@@ -544,7 +3662,11 @@ def view_track(track_id):
         return "Track not found", 404
     
     # Load track coordinates
-    coordinates = load_track_data(track['filepath'])
+    try:
+        coordinates, offset = load_track_tail(track['filepath'])
+    except Exception as e:
+        print(f"Error loading track data: {e}")
+        coordinates, offset = [], 0
     
     if not coordinates:
         return "No coordinate data found in track", 404
@@ -552,14 +3674,24 @@ def view_track(track_id):
     # Find all matching videos for this track
     videos_for_track = find_all_related_videos(track['start_time'], track['end_time'], videos)
     
-    return render_template('viewer.html',
-                         track=track,
+    page = render_template('viewer.html',
+                         track=track.to_dict(),
                          coordinates=coordinates,
-                         videos=videos_for_track)
+                         offset=offset,
+                         videos=[video.to_dict() for video in videos_for_track])
+    if not validators:
+        return page
+    return cache_validated(html_response(store_cached_page('view', (track_id, validators[0]), page)), *validators)
 
 @app.route('/api/track/<track_id>')
 def api_track_data(track_id):
     """API endpoint to get track data as JSON"""
+    validators = track_validators(track_id)
+    if validators:
+        cached = not_modified_response(*validators)
+        if cached is not None:
+            return cached
+
     tracks = get_track_files()
     
     # Find the requested track
@@ -570,26 +3702,557 @@ def api_track_data(track_id):
             break
     
     if not track:
-        return jsonify({'error': 'Track not found'}), 404
-    
-    # Load track coordinates
-    coordinates = load_track_data(track['filepath'])
-    
-    return jsonify({
-        'track': track,
-        'coordinates': coordinates
-    })
+        return jsonify({'error': 'Track not found'}), 404
+    
+    # Load track coordinates
+    try:
+        coordinates, offset = load_track_tail(track['filepath'])
+    except Exception as e:
+        print(f"Error loading track data: {e}")
+        coordinates, offset = [], 0
+    
+    response = jsonify({
+        'track': track.to_dict(),
+        'coordinates': coordinates,
+        'offset': offset  # Resume point for /api/track/<track_id>/follow
+    })
+    return cache_validated(response, *validators) if validators else response
+
+# Profile charts
+# /api/track/<track_id>/profile reduces one column (speed, altitude, ...) to the
+# first, minimum, maximum and last value of every time bucket, one bucket per
+# horizontal pixel of the chart (M4 aggregation). Drawn as a line at that width
+# the reduced series is pixel-identical to drawing every point, and it is at
+# most 4 x width points however long the track is. Only the timestamp and the
+# requested column are read (compact tracks decode just those two columns).
+PROFILE_FIELDS = ('altitude', 'accuracy', 'altitudeAccuracy', 'heading', 'speed')
+PROFILE_DEFAULT_WIDTH = 1000
+PROFILE_MAX_WIDTH = 8000
+PROFILE_CACHE_SIZE = 64
+
+profile_cache = OrderedDict()
+profile_cache_lock = threading.Lock()
+
+def select_track_file(files):
+    """Pick the file to read from resolve_track_files() output, as list_track_sources() would"""
+    tsv = next(((path, stat) for path, stat in files if path.endswith('.tsv')), None)
+    compact = next(((path, stat) for path, stat in files if is_compact_track(path)), None)
+    if compact is not None:
+        try:
+            if tsv is None or compact_track_is_current(read_compact_header(*compact), tsv[1]):
+                return compact
+        except (OSError, ValueError) as e:
+            print(f"Error reading compact track {compact[0]}: {e}")
+    return tsv
+
+def read_track_column(track_file, field):
+    """Read the timestamps and values of one track column, skipping points without a value"""
+    timestamps = array('q')
+    values = array('d')
+    if is_compact_track(track_file):
+        for block_timestamps, block_values in iter_compact_blocks(track_file, ('timestamp', field)):
+            for timestamp, value in zip(block_timestamps, block_values):
+                if value is not None:
+                    timestamps.append(timestamp)
+                    values.append(value)
+        return timestamps, values
+
+    index = COMPACT_COLUMNS.index(field)
+    with open(track_file, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            parts = line.rstrip('\r\n').split('\t')
+            if len(parts) <= index or not parts[index]:
+                continue
+            try:
+                timestamp = int(parts[0])
+                value = float(parts[index])
+            except ValueError:
+                continue  # Header, comment or malformed line
+            timestamps.append(timestamp)
+            values.append(value)
+    return timestamps, values
+
+def m4_aggregate(timestamps, values, width, start, end):
+    """
+    Reduce a series to the first, min, max and last point of each of width time buckets.
+
+    Returns:
+        tuple: (timestamps, values) of the kept points in their original order
+    """
+    span = end - start + 1
+    first = [-1] * width
+    last = [-1] * width
+    lowest = [-1] * width
+    highest = [-1] * width
+    for i, timestamp in enumerate(timestamps):
+        if timestamp < start or timestamp > end:
+            continue
+        bucket = (timestamp - start) * width // span
+        if first[bucket] < 0:
+            first[bucket] = lowest[bucket] = highest[bucket] = i
+        else:
+            # Ties move the maximum forward, so flat runs collapse to two points
+            value = values[i]
+            if value < values[lowest[bucket]]:
+                lowest[bucket] = i
+            elif value >= values[highest[bucket]]:
+                highest[bucket] = i
+        last[bucket] = i
+
+    kept = []
+    for bucket in range(width):
+        if first[bucket] >= 0:
+            kept.extend(sorted({first[bucket], lowest[bucket], highest[bucket], last[bucket]}))
+    return [timestamps[i] for i in kept], [values[i] for i in kept]
+
+def get_track_profile(track_file, track_stat, field, width, start=None, end=None):
+    """Return the M4 profile of one track column, cached per file state, field, width and range"""
+    key = (track_file, track_stat.st_mtime_ns, track_stat.st_size, field, width, start, end)
+    with profile_cache_lock:
+        profile = profile_cache.get(key)
+        if profile is not None:
+            profile_cache.move_to_end(key)
+            return profile
+
+    timestamps, values = read_track_column(track_file, field)
+    if start is None:
+        start = timestamps[0] if timestamps else 0
+    if end is None:
+        end = max(timestamps[-1], start) if timestamps else 0
+    times, kept = m4_aggregate(timestamps, values, width, start, end) if end >= start else ([], [])
+    profile = {
+        'field': field,
+        'width': width,
+        'start': start,
+        'end': end,
+        'source_points': len(timestamps),
+        'time': [timestamp - start for timestamp in times],  # Offsets from start keep the JSON small
+        'value': kept
+    }
+
+    with profile_cache_lock:
+        profile_cache[key] = profile
+        while len(profile_cache) > PROFILE_CACHE_SIZE:
+            profile_cache.popitem(last=False)
+    return profile
+
+@app.route('/api/track/<track_id>/profile')
+def api_track_profile(track_id):
+    """
+    API endpoint returning a chart-ready profile of one track column.
+
+    Query parameters: field (altitude, accuracy, altitudeAccuracy, heading or
+    speed; default speed), width (chart width in pixels) and optional
+    start/end timestamps to zoom in on part of the track.
+    """
+    field = request.args.get('field', 'speed')
+    if field not in PROFILE_FIELDS:
+        return jsonify({'error': f"field must be one of: {', '.join(PROFILE_FIELDS)}"}), 400
+    width = request.args.get('width', PROFILE_DEFAULT_WIDTH, type=int)
+    if width < 1 or width > PROFILE_MAX_WIDTH:
+        return jsonify({'error': f'width must be between 1 and {PROFILE_MAX_WIDTH}'}), 400
+    start = request.args.get('start', type=int)
+    end = request.args.get('end', type=int)
+
+    files = resolve_track_files(track_id)
+    source = select_track_file(files)
+    if source is None:
+        return jsonify({'error': 'Track not found'}), 404
+
+    validators = track_validators(track_id, variant=f'profile:{field}:{width}:{start}:{end}')
+    cached = not_modified_response(*validators)
+    if cached is not None:
+        return cached
+
+    try:
+        profile = get_track_profile(source[0], source[1], field, width, start, end)
+    except (OSError, ValueError) as e:
+        return jsonify({'error': f'Failed to read track: {e}'}), 500
+    return cache_validated(jsonify(dict(profile, track_id=track_id)), *validators)
+
+def parse_export_tolerance():
+    """Read the optional ?tolerance=<metres> simplification parameter"""
+    tolerance = request.args.get('tolerance', type=float)
+    if tolerance is not None and (tolerance < 0 or math.isnan(tolerance)):
+        raise ValueError('tolerance must be a positive number of metres')
+    return tolerance
+
+@app.route('/api/track/<track_id>.<any(gpx, kml, geojson):export_format>')
+def export_track(track_id, export_format):
+    """Download a track as GPX, KML or GeoJSON, optionally simplified with ?tolerance=<metres>"""
+    try:
+        tolerance = parse_export_tolerance()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Each tolerance yields a different document, so it is part of the ETag
+    validators = track_validators(track_id, variant=f"{export_format}:{tolerance}")
+    if validators:
+        cached = not_modified_response(*validators)
+        if cached is not None:
+            return cached
+
+    track = next((t for t in get_track_files() if t['track_id'] == track_id), None)
+    if not track:
+        return jsonify({'error': 'Track not found'}), 404
+
+    filename = f"{secure_filename(track_id.replace(':', '_')) or 'track'}.{export_format}"
+    response = Response(
+        iter_track_export(track, export_format, tolerance),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+    return cache_validated(response, *validators) if validators else response
+
+@app.route('/api/tracks/export.zip')
+def export_tracks_zip():
+    """
+    Download several tracks as one ZIP archive.
+
+    Query parameters: format (gpx, kml or geojson; default gpx), ids
+    (comma-separated track IDs; default all tracks) and tolerance (metres).
+    """
+    export_format = request.args.get('format', 'gpx')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        tolerance = parse_export_tolerance()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    tracks = get_track_files()
+    ids = request.args.get('ids')
+    if ids:
+        wanted = [track_id for track_id in ids.split(',') if track_id]
+        tracks_by_id = {t['track_id']: t for t in tracks}
+        missing = [track_id for track_id in wanted if track_id not in tracks_by_id]
+        if missing:
+            return jsonify({'error': f"Tracks not found: {', '.join(missing)}"}), 404
+        tracks = [tracks_by_id[track_id] for track_id in wanted]
+    if not tracks:
+        return jsonify({'error': 'No tracks to export'}), 404
+
+    return Response(
+        iter_tracks_zip(tracks, export_format, tolerance),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="tracks-{export_format}.zip"'}
+    )
+
+@app.route('/api/track/<track_id>/follow')
+def follow_track(track_id):
+    """
+    SSE endpoint pushing the points appended to a track while it is recorded.
+
+    Streaming starts at ?offset= (the 'offset' returned by /api/track/<track_id>),
+    at the Last-Event-ID of a reconnecting client, or else at the current end of
+    the track. Every update reads only the bytes appended since the last one.
+    """
+    track = next((t for t in get_track_files() if t['track_id'] == track_id), None)
+    if not track:
+        return jsonify({'error': 'Track not found'}), 404
+    track_file = next((path for path in track['files'] if path.endswith('.tsv')), None)
+    if track_file is None:
+        return jsonify({'error': 'Track has been archived in compact format and cannot be followed'}), 404
+
+    offset = request.headers.get('Last-Event-ID') or request.args.get('offset')
+    try:
+        offset = int(offset) if offset is not None else load_track_tail(track_file)[1]
+    except (ValueError, OSError):
+        return jsonify({'error': 'Invalid offset'}), 400
+    if offset < 0:
+        return jsonify({'error': 'Invalid offset'}), 400
+
+    def generate(offset):
+        if METRICS_ENABLED:
+            metrics_inc('sse_streams_active', 1)
+        try:
+            inode = os.stat(track_file).st_ino
+            yield f"data: {json.dumps({'type': 'connected', 'track_id': track_id, 'offset': offset})}\n\n"
+            last_sent = time.monotonic()
+
+            while True:
+                try:
+                    stat = os.stat(track_file)
+                except FileNotFoundError:
+                    yield f"data: {json.dumps({'type': 'closed', 'track_id': track_id})}\n\n"
+                    break
+
+                if stat.st_ino != inode or stat.st_size < offset:
+                    # Track replaced or truncated: the client has to start over
+                    inode = stat.st_ino
+                    offset = 0
+                    yield f"id: 0\ndata: {json.dumps({'type': 'reset', 'track_id': track_id})}\n\n"
+
+                if stat.st_size > offset:
+                    coordinates, new_offset, _ = read_track_lines(track_file, offset)
+                    if new_offset > offset:
+                        offset = new_offset
+                        last_sent = time.monotonic()
+                        if coordinates:
+                            yield (f"id: {offset}\n"
+                                   f"data: {json.dumps({'type': 'points', 'coordinates': coordinates, 'offset': offset})}\n\n")
+
+                if time.monotonic() - last_sent >= FOLLOW_KEEPALIVE_INTERVAL:
+                    last_sent = time.monotonic()
+                    yield ": keepalive\n\n"
+                yield StreamWait(None, None, FOLLOW_POLL_INTERVAL)
+        finally:
+            if METRICS_ENABLED:
+                metrics_inc('sse_streams_active', -1)
+
+    return sse_response(generate(offset))
+
+def get_track_stream(track_id):
+    """Return the stitched stream layout of a track's related videos, or None"""
+    track = next((t for t in get_track_files() if t['track_id'] == track_id), None)
+    if not track:
+        return None
+    videos = find_all_related_videos(track['start_time'], track['end_time'], get_video_files())
+    if not videos:
+        return None
+    return get_stream_layout(track_id, videos)
+
+@app.route('/api/track/<track_id>/stream')
+def api_track_stream(track_id):
+    """API endpoint describing the continuous stream stitched from a track's video segments"""
+    try:
+        layout = get_track_stream(track_id)
+    except Exception as e:
+        return jsonify({'error': f'Failed to build stream: {e}'}), 500
+
+    if layout is None:
+        return jsonify({'error': 'No video segments found for track'}), 404
+
+    manifest = dict(layout['manifest'])
+    manifest['url'] = f"/stream/{track_id}.mp4"
+    manifest['size'] = layout['size']
+    return jsonify(manifest)
+
+@app.route('/stream/<track_id>.mp4')
+def serve_track_stream(track_id):
+    """Serve all related video segments of a track as one seekable fragmented MP4"""
+    try:
+        layout = get_track_stream(track_id)
+    except Exception as e:
+        print(f"Error building stream for track {track_id}: {e}")
+        return "Failed to build stream", 500
+
+    if layout is None:
+        return "Stream not found", 404
+    return serve_virtual_file(layout)
+
+def resolve_video_path(filename):
+    """Map a "[root/]domain/rtmpkey/timestamp.mp4" path onto its recordings directory, or None if it escapes it"""
+    root = DATA_ROOTS[0]
+    if MULTI_ROOT:
+        root_name, _, filename = filename.partition('/')
+        root = DATA_ROOTS_BY_NAME.get(root_name)
+        if root is None:
+            return None
+    recordings_dir = root['recordings_dir']
+    video_path = os.path.normpath(os.path.join(recordings_dir, filename))
+    if video_path.startswith(os.path.join(recordings_dir, '')) and os.path.isfile(video_path):
+        return video_path
+    return None
 
 @app.route('/video/<path:filename>')
 def serve_video(filename):
     """Serve video files from hierarchical directory structure"""
     # Handle paths like "domain/rtmpkey/timestamp.mp4"
-    video_path = os.path.join(RECORDINGS_DIR, filename)
-    if os.path.exists(video_path) and video_path.startswith(RECORDINGS_DIR):
-        return send_file(video_path)
-    else:
+    video_path = resolve_video_path(filename)
+    if not video_path:
         return "Video not found", 404
 
+    # Serve recordings with a trailing moov through a virtual moov-first layout
+    # so playback can start without range-requesting the end of the file
+    try:
+        layout = get_faststart_layout(video_path)
+    except Exception as e:
+        print(f"Error planning faststart layout for {video_path}: {e}")
+        layout = None
+
+    if layout is None:
+        response = send_file(video_path)
+    else:
+        response = serve_virtual_file(layout, last_modified=os.path.getmtime(video_path))
+    if METRICS_ENABLED and response.content_length:
+        metrics_inc('video_bytes_served_total', response.content_length)
+    return response
+
+@app.route('/api/video/<path:filename>/keyframes')
+def api_video_keyframes(filename):
+    """API endpoint to get the keyframe timestamps of a recording for seek snapping"""
+    video_path = resolve_video_path(filename)
+    if not video_path:
+        return jsonify({'error': 'Video not found'}), 404
+
+    try:
+        index = get_keyframe_index(video_path)
+    except Exception as e:
+        return jsonify({'error': f'Failed to parse video: {e}'}), 422
+
+    if index is None:
+        return jsonify({'error': 'No video track found'}), 422
+
+    return jsonify(index)
+
+@app.route('/overview')
+def overview():
+    """Overview map of every recorded track rendered from density tiles"""
+    index = density_snapshot()[0]
+    boxes = [entry['bounds'] for entry in index.values() if entry.get('bounds')]
+    bounds = None
+    if boxes:
+        bounds = [min(b[0] for b in boxes), min(b[1] for b in boxes),
+                  max(b[2] for b in boxes), max(b[3] for b in boxes)]
+    return render_template('overview.html',
+                         bounds=bounds,
+                         track_count=len(index),
+                         max_zoom=DENSITY_MAX_ZOOM)
+
+@app.route('/tiles/density/<int:z>/<int:x>/<int:y>')
+@app.route('/tiles/density/<int:z>/<int:x>/<int:y>.<fmt>')
+def density_tile(z, x, y, fmt='png'):
+    """Serve an aggregated track density tile as PNG or JSON"""
+    if fmt not in ('png', 'json'):
+        return "Unsupported tile format", 404
+    if z > DENSITY_MAX_ZOOM or not (0 <= x < (1 << z)) or not (0 <= y < (1 << z)):
+        return "Tile out of range", 404
+
+    counts, generation = get_density_tile(z, x, y)
+
+    if fmt == 'json':
+        size = DENSITY_TILE_SIZE
+        return jsonify({
+            'z': z,
+            'x': x,
+            'y': y,
+            'size': size,
+            'max': max(counts.values()) if counts else 0,
+            'cells': [[cell % size, cell // size, count] for cell, count in sorted(counts.items())]
+        })
+
+    png_path = os.path.join(DENSITY_CACHE_DIR, str(z), str(x), f"{y}.png")
+    try:
+        with open(png_path, 'rb') as f:
+            png = f.read()
+    except OSError:
+        png = render_density_png(counts)
+        try:
+            write_density_cache(png_path, png, generation)
+        except OSError as e:
+            print(f"Error caching density tile image {z}/{x}/{y}: {e}")
+    return Response(png, mimetype='image/png')
+
+@app.route('/tiles/<int:z>/<int:x>/<int:y>.png')
+def map_tile(z, x, y):
+    """Serve a basemap tile through the on-disk tile cache"""
+    if z > TILE_MAX_ZOOM or not (0 <= x < (1 << z)) or not (0 <= y < (1 << z)):
+        return "Tile out of range", 404
+    try:
+        png, cached = get_map_tile(z, x, y)
+    except LookupError as e:
+        return str(e), 404
+    except requests.RequestException as e:
+        with tile_cache_lock:
+            tile_cache_stats['errors'] += 1
+        return f"Tile server unavailable: {e}", 502
+    response = Response(png, mimetype='image/png')
+    response.headers['Cache-Control'] = f"public, max-age={TILE_BROWSER_MAX_AGE}"
+    response.headers['X-Tile-Cache'] = 'hit' if cached else 'miss'
+    return response
+
+@app.route('/api/tiles')
+def tile_cache_status():
+    """API endpoint reporting the tile cache size and hit/miss counts"""
+    with tile_cache_lock:
+        if tile_cache_index is None:
+            load_tile_cache_index()
+        stats = dict(tile_cache_stats)
+        entries = len(tile_cache_index)
+        total_bytes = tile_cache_bytes
+    hits = stats.get('hits', 0)
+    misses = stats.get('misses', 0)
+    return jsonify({
+        'tile_url': args.tile_url,
+        'enabled': bool(TILE_CACHE_MAX_BYTES),
+        'entries': entries,
+        'bytes': total_bytes,
+        'max_bytes': TILE_CACHE_MAX_BYTES,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        'upstream_requests': stats.get('upstream', 0),
+        'upstream_errors': stats.get('errors', 0),
+        'evicted': stats.get('evicted', 0)
+    })
+
+@app.route('/api/track/<track_id>/prefetch-tiles', methods=['POST'])
+def prefetch_track_tiles(track_id):
+    """Download the basemap tiles covering a track's bounding box at the given zoom levels"""
+    if not TILE_CACHE_MAX_BYTES:
+        return jsonify({'error': 'Tile cache is disabled (--tile-cache-mb 0)'}), 400
+    data = request.get_json(silent=True) or request.form
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        zooms = parse_zoom_levels(data.get('zooms', request.args.get('zooms', '12-16')))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid zoom levels: {e}'}), 400
+
+    entry = refresh_density_index().get(track_id)
+    if entry is None:
+        return jsonify({'error': 'Track not found'}), 404
+    if not entry.get('bounds'):
+        return jsonify({'error': 'Track has no coordinates'}), 404
+
+    tiles = [tile for zoom in zooms for tile in tiles_covering(entry['bounds'], zoom)]
+    if len(tiles) > TILE_PREFETCH_MAX_TILES:
+        return jsonify({'error': f'{len(tiles)} tiles requested, at most {TILE_PREFETCH_MAX_TILES} per prefetch; '
+                                 'choose fewer or lower zoom levels',
+                        'tiles': len(tiles)}), 400
+
+    job_id = str(uuid.uuid4())
+    with tile_prefetch_lock:
+        prune_tile_prefetch_jobs()
+        tile_prefetch_jobs[job_id] = {
+            'job_id': job_id,
+            'track_id': track_id,
+            'zooms': zooms,
+            'status': 'running',
+            'total': len(tiles),
+            'done': 0,
+            'cached': 0,
+            'fetched': 0,
+            'failed': 0,
+            'error': None,
+            'started': time.time(),
+            'finished': None
+        }
+    threading.Thread(target=run_tile_prefetch, args=(job_id, tiles), daemon=True).start()
+    return jsonify(tile_prefetch_jobs[job_id]), 202
+
+@app.route('/api/tiles/prefetch/<job_id>')
+def tile_prefetch_status(job_id):
+    """API endpoint reporting the progress of a tile prefetch job"""
+    with tile_prefetch_lock:
+        prune_tile_prefetch_jobs()
+        job = tile_prefetch_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Prefetch job not found'}), 404
+        return jsonify(dict(job))
+
+@app.route('/assets/leaflet/<path:filename>')
+def leaflet_asset(filename):
+    """Serve a Leaflet file from the vendored copy or the asset cache"""
+    if filename not in LEAFLET_ASSETS:
+        return "Asset not found", 404
+    try:
+        path = leaflet_asset_path(filename)
+    except requests.RequestException as e:
+        return f"Asset not available offline and could not be downloaded: {e}", 502
+    return send_file(path, max_age=TILE_BROWSER_MAX_AGE)
+
 @app.route('/delete-track', methods=['POST'])
 def delete_track():
     """Delete a track and its corresponding video file"""
@@ -611,13 +4274,14 @@ def delete_track():
         if not track:
             return jsonify({'error': 'Track not found'}), 404
         
-        # Delete the track file
+        # Delete the track file (TSV and compact copy)
         track_deleted = False
-        if os.path.exists(track['filepath']):
-            if safe_remove_file(track['filepath']):
-                track_deleted = True
-            else:
-                return jsonify({'error': 'Failed to delete track file'}), 500
+        for track_file in track.get('files', [track['filepath']]):
+            if os.path.exists(track_file):
+                if safe_remove_file(track_file):
+                    track_deleted = True
+                else:
+                    return jsonify({'error': 'Failed to delete track file'}), 500
         
         # Find and delete all corresponding videos
         videos = get_video_files()
@@ -668,10 +4332,182 @@ def delete_track():
     except Exception as e:
         return jsonify({'error': f'Failed to delete track: {str(e)}'}), 500
 
+# Upload manifest
+# Every successful upload is recorded in <data root>/upload_manifest.json with
+# the file's size, mtime and SHA-256 content hash. The hash is computed from
+# the bytes as they are streamed to the server, so the file is still read only
+# once. A recording whose size and mtime match its manifest entry for the same
+# domain/rtmpkey is reported as already uploaded instead of being sent again.
+# Entries also carry a fingerprint of the size and the first and last
+# UPLOAD_FINGERPRINT_BYTES, so a touched or renamed copy of an uploaded file is
+# recognised before an upload by reading those few bytes only.
+UPLOAD_MANIFEST_VERSION = 1
+UPLOAD_FINGERPRINT_BYTES = 64 * 1024
+
+upload_manifests = {}
+upload_content_indexes = {}  # root name -> {"domain/rtmpkey": {(field, value): manifest key}}
+upload_manifest_lock = threading.Lock()
+
+class HashingFileReader:
+    """File wrapper that hashes every byte read through it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.hash = hashlib.sha256()
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.hash.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def fileno(self):
+        return self.f.fileno()
+
+    def tell(self):
+        return self.f.tell()
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+def load_upload_manifest(root):
+    """Return the upload manifest entries of a data root, reading the file once"""
+    entries = upload_manifests.get(root['name'])
+    if entries is not None:
+        return entries
+    entries = {}
+    try:
+        with open(root['upload_manifest_file'], 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == UPLOAD_MANIFEST_VERSION:
+            entries = manifest.get('uploads', {})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable upload manifest {root['upload_manifest_file']}: {e}")
+    index = {}
+    for key, entry in sorted(entries.items()):
+        content = index.setdefault(key.rsplit('/', 1)[0], {})
+        for field in ('sha256', 'fingerprint'):
+            if entry.get(field):
+                content.setdefault((field, entry[field]), key)
+    upload_manifests[root['name']] = entries
+    upload_content_indexes[root['name']] = index
+    return entries
+
+def recording_fingerprint(path, size):
+    """Hash the size and the first and last UPLOAD_FINGERPRINT_BYTES of a recording"""
+    digest = hashlib.sha256(str(size).encode('ascii'))
+    with open(path, 'rb') as f:
+        digest.update(f.read(UPLOAD_FINGERPRINT_BYTES))
+        if size > UPLOAD_FINGERPRINT_BYTES:
+            f.seek(max(UPLOAD_FINGERPRINT_BYTES, size - UPLOAD_FINGERPRINT_BYTES))
+            digest.update(f.read(UPLOAD_FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+def find_content_key(entries, index, field, value):
+    """Manifest key whose entry still has field == value, or None (call with upload_manifest_lock held)"""
+    key = index.get((field, value))
+    if key is not None and entries.get(key, {}).get(field) == value:
+        return key
+    return None
+
+def find_uploaded_recording(root, domain, rtmpkey, filename, size, mtime_ns, path=None):
+    """
+    Return the manifest entry of an already uploaded recording, or None.
+
+    A recording whose size and mtime match its own entry is unchanged. Given
+    its path, a recording that does not match is fingerprinted and compared
+    with the uploads to the same domain/rtmpkey; on a match the entry of that
+    upload is returned with 'duplicate_of' set to its key.
+    """
+    prefix = f"{domain}/{rtmpkey}"
+    with upload_manifest_lock:
+        entries = load_upload_manifest(root)
+        entry = entries.get(f"{prefix}/{filename}")
+        if entry and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+            return entry
+        if path is None or not upload_content_indexes[root['name']].get(prefix):
+            return None
+
+    try:
+        fingerprint = recording_fingerprint(path, size)
+    except OSError as e:
+        print(f"Warning: could not fingerprint {path}: {e}")
+        return None
+    with upload_manifest_lock:
+        entries = load_upload_manifest(root)
+        key = find_content_key(entries, upload_content_indexes[root['name']].get(prefix, {}),
+                               'fingerprint', fingerprint)
+        if key is None or entries[key]['size'] != size:
+            return None
+        return dict(entries[key], duplicate_of=key)
+
+def record_uploaded_recording(root, domain, rtmpkey, filename, stat, sha256, fingerprint):
+    """Add a finished upload to the data root's manifest"""
+    entry = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256,
+        'fingerprint': fingerprint,
+        'uploaded_at': int(time.time())
+    }
+    with upload_manifest_lock:
+        entries = load_upload_manifest(root)
+        manifest_key = f"{domain}/{rtmpkey}/{filename}"
+        index = upload_content_indexes[root['name']].setdefault(f"{domain}/{rtmpkey}", {})
+        other = find_content_key(entries, index, 'sha256', sha256)
+        if other is not None and other != manifest_key:
+            # Same content sent under another name to the same rtmpkey
+            entry['duplicate_of'] = other
+        entries[manifest_key] = entry
+        for field in ('sha256', 'fingerprint'):
+            if find_content_key(entries, index, field, entry[field]) is None:
+                index[(field, entry[field])] = manifest_key
+        manifest_file = root['upload_manifest_file']
+        temp_file = f"{manifest_file}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': UPLOAD_MANIFEST_VERSION, 'uploads': entries}, f, indent=1, sort_keys=True)
+            os.replace(temp_file, manifest_file)
+        except OSError as e:
+            print(f"Warning: could not save upload manifest {manifest_file}: {e}")
+    return entry
+
+def parse_recording_destination(file_path):
+    """
+    Extract (domain, rtmpkey) from a recording path.
+
+    Expected format: .../recordings/webcam/<domain>/<rtmpkey>/<filename>
+
+    Raises:
+        ValueError: If the path does not follow that layout
+    """
+    path_parts = file_path.replace('\\', '/').split('/')
+    if 'webcam' not in path_parts:
+        raise ValueError('Invalid file path format. Expected: .../recordings/webcam/<domain>/<rtmpkey>/<filename>')
+    webcam_idx = path_parts.index('webcam')
+    if webcam_idx + 2 >= len(path_parts):
+        raise ValueError('Invalid file path format. Expected: .../recordings/webcam/<domain>/<rtmpkey>/<filename>')
+    domain = path_parts[webcam_idx + 1]
+    rtmpkey = path_parts[webcam_idx + 2]
+    if not domain or not rtmpkey:
+        raise ValueError('Could not extract domain and rtmpkey from file path.')
+    return domain, rtmpkey
+
+def recording_upload_url(domain, rtmpkey):
+    """Server endpoint that replaces the recordings of a domain/rtmpkey (see --upload-url)"""
+    return args.upload_url.format(domain=domain, rtmpkey=rtmpkey)
+
 @app.route('/uploader')
 def uploader():
     """Recording upload page - Upload recordings to server"""
-    recording_files = get_recording_files()
+    recording_files = [recording.to_dict() for recording in get_recording_files()]
+    for file in recording_files:
+        file['uploaded'] = find_uploaded_recording(
+            DATA_ROOTS_BY_NAME[file['root']], file['domain'], file['rtmpkey'],
+            os.path.basename(file['path']), file['size'], file['mtime_ns'])
     return render_template('uploader.html', 
                          recording_files=recording_files,
                          uploadrecordingsonly=True)
@@ -687,32 +4523,25 @@ def upload_recording():
         return jsonify({'error': 'Recording file not found.'}), 400
     
     # Extract domain and rtmpkey from hierarchical file path
-    # Expected format: .../recordings/webcam/<domain>/<rtmpkey>/<filename>
     try:
-        # Get the relative path from the recordings/webcam directory
-        path_parts = file_path.replace('\\', '/').split('/')
-        
-        # Find the webcam directory and extract domain/rtmpkey from the path after it
-        webcam_idx = -1
-        for i, part in enumerate(path_parts):
-            if part == 'webcam':
-                webcam_idx = i
-                break
-        
-        if webcam_idx == -1 or webcam_idx + 2 >= len(path_parts):
-            return jsonify({'error': 'Invalid file path format. Expected: .../recordings/webcam/<domain>/<rtmpkey>/<filename>'}), 400
-        
-        domain = path_parts[webcam_idx + 1]
-        rtmpkey = path_parts[webcam_idx + 2]
-        
-        if not domain or not rtmpkey:
-            return jsonify({'error': 'Could not extract domain and rtmpkey from file path.'}), 400
-        
-        # Construct upload URL dynamically
-        upload_url = f"https://{domain}.org/ajaxservices.php?command=replacerecordings&rtmpkey={rtmpkey}"
-        
-    except Exception as e:
-        return jsonify({'error': f'Failed to parse file path: {e}'}), 400
+        domain, rtmpkey = parse_recording_destination(file_path)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    upload_url = recording_upload_url(domain, rtmpkey)
+
+    # Skip recordings that already went to this domain/rtmpkey unchanged,
+    # unless the client confirmed the re-upload with force=1
+    root = data_root_for_path(os.path.abspath(file_path))
+    filename = os.path.basename(file_path)
+    file_stat = os.stat(file_path)
+    uploaded = find_uploaded_recording(root, domain, rtmpkey, filename, file_stat.st_size, file_stat.st_mtime_ns,
+                                       path=file_path)
+    if uploaded and request.form.get('force') != '1':
+        return jsonify({
+            'error': f'Already uploaded to {domain}/{rtmpkey}',
+            'duplicate': True,
+            'uploaded': uploaded
+        }), 409
     
     # Generate unique upload ID for progress tracking
     upload_id = str(uuid.uuid4())
@@ -727,8 +4556,11 @@ def upload_recording():
     }
     
     def upload_file_async():
+        upload_started = time.perf_counter()
+        bytes_reported = [0]
         try:
             upload_progress[upload_id]['status'] = 'uploading'
+            stream_events.notify(upload_id)
             
             # Get file size for progress calculation
             file_size = os.path.getsize(file_path)
@@ -738,22 +4570,21 @@ def upload_recording():
                     # Cancel the upload by raising an exception
                     raise Exception("Upload cancelled by user")
                 
-                progress = min(100, int((monitor.bytes_read / file_size) * 100))
-                upload_progress[upload_id]['progress'] = progress
+                progress = min(100, int((monitor.bytes_read / file_size) * 100)) if file_size else 100
+                if METRICS_ENABLED:
+                    metrics_inc('upload_bytes_total', monitor.bytes_read - bytes_reported[0])
+                    bytes_reported[0] = monitor.bytes_read
                 
-                # Notify all SSE clients about the progress
-                for client_id, client_data in upload_sse_clients.items():
-                    if client_data['upload_id'] == upload_id:
-                        try:
-                            # Send progress update to SSE client
-                            client_data['queue'].put({'progress': progress})
-                        except Exception:
-                            pass  # Ignore errors in notifying clients
+                # Wake the progress streams once per percent
+                if progress != upload_progress[upload_id]['progress']:
+                    upload_progress[upload_id]['progress'] = progress
+                    stream_events.notify(upload_id)
             
             # Use MultipartEncoder for upload with progress monitoring
             with open(file_path, 'rb') as f:
+                reader = HashingFileReader(f)
                 multipart_data = MultipartEncoder(
-                    fields={'video': (secure_filename(os.path.basename(file_path)), f, 'application/octet-stream')}
+                    fields={'video': (secure_filename(os.path.basename(file_path)), reader, 'application/octet-stream')}
                 )
                 
                 monitor = MultipartEncoderMonitor(multipart_data, progress_callback)
@@ -772,6 +4603,14 @@ def upload_recording():
                         result = {'success': True, 'message': 'Upload completed', 'error': ''}
                 else:
                     result = {'error': f'Upload failed: {response.status_code}'}
+
+                # Only a complete read of an unchanged file gives the file's hash
+                if isinstance(result, dict) and not result.get('error') and reader.bytes_read == file_stat.st_size:
+                    current_stat = os.stat(file_path)
+                    if (current_stat.st_size, current_stat.st_mtime_ns) == (file_stat.st_size, file_stat.st_mtime_ns):
+                        result['manifest'] = record_uploaded_recording(
+                            root, domain, rtmpkey, filename, file_stat, reader.hexdigest(),
+                            recording_fingerprint(file_path, file_stat.st_size))
                 
                 upload_progress[upload_id]['status'] = 'completed'
                 upload_progress[upload_id]['progress'] = 100
@@ -785,6 +4624,10 @@ def upload_recording():
                 upload_progress[upload_id]['status'] = 'error'
                 upload_progress[upload_id]['error'] = f'Upload failed: {e}'
         finally:
+            if METRICS_ENABLED:
+                metrics_observe('upload_duration_seconds', time.perf_counter() - upload_started)
+                metrics_inc('uploads_total', status=upload_progress[upload_id]['status'])
+            stream_events.notify(upload_id)
             # Clean up thread reference
             if upload_id in upload_threads:
                 del upload_threads[upload_id]
@@ -799,6 +4642,320 @@ def upload_recording():
     
     return jsonify({'upload_id': upload_id, 'status': 'started'})
 
+# Batch uploads
+# A batch job uploads a whole rtmpkey directory or a selection one file at a
+# time. A reader thread streams the files from disk into a bounded chunk queue
+# while the current file is on the wire, running into the next file as soon as
+# the current one has been read, so disk and network overlap instead of
+# alternating. At most UPLOAD_READ_AHEAD_CHUNKS chunks are buffered.
+UPLOAD_READ_CHUNK_SIZE = 1024 * 1024
+UPLOAD_READ_AHEAD_CHUNKS = 32
+
+class ReadAheadFile:
+    """File-like view of one file's chunks in a batch read-ahead queue, hashing what it returns"""
+
+    def __init__(self, chunks, index, size):
+        self.chunks = chunks
+        self.index = index
+        self.unread = size
+        self.buffer = b''
+        self.position = 0
+        self.finished = False
+        self.hash = hashlib.sha256()
+        self.bytes_read = 0
+
+    @property
+    def len(self):
+        # Bytes still to be returned, as MultipartEncoder expects
+        return self.unread
+
+    def next_chunk(self):
+        index, data = self.chunks.get()
+        if index != self.index:
+            raise RuntimeError(f'read-ahead queue out of step: got file {index}, expected {self.index}')
+        if isinstance(data, Exception):
+            self.finished = True
+            raise data
+        if data is None:
+            self.finished = True
+            return b''
+        return data
+
+    def read(self, size=-1):
+        # Short reads are fine for MultipartEncoder, so never join chunks
+        if self.position >= len(self.buffer):
+            if self.finished:
+                return b''
+            self.buffer, self.position = self.next_chunk(), 0
+        end = len(self.buffer) if size < 0 else self.position + size
+        data = self.buffer[self.position:end]
+        self.position += len(data)
+        self.hash.update(data)
+        self.bytes_read += len(data)
+        self.unread -= len(data)
+        return data
+
+    def drain(self):
+        """Discard the rest of this file's chunks so the next file can be read"""
+        while not self.finished:
+            try:
+                self.next_chunk()
+            except OSError:
+                pass  # Already reported as this file's upload error
+        self.buffer, self.position = b'', 0
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+def read_ahead_batch(job, chunks, stop):
+    """Reader thread: queue the chunks of every pending file of a batch job in order"""
+    def put(item):
+        while True:
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if job['cancelled'] or stop.is_set():
+                    return False
+
+    for index, file in enumerate(job['files']):
+        if file['status'] != 'pending':
+            continue
+        try:
+            with open(file['path'], 'rb') as f:
+                remaining = file['size']
+                while remaining > 0:
+                    data = f.read(min(UPLOAD_READ_CHUNK_SIZE, remaining))
+                    if not data:
+                        raise OSError(f"{file['name']} shrank while it was being uploaded")
+                    remaining -= len(data)
+                    if not put((index, data)):
+                        return
+            if not put((index, None)):
+                return
+        except OSError as e:
+            if not put((index, e)):
+                return
+
+def run_upload_batch(job_id):
+    """Upload the files of a batch job one after another, updating its aggregate progress"""
+    job = upload_progress[job_id]
+    chunks = queue.Queue(maxsize=UPLOAD_READ_AHEAD_CHUNKS)
+    stop_reading = threading.Event()
+    reader_thread = threading.Thread(target=read_ahead_batch, args=(job, chunks, stop_reading), daemon=True)
+    reader_thread.start()
+    job['status'] = 'uploading'
+    stream_events.notify(job_id)
+    started = time.perf_counter()
+    bytes_done = 0
+
+    def update_progress(file_bytes):
+        sent = bytes_done + file_bytes
+        elapsed = time.perf_counter() - started
+        progress = min(100, int(sent * 100 / job['total_bytes'])) if job['total_bytes'] else 100
+        job['bytes_sent'] = sent
+        job['bytes_per_second'] = int(sent / elapsed) if elapsed > 0 else 0
+        job['buffered_bytes'] = chunks.qsize() * UPLOAD_READ_CHUNK_SIZE
+        if progress != job['progress']:
+            job['progress'] = progress
+            stream_events.notify(job_id)
+
+    try:
+        for index, file in enumerate(job['files']):
+            if file['status'] != 'pending':
+                continue
+            if job['cancelled']:
+                file['status'] = 'cancelled'
+                continue
+            job['current'] = index
+            file['status'] = 'uploading'
+            stream_events.notify(job_id)
+            file_started = time.perf_counter()
+            reader = ReadAheadFile(chunks, index, file['size'])
+            bytes_reported = [0]
+
+            def progress_callback(monitor):
+                if job['cancelled']:
+                    raise Exception("Upload cancelled by user")
+                file_bytes = min(monitor.bytes_read, file['size'])
+                file['bytes_sent'] = file_bytes
+                update_progress(file_bytes)
+                if METRICS_ENABLED:
+                    metrics_inc('upload_bytes_total', monitor.bytes_read - bytes_reported[0])
+                    bytes_reported[0] = monitor.bytes_read
+
+            try:
+                file_stat = os.stat(file['path'])
+                multipart_data = MultipartEncoder(
+                    fields={'video': (secure_filename(os.path.basename(file['path'])), reader, 'application/octet-stream')}
+                )
+                monitor = MultipartEncoderMonitor(multipart_data, progress_callback)
+                response = requests.post(
+                    recording_upload_url(file['domain'], file['rtmpkey']),
+                    data=monitor,
+                    headers={'Content-Type': monitor.content_type},
+                    timeout=300
+                )
+                if response.status_code == 200:
+                    try:
+                        result = response.json()
+                    except ValueError:
+                        result = {'success': True, 'message': 'Upload completed', 'error': ''}
+                else:
+                    result = {'error': f'Upload failed: {response.status_code}'}
+
+                if isinstance(result, dict) and result.get('error'):
+                    file['status'] = 'error'
+                    file['error'] = result['error']
+                else:
+                    file['status'] = 'completed'
+                    if reader.bytes_read == file['size']:
+                        current_stat = os.stat(file['path'])
+                        if (current_stat.st_size, current_stat.st_mtime_ns) == (file_stat.st_size, file_stat.st_mtime_ns):
+                            record_uploaded_recording(data_root_for_path(file['path']), file['domain'], file['rtmpkey'],
+                                                      os.path.basename(file['path']), file_stat, reader.hexdigest(),
+                                                      recording_fingerprint(file['path'], file_stat.st_size))
+                file['result'] = result
+            except Exception as e:
+                if job['cancelled']:
+                    file['status'] = 'cancelled'
+                else:
+                    file['status'] = 'error'
+                    file['error'] = f'Upload failed: {e}'
+            finally:
+                if METRICS_ENABLED:
+                    metrics_observe('upload_duration_seconds', time.perf_counter() - file_started)
+                    metrics_inc('uploads_total', status=file['status'])
+
+            if file['status'] != 'cancelled':
+                reader.drain()
+            bytes_done += file['size']
+            update_progress(0)
+            stream_events.notify(job_id)
+
+        job['current'] = None
+        counts = Counter(file['status'] for file in job['files'])
+        job['result'] = dict(counts)
+        if job['cancelled']:
+            job['status'] = 'cancelled'
+            job['error'] = 'Upload cancelled by user'
+        else:
+            job['status'] = 'completed'
+            job['progress'] = 100
+    except Exception as e:
+        job['status'] = 'error'
+        job['error'] = f'Batch upload failed: {e}'
+    finally:
+        stop_reading.set()
+        job['elapsed'] = round(time.perf_counter() - started, 3)
+        stream_events.notify(job_id)
+        upload_threads.pop(job_id, None)
+
+def batch_upload_files(data):
+    """
+    Resolve the recordings named by a batch upload request.
+
+    Accepts either {"files": [path, ...]} or {"domain": ..., "rtmpkey": ...}
+    with an optional "root" name for the whole rtmpkey directory.
+
+    Raises:
+        ValueError: If the request names no valid recordings
+    """
+    if data.get('files'):
+        paths = data['files']
+    elif data.get('domain') and data.get('rtmpkey'):
+        root = DATA_ROOTS_BY_NAME.get(data.get('root')) or DATA_ROOTS[0]
+        domain, rtmpkey = secure_filename(data['domain']), secure_filename(data['rtmpkey'])
+        rtmpkey_path = os.path.join(root['recordings_dir'], domain, rtmpkey)
+        if not domain or not rtmpkey or not os.path.isdir(rtmpkey_path):
+            raise ValueError(f"Recording directory not found: {domain}/{rtmpkey}")
+        paths = [f[3] for f in sorted(scan_mp4_files((domain, rtmpkey, rtmpkey_path)), key=lambda f: f[2])]
+    else:
+        raise ValueError('Expected "files" or "domain" and "rtmpkey"')
+
+    files = []
+    for path in paths:
+        if not isinstance(path, str) or not os.path.isfile(path):
+            raise ValueError(f'Recording file not found: {path}')
+        domain, rtmpkey = parse_recording_destination(path)
+        files.append({
+            'path': path,
+            'name': os.path.basename(path),
+            'domain': domain,
+            'rtmpkey': rtmpkey,
+            'size': os.path.getsize(path),
+            'status': 'pending',
+            'bytes_sent': 0,
+            'error': None,
+            'result': None,
+            'uploaded': None
+        })
+    if not files:
+        raise ValueError('No recordings to upload')
+    return files
+
+@app.route('/upload-batch', methods=['POST'])
+def upload_batch():
+    """
+    Upload several recordings as one job.
+
+    The job shares the single upload endpoints: its aggregate progress is at
+    /upload-progress/<id> and /upload-progress-stream/<id>, and
+    /cancel-upload/<id> cancels it. Recordings already in the upload manifest,
+    unchanged or with the same content, are skipped unless "force" is set.
+    """
+    data = request.get_json(silent=True) or request.form.to_dict(flat=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    if 'files' not in data and request.form.getlist('files'):
+        data['files'] = request.form.getlist('files')
+    try:
+        files = batch_upload_files(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    force = data.get('force') in (True, '1', 'true')
+    for file in files:
+        try:
+            file_stat = os.stat(file['path'])
+        except OSError as e:
+            file['status'] = 'error'
+            file['error'] = f'Recording not readable: {e}'
+            continue
+        uploaded = find_uploaded_recording(data_root_for_path(os.path.abspath(file['path'])), file['domain'],
+                                           file['rtmpkey'], file['name'], file_stat.st_size, file_stat.st_mtime_ns,
+                                           path=file['path'])
+        if uploaded and not force:
+            file['status'] = 'skipped'
+            file['uploaded'] = uploaded
+
+    upload_id = str(uuid.uuid4())
+    upload_progress[upload_id] = {
+        'batch': True,
+        'progress': 0,
+        'status': 'starting',
+        'error': None,
+        'result': None,
+        'cancelled': False,
+        'files': files,
+        'current': None,
+        'total_bytes': sum(file['size'] for file in files if file['status'] == 'pending'),
+        'bytes_sent': 0,
+        'bytes_per_second': 0,
+        'buffered_bytes': 0,
+        'elapsed': None
+    }
+    thread = threading.Thread(target=run_upload_batch, args=(upload_id,), daemon=True)
+    upload_threads[upload_id] = thread
+    thread.start()
+
+    return jsonify({
+        'upload_id': upload_id,
+        'status': 'started',
+        'files': len(files),
+        'skipped': sum(1 for file in files if file['status'] == 'skipped')
+    })
+
 @app.route('/upload-progress/<upload_id>')
 def get_upload_progress(upload_id):
     """Get the current progress of an upload"""
@@ -823,6 +4980,7 @@ def cancel_upload(upload_id):
     # Mark upload as cancelled
     upload_progress[upload_id]['cancelled'] = True
     upload_progress[upload_id]['status'] = 'cancelling'
+    stream_events.notify(upload_id)
     
     return jsonify({'status': 'cancelling'})
 
@@ -830,37 +4988,32 @@ def cancel_upload(upload_id):
 def upload_progress_stream(upload_id):
     """SSE endpoint for real-time upload progress monitoring"""
     def generate():
-        # Send initial connection event
-        yield f"data: {json.dumps({'type': 'connected', 'upload_id': upload_id})}\n\n"
-        
-        # Monitor upload progress
-        while upload_id in upload_progress:
-            progress_data = upload_progress[upload_id].copy()
-            
-            # Send progress update
-            progress_data['type'] = 'progress'
-            yield f"data: {json.dumps(progress_data)}\n\n"
-            
-            # If upload is finished, send final status and close
-            if progress_data['status'] in ['completed', 'error', 'cancelled']:
-                time.sleep(0.1)  # Small delay to ensure client receives final update
-                break
-                
-            time.sleep(0.2)  # Update every 200ms for real-time feel
-        
-        # Send close event
-        yield f"data: {json.dumps({'type': 'closed', 'upload_id': upload_id})}\n\n"
+        if METRICS_ENABLED:
+            metrics_inc('sse_streams_active', 1)
+        try:
+            # Send initial connection event
+            yield f"data: {json.dumps({'type': 'connected', 'upload_id': upload_id})}\n\n"
+
+            # Send the progress whenever the upload notifies a change
+            while upload_id in upload_progress:
+                version = stream_events.version(upload_id)
+                progress_data = upload_progress[upload_id].copy()
+                progress_data['type'] = 'progress'
+                yield f"data: {json.dumps(progress_data)}\n\n"
+
+                # If upload is finished, send final status and close
+                if progress_data['status'] in ['completed', 'error', 'cancelled']:
+                    break
+
+                yield StreamWait(upload_id, version, FOLLOW_KEEPALIVE_INTERVAL)
+
+            # Send close event
+            yield f"data: {json.dumps({'type': 'closed', 'upload_id': upload_id})}\n\n"
+        finally:
+            if METRICS_ENABLED:
+                metrics_inc('sse_streams_active', -1)
     
-    return Response(
-        generate(),
-        mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'Connection': 'keep-alive',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Cache-Control'
-        }
-    )
+    return sse_response(generate())
 
 @app.route('/delete-recording', methods=['POST'])
 def delete_recording():
@@ -916,8 +5069,170 @@ def find_available_port(start_port=5001, max_port=5100):
             return port
     return None
 
+# ASGI front end
+# With --asgi the app is served by uvicorn through AsgiApp. Ordinary requests
+# still go through Flask, run on a thread pool; SSE responses (see
+# sse_response) are handed back to the event loop and driven by
+# stream_sse_async, so open progress and follow streams cost a coroutine each
+# instead of a server thread.
+ASGI_WORKER_THREADS = 32
+ASGI_BODY_BATCH_SIZE = 256 * 1024
+
+async def stream_sse_async(events, send, disconnected, executor):
+    """Drive an SSE event generator on the event loop until it ends or the client leaves"""
+    loop = asyncio.get_running_loop()
+    try:
+        while not disconnected.done():
+            # Generator steps may touch the disk (follow streams), so they run on the pool
+            item = await loop.run_in_executor(executor, next, events, None)
+            if item is None:
+                break
+            if isinstance(item, StreamWait):
+                waiters = {disconnected}
+                if item.key is not None:
+                    waiters.add(asyncio.ensure_future(stream_events.wait_async(item.key, item.version)))
+                await asyncio.wait(waiters, timeout=item.timeout, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waiters - {disconnected}:
+                    waiter.cancel()
+            else:
+                await send({'type': 'http.response.body', 'body': item.encode('utf-8'), 'more_body': True})
+    finally:
+        events.close()
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+def read_body_batch(iterator):
+    """Collect WSGI body chunks up to ASGI_BODY_BATCH_SIZE, returning (data, finished)"""
+    parts = []
+    size = 0
+    for chunk in iterator:
+        if chunk:
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= ASGI_BODY_BATCH_SIZE:
+                return b''.join(parts), False
+    return b''.join(parts), True
+
+class AsgiApp:
+    """ASGI adapter for a WSGI app that runs SSE responses as coroutines"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=ASGI_WORKER_THREADS, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    self.executor.shutdown(wait=False)
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        # Request bodies are small form posts, so they are read up front
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        environ = self.build_environ(scope, b''.join(body))
+
+        async def wait_for_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+        disconnected = asyncio.ensure_future(wait_for_disconnect())
+
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, result = await loop.run_in_executor(self.executor, self.call_wsgi, environ)
+            await send({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            })
+            events = environ.get('streamer.sse_events')
+            if events is not None:
+                # The response iterable only wraps the generator; drive the generator itself
+                result.close()
+                await stream_sse_async(events, send, disconnected, self.executor)
+                return
+
+            iterator = iter(result)
+            try:
+                finished = False
+                while not finished and not disconnected.done():
+                    data, finished = await loop.run_in_executor(self.executor, read_body_batch, iterator)
+                    await send({'type': 'http.response.body', 'body': data, 'more_body': not finished})
+            finally:
+                if hasattr(result, 'close'):
+                    await loop.run_in_executor(self.executor, result.close)
+        finally:
+            disconnected.cancel()
+
+    def call_wsgi(self, environ):
+        """Run the WSGI app up to its response headers (Flask calls start_response right away)"""
+        response = []
+
+        def write(data):
+            raise RuntimeError('WSGI write() is not supported')
+
+        def start_response(status, headers, exc_info=None):
+            response[:] = [status, headers]
+            return write
+
+        result = self.wsgi_app(environ, start_response)
+        return response[0], response[1], result
+
+    @staticmethod
+    def build_environ(scope, body):
+        """Translate an ASGI HTTP scope into a WSGI environ"""
+        server = scope.get('server') or ('127.0.0.1', 80)
+        client = scope.get('client') or ('127.0.0.1', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
 def start_flask_server(port):
     """Start Flask server in a separate thread"""
+    if args.asgi:
+        try:
+            import uvicorn
+        except ImportError:
+            print("uvicorn not available (pip install uvicorn), using the threaded server instead")
+        else:
+            uvicorn.run(AsgiApp(app), host='127.0.0.1', port=port, log_level='warning')
+            return
     app.run(host='127.0.0.1', port=port, debug=False, use_reloader=False)
 
 def main():
@@ -948,6 +5263,31 @@ def main():
         # No splash screen when running as script or PyInstaller not used
         SPLASH_AVAILABLE = False
     
+    if args.vendor_assets:
+        # Maintenance command: vendor the front-end files and exit
+        close_splash()
+        try:
+            vendor_leaflet_assets()
+        except (OSError, requests.RequestException) as e:
+            print(f"Error vendoring Leaflet assets: {e}")
+        return
+    
+    if args.compact_tracks:
+        # Maintenance command: compact and exit without starting the server
+        close_splash()
+        results = compact_tracks(remove_tsv=args.compact_remove_tsv)
+        if results:
+            tsv_size = sum(r['tsv_size'] for r in results)
+            compact_size = sum(r['compact_size'] for r in results)
+            tsv_seconds = sum(r['tsv_load_seconds'] for r in results)
+            compact_seconds = sum(r['compact_load_seconds'] for r in results)
+            print(f"Compacted {len(results)} track(s): {filesizeformat(tsv_size)} -> {filesizeformat(compact_size)} "
+                  f"({compact_size / max(tsv_size, 1):.0%}), "
+                  f"load {tsv_seconds:.2f} s -> {compact_seconds:.2f} s")
+        else:
+            print("No new finished TSV tracks to compact")
+        return
+    
     if not server_only_mode:
         # Import UI modules only when needed
         try:
@@ -961,11 +5301,9 @@ def main():
         # Update splash screen if available (PyInstaller builds)
         if SPLASH_AVAILABLE:
             update_splash_text("🚀 Starting Streamer Viewer...")
-            time.sleep(1.0)  # Only delay if splash screen is visible
         
             # Check if another instance is already running
             update_splash_text("🔍 Checking for existing instance...")
-            time.sleep(0.3)
     
     existing_port = find_existing_instance()
     if existing_port:
@@ -977,8 +5315,6 @@ def main():
         
         # not in server only mode, proceeding 
         update_splash_text("✅ Opening existing instance...")
-        if SPLASH_AVAILABLE:
-            time.sleep(0.3)
         
         # Open the existing instance
         existing_url = f"http://127.0.0.1:{existing_port}"
@@ -1028,7 +5364,11 @@ def main():
         return  # Exit without starting new server
     
     print("No existing instance found, starting new server...")
-    if args.data_dir:
+    if MULTI_ROOT:
+        print(f"Using {len(DATA_ROOTS)} streamer data directories:")
+        for root in DATA_ROOTS:
+            print(f"  {root['name']}: {root['path']}")
+    elif args.data_dir:
         print(f"Using custom streamer data directory: {STREAMER_DATA_DIR}")
     else:
         print(f"Using default streamer data directory: {STREAMER_DATA_DIR}")
@@ -1036,16 +5376,20 @@ def main():
     # Update splash screen if available and not server-only
     if not server_only_mode:
         update_splash_text("📁 Checking data directories...")
-        if SPLASH_AVAILABLE:
-            time.sleep(0.8)
         
     # Check if data directories exist        
-    if not os.path.exists(STREAMER_DATA_DIR):
-        print(f"Warning: Streamer data directory not found: {STREAMER_DATA_DIR}")
-    if not os.path.exists(TRACKS_DIR):
-        print(f"Warning: Tracks directory not found: {TRACKS_DIR}")
-    if not os.path.exists(RECORDINGS_DIR):
-        print(f"Warning: Recordings directory not found: {RECORDINGS_DIR}")
+    for root in DATA_ROOTS:
+        if not os.path.exists(root['path']):
+            print(f"Warning: Streamer data directory not found: {root['path']}")
+            continue
+        if not os.path.exists(root['tracks_dir']):
+            print(f"Warning: Tracks directory not found: {root['tracks_dir']}")
+        if not os.path.exists(root['recordings_dir']):
+            print(f"Warning: Recordings directory not found: {root['recordings_dir']}")
+    
+    # Warm the catalogs and caches while the server and window start
+    if not args.no_warmup:
+        start_warmup(args.warmup_tracks)
     
     # Find available port or use specified port
     if args.port:
@@ -1061,8 +5405,6 @@ def main():
         # Find available port automatically
         if not server_only_mode:
             update_splash_text("🌐 Finding available port...")
-            if SPLASH_AVAILABLE:
-                time.sleep(0.3)
             
         port = find_available_port()
         if not port:
@@ -1075,24 +5417,31 @@ def main():
     
     if not server_only_mode:
         update_splash_text(f"⚡ Starting web server on port {port}...")
-        if SPLASH_AVAILABLE:
-            time.sleep(0.4)
     
     # Start Flask server in background thread
     server_thread = threading.Thread(target=start_flask_server, args=(port,))
     server_thread.daemon = True
     server_thread.start()
     
+    if args.auto_compact:
+        compactor_thread = threading.Thread(target=background_compactor, daemon=True)
+        compactor_thread.start()
+    
     if not server_only_mode:
         update_splash_text("🎯 Initializing web interface...")
-        if SPLASH_AVAILABLE:
-            time.sleep(0.4)
-            update_splash_text("🗺️ Loading GPS components...")
-            time.sleep(0.3)
-            update_splash_text("🎥 Preparing video player...")
-            time.sleep(0.3)
-            update_splash_text("✨ Almost ready...")
-            time.sleep(0.4)
+        if SPLASH_AVAILABLE and not args.no_warmup:
+            # Show the warm-up progress; a slow warm-up finishes in the
+            # background after the window opens, serving partial results
+            deadline = time.monotonic() + WARMUP_SPLASH_TIMEOUT
+            message = None
+            while time.monotonic() < deadline:
+                state = warmup_status()
+                if warmup_message(state) != message:
+                    message = warmup_message(state)
+                    update_splash_text(message)
+                if state['ready']:
+                    break
+                time.sleep(0.1)
     
     # Wait a moment for server to start
     time.sleep(0.5)
@@ -1120,8 +5469,6 @@ def main():
     # Try webview first (available on all platforms), fallback to browser
     if not server_only_mode:
         update_splash_text("✅ Ready! Opening application...")
-        if SPLASH_AVAILABLE:
-            time.sleep(0.3)
     
     # Use webview if available, otherwise fallback to browser
     if webview_available and webview_module is not None: